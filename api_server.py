@@ -0,0 +1,200 @@
+"""Standalone JSON HTTP API for team generation.
+
+    python -m teambuilder serve --port 8080
+
+    GET  /tiers  -> {"tiers": ["AG", "Uber", "OU", ...]}
+    POST /teams  {"tier": "OU", "include_lower_tiers": true, "count": 2, "seed": 1, "upload": false}
+                 -> {"seed": 1, "teams": [{"index": 0, "code": ..., "text": ..., "sets": [...]}, ...]}
+
+Team ``i`` of a request is generated from ``random.Random(f"{seed}-{i}")``,
+the same as ``teambuilder generate``, so a seed gives the same teams through
+either interface. Every request thread shares one ``TeamGenerator``.
+"""
+
+import json
+import random
+import threading
+import traceback
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+from pokepaste_uploader import upload_in_background
+from team_codes import encode_team
+from team_generator import WEIGHTINGS, TeamGenerator
+
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_COUNT = 100
+MAX_BEST_OF = 1000
+# Candidate teams (count * best_of) one request may generate in total.
+MAX_CANDIDATES = 10_000
+ROUTES = ("/tiers", "/teams")
+# How long a request waits for a free generation slot before getting a 503.
+QUEUE_TIMEOUT = 1.0
+
+
+class RequestError(ValueError):
+    """An invalid request body; answered with a 400."""
+
+
+def _field(body: dict, name: str, kind: type, default, minimum: int | None = None, maximum: int | None = None):
+    """``body[name]`` checked against ``kind`` (and the bounds, for ints), or ``default`` if absent or null."""
+    value = body.get(name)
+    if value is None:
+        return default
+    # bool is an int subclass, so reject it explicitly for integer fields.
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise RequestError(f"{name} must be {kind.__name__}")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise RequestError(f"{name} must be between {minimum} and {maximum}")
+    return value
+
+
+def start_teams(generator: TeamGenerator, body: dict) -> tuple[dict, list[Future]]:
+    """Generate the teams for a POST /teams body and start any uploads.
+
+    Returns the response without paste URLs and the upload futures, which
+    ``finish_uploads`` waits for. Raises RequestError for invalid input.
+    """
+    tier = _field(body, "tier", str, "OU")
+    if tier not in generator.catalog.tiers:
+        raise RequestError(f"unknown tier {tier!r}")
+    include_lower_tiers = _field(body, "include_lower_tiers", bool, True)
+    count = _field(body, "count", int, 1, 1, MAX_COUNT)
+    seed = _field(body, "seed", int, None)
+    upload = _field(body, "upload", bool, False)
+    weighting = _field(body, "weighting", str, "uniform")
+    if weighting not in WEIGHTINGS:
+        raise RequestError(f"weighting must be one of {', '.join(WEIGHTINGS)}")
+    best_of = _field(body, "best_of", int, 1, 1, MAX_BEST_OF)
+    if count * best_of > MAX_CANDIDATES:
+        raise RequestError(f"count * best_of must be at most {MAX_CANDIDATES}")
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    teams = []
+    for index in range(count):
+        choices = generator.choices(
+            tier,
+            include_lower_tiers=include_lower_tiers,
+            rng=random.Random(f"{seed}-{index}"),
+            weighting=weighting,
+            best_of=best_of,
+        )
+        teams.append(
+            {
+                "index": index,
+                "code": encode_team(generator.catalog, choices),
+                "text": generator.team_text(choices),
+                "sets": generator.sets(choices),
+            }
+        )
+
+    futures = []
+    if upload:
+        futures = [
+            upload_in_background(team["text"], title=f"Random {tier} Team {team['index'] + 1}", author="PokemonTeamBuilder")
+            for team in teams
+        ]
+    return {"seed": seed, "teams": teams}, futures
+
+
+def finish_uploads(result: dict, futures: list[Future]) -> dict:
+    """Add the paste URL (or upload error) of every team to ``result``."""
+    for team, future in zip(result["teams"], futures):
+        try:
+            team["paste_url"] = future.result()
+        except Exception as exc:
+            team["paste_error"] = str(exc)
+    return result
+
+
+def generate_teams(generator: TeamGenerator, body: dict) -> dict:
+    """Handle a POST /teams body; raises RequestError for invalid input."""
+    return finish_uploads(*start_teams(generator, body))
+
+
+def make_server(
+    generator: TeamGenerator, host: str = "127.0.0.1", port: int = 8080, max_concurrent: int = 8
+) -> ThreadingHTTPServer:
+    """An API server over ``generator``; call ``serve_forever()`` on it.
+
+    At most ``max_concurrent`` requests generate at the same time; others
+    wait up to ``QUEUE_TIMEOUT`` seconds for a slot and then get a 503. A
+    request gives its slot back before waiting for its Pokepaste uploads.
+    """
+    slots = threading.BoundedSemaphore(max_concurrent)
+    tiers_body = json.dumps({"tiers": generator.tiers}).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so a client can send many requests over one connection.
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this Nagle delays the body.
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status: int, body: bytes | dict, headers: dict[str, str] | None = None) -> None:
+            if isinstance(body, dict):
+                body = json.dumps(body, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            metrics.count("api_responses", path=self.path if self.path in ROUTES else "other", status=status)
+
+        def do_GET(self):
+            if self.path == "/tiers":
+                self._send_json(200, tiers_body)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/teams":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if not 0 <= length <= MAX_BODY_BYTES:
+                self.close_connection = True
+                self._send_json(413, {"error": f"body must be at most {MAX_BODY_BYTES} bytes"})
+                return
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "body must be JSON"})
+                return
+            if not isinstance(body, dict):
+                self._send_json(400, {"error": "body must be a JSON object"})
+                return
+
+            if not slots.acquire(timeout=QUEUE_TIMEOUT):
+                self._send_json(503, {"error": "too many concurrent requests"}, {"Retry-After": "1"})
+                return
+            try:
+                try:
+                    with metrics.timer("api_teams"):
+                        result, uploads = start_teams(generator, body)
+                finally:
+                    slots.release()
+                result = finish_uploads(result, uploads)
+            except RequestError as exc:
+                self._send_json(400, {"error": str(exc)})
+            except ValueError as exc:
+                self._send_json(422, {"error": str(exc)})
+            except Exception:
+                traceback.print_exc()
+                self._send_json(500, {"error": "internal server error"})
+            else:
+                self._send_json(200, result)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
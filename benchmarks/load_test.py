@@ -0,0 +1,359 @@
+"""Concurrent-session load test against a local stub Pokepaste server.
+
+    python -m benchmarks.load_test --sessions 16 --requests 20              # app code path, in-process
+    python -m benchmarks.load_test --mode apptest --sessions 4 --requests 5 # the real Streamlit script
+    python -m benchmarks.load_test --mode api --sessions 32                 # the JSON API over HTTP
+    python -m benchmarks.load_test --paste-latency 0.3 --paste-error-rate 0.05 -o report.json
+    python -m benchmarks.load_test --compare report.json                    # diff against an older report
+
+Every session sends ``--requests`` requests back to back, with seeds fixed
+per session and request, so a run is repeatable (apptest sessions use the
+app's own random seeds, and their first script run counts toward the wall
+time). Uploads go to
+``StubPokepasteServer`` with the given latency and error rate. The database
+and paste cache are private copies, like in ``run_benchmarks``.
+
+Modes:
+
+- ``session``: what one click runs in ``ui_app``: ``generate_random_team_for_tier``,
+  the card grid, then waiting for the upload. Sessions are threads, as in
+  the Streamlit server.
+- ``apptest``: each session is a ``streamlit.testing`` AppTest that clicks
+  "Generate random team", so widget handling and script reruns are included.
+- ``api``: keep-alive HTTP clients posting to ``api_server`` with upload on.
+
+The report has throughput, p50/p95/p99 latency, errors, per-stage means from
+``metrics``, database use (queries, pooled connections, paste cache) and the
+peak thread count by thread name.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.run_benchmarks import environment
+from benchmarks.stub_pokepaste import StubPokepasteServer
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SEED = 20240601
+MODES = ("session", "apptest", "api")
+# Seeds are SEED + session * SESSION_STRIDE + request.
+SESSION_STRIDE = 100_000
+THREAD_SAMPLE_INTERVAL = 0.02
+
+
+def latency_summary(samples: list[float]) -> dict[str, float]:
+    """Nearest-rank percentiles of ``samples`` (seconds), in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    samples = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return round(samples[max(0, math.ceil(q * len(samples)) - 1)] * 1000, 2)
+
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+class ThreadSampler:
+    """Samples the live threads in the background; peak total and peak per name prefix."""
+
+    def __init__(self, interval: float = THREAD_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self.peak_by_name: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-test-sampler", daemon=True)
+
+    def __enter__(self) -> "ThreadSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            threads = [thread for thread in threading.enumerate() if thread is not self._thread]
+            self.peak = max(self.peak, len(threads))
+            by_name = Counter(re.sub(r"[-_ ]?\d.*$", "", thread.name) for thread in threads)
+            for name, count in by_name.items():
+                self.peak_by_name[name] = max(self.peak_by_name[name], count)
+
+    def as_dict(self) -> dict:
+        return {"peak": self.peak, "peak_by_name": dict(sorted(self.peak_by_name.items()))}
+
+
+def run_sessions(
+    request: Callable[[int, int], dict[str, float]], sessions: int, requests: int
+) -> tuple[dict[str, list[float]], Counter[str], float]:
+    """Run ``request(session, index)`` ``requests`` times on each of ``sessions`` threads.
+
+    ``request`` returns named durations in seconds (e.g. "latency"). Returns
+    the durations by name, error counts by exception type and the wall time.
+    """
+    timings: dict[str, list[float]] = {}
+    errors: Counter[str] = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(sessions + 1)
+
+    def session(index: int) -> None:
+        start.wait()
+        for i in range(requests):
+            try:
+                durations = request(index, i)
+            except Exception as exc:
+                with lock:
+                    errors[_error_name(exc)] += 1
+                continue
+            with lock:
+                for name, seconds in durations.items():
+                    timings.setdefault(name, []).append(seconds)
+
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as pool:
+        futures = [pool.submit(session, index) for index in range(sessions)]
+        start.wait()
+        started = time.perf_counter()
+        for future in futures:
+            future.result()
+        wall = time.perf_counter() - started
+    return timings, errors, wall
+
+
+def _error_name(exc: Exception) -> str:
+    if "locked" in str(exc):
+        return "database_locked"
+    return type(exc).__name__
+
+
+def session_request(ui_app, tier: str, best_of: int) -> Callable[[int, int], dict[str, float]]:
+    """One "Generate" click as ``ui_app.main`` runs it, without the Streamlit widgets."""
+    from team_render import render_grid
+
+    def request(session: int, index: int) -> dict[str, float]:
+        started = time.perf_counter()
+        team_text, team_code, paste_future = ui_app.generate_random_team_for_tier(
+            tier, seed=SEED + session * SESSION_STRIDE + index, best_of=best_of
+        )
+        render_grid(ui_app._team_cards_from_code(team_code), ui_app._get_sprite_index())
+        rendered = time.perf_counter()
+        paste_future.result()
+        return {"latency": time.perf_counter() - started, "team_shown": rendered - started}
+
+    return request
+
+
+def apptest_request(tier: str, best_of: int, timeout: float) -> Callable[[int, int], dict[str, float]]:
+    """A click on "Generate random team" in one AppTest per session."""
+    from streamlit.testing.v1 import AppTest
+
+    apps = {}
+    # Each AppTest runs the module-level ui_app, so the harness's patches apply.
+    script = "import ui_app\nui_app.main()\n"
+
+    def request(session: int, index: int) -> dict[str, float]:
+        app = apps.get(session)
+        if app is None:
+            app = apps[session] = AppTest.from_string(script, default_timeout=timeout).run()
+            app.selectbox[0].set_value(tier)
+            app.select_slider[0].set_value(best_of)
+        started = time.perf_counter()
+        app.button[0].click().run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+        if app.error:
+            raise RuntimeError(app.error[0].value)
+        return {"latency": time.perf_counter() - started}
+
+    return request
+
+
+def api_request(base_url: str, tier: str, best_of: int) -> Callable[[int, int], dict[str, float]]:
+    """POST /teams with upload on, over one keep-alive connection per session."""
+    host, port = base_url.removeprefix("http://").split(":")
+    local = threading.local()
+
+    def request(session: int, index: int) -> dict[str, float]:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(host, int(port), timeout=60)
+        body = json.dumps(
+            {"tier": tier, "seed": SEED + session * SESSION_STRIDE + index, "upload": True, "best_of": best_of}
+        )
+        started = time.perf_counter()
+        conn.request("POST", "/teams", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        if "paste_error" in payload["teams"][0]:
+            raise RuntimeError("paste_error")
+        return {"latency": time.perf_counter() - started}
+
+    return request
+
+
+def run(
+    mode: str,
+    sessions: int,
+    requests: int,
+    tier: str = "OU",
+    best_of: int = 1,
+    paste_latency: float = 0.0,
+    paste_error_rate: float = 0.0,
+    timeout: float = 60,
+) -> dict:
+    """Run one load test and return its report."""
+    import metrics
+    import pokepaste_uploader
+    import ui_app
+
+    with tempfile.TemporaryDirectory() as tmp, StubPokepasteServer(
+        latency=paste_latency, error_rate=paste_error_rate, seed=SEED
+    ) as stub:
+        db_copy = Path(tmp) / ui_app.DB_PATH.name
+        shutil.copy2(ui_app.DB_PATH, db_copy)
+        ui_app.DB_PATH = db_copy
+        ui_app.PASTE_CACHE_PATH = Path(tmp) / "paste_cache.db"
+        ui_app.HISTORY_PATH = Path(tmp) / "team_history.db"
+        pokepaste_uploader.PASTE_URL = stub.base_url
+
+        server = None
+        if mode == "session":
+            request = session_request(ui_app, tier, best_of)
+            # Load the catalog and sprite index before the clock starts.
+            ui_app._build_random_team_for_tier(tier, rng=random.Random(SEED))
+            ui_app._get_sprite_index()
+        elif mode == "apptest":
+            request = apptest_request(tier, best_of, timeout)
+        else:
+            from api_server import make_server
+            from team_generator import TeamGenerator
+
+            server = make_server(TeamGenerator.from_db(db_copy), port=0, max_concurrent=sessions)
+            threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+            host, port = server.server_address[:2]
+            request = api_request(f"http://{host}:{port}", tier, best_of)
+
+        metrics.REGISTRY.reset()
+        try:
+            with ThreadSampler() as sampler:
+                timings, errors, wall = run_sessions(request, sessions, requests)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        snapshot = metrics.snapshot()
+        completed = len(timings.get("latency", ()))
+        counters = Counter()
+        for counter in snapshot["counters"]:
+            labels = ",".join(f"{k}={v}" for k, v in counter["labels"].items())
+            counters[f"{counter['name']}{{{labels}}}" if labels else counter["name"]] += counter["value"]
+        # The API keeps its catalog in memory and uploads without the paste cache.
+        pool = ui_app._get_db_pool() if mode != "api" else None
+        paste_cache = ui_app._get_paste_cache().stats() if mode != "api" else None
+        report = {
+            "config": {
+                "mode": mode,
+                "sessions": sessions,
+                "requests_per_session": requests,
+                "tier": tier,
+                "best_of": best_of,
+                "paste_latency": paste_latency,
+                "paste_error_rate": paste_error_rate,
+                "seed": SEED,
+            },
+            "environment": environment(),
+            "results": {
+                "wall_seconds": round(wall, 3),
+                "completed": completed,
+                "throughput_per_sec": round(completed / wall, 2) if wall else 0.0,
+                "latency": {name: latency_summary(samples) for name, samples in sorted(timings.items())},
+                "errors": dict(errors),
+                "stages_mean_ms": {
+                    stage: round(data["total_seconds"] / data["count"] * 1000, 3)
+                    for stage, data in snapshot["stages"].items()
+                    if data["count"]
+                },
+                "counters": dict(sorted(counters.items())),
+                "db": {
+                    "queries": counters.get("db_queries", 0),
+                    "pool_connections": len(pool) if pool is not None else None,
+                    "paste_cache": paste_cache,
+                    "locked_errors": errors.get("database_locked", 0),
+                },
+                "threads": sampler.as_dict(),
+                "stub_pokepaste": {"requests": stub.requests, "errors": stub.errors},
+            },
+        }
+        if pool is not None:
+            pool.close()
+    return report
+
+
+def compare(report: dict, baseline: dict) -> list[str]:
+    """Lines comparing throughput and latency percentiles with an older report."""
+    lines = []
+    for key in ("mode", "sessions", "requests_per_session", "best_of", "paste_latency", "paste_error_rate"):
+        if report["config"].get(key) != baseline["config"].get(key):
+            lines.append(f"config differs: {key} {baseline['config'].get(key)} -> {report['config'].get(key)}")
+    pairs = [("throughput_per_sec", report["results"]["throughput_per_sec"], baseline["results"]["throughput_per_sec"])]
+    for name, summary in report["results"]["latency"].items():
+        for stat in ("p50_ms", "p95_ms", "p99_ms"):
+            old = baseline["results"]["latency"].get(name, {}).get(stat)
+            pairs.append((f"{name}.{stat}", summary.get(stat), old))
+    for name, new, old in pairs:
+        if new is None or not old:
+            continue
+        lines.append(f"{name}: {old} -> {new} ({(new / old - 1) * 100:+.0f}%)")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the team builder with concurrent sessions.")
+    parser.add_argument("--mode", choices=MODES, default="session")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions")
+    parser.add_argument("--requests", type=int, default=20, help="requests per session")
+    parser.add_argument("--tier", default="OU")
+    parser.add_argument("--best-of", type=int, default=1, help="candidate teams per request")
+    parser.add_argument("--paste-latency", type=float, default=0.0, help="stub Pokepaste latency in seconds")
+    parser.add_argument("--paste-error-rate", type=float, default=0.0, help="fraction of stub uploads answered 503")
+    parser.add_argument("-o", "--output", type=Path, help="also write the report to this file")
+    parser.add_argument("--compare", type=Path, help="an older report to compare with")
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.mode, args.sessions, args.requests, args.tier, args.best_of, args.paste_latency, args.paste_error_rate
+    )
+    payload = json.dumps(report, indent=2, sort_keys=True)
+    print(payload)
+    if args.output:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    if args.compare:
+        for line in compare(report, json.loads(args.compare.read_text(encoding="utf-8"))):
+            print(line, file=sys.stderr)
+    return 1 if report["results"]["completed"] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
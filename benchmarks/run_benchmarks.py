@@ -0,0 +1,339 @@
+"""Benchmarks for startup, team generation, scoring, parsing, rendering and upload paths.
+
+    python -m benchmarks.run_benchmarks                        # print results as JSON
+    python -m benchmarks.run_benchmarks -o results.json
+    python -m benchmarks.run_benchmarks --save-baseline        # overwrite benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --check --threshold 25 # exit 1 if a stage is >25% slower
+
+Every stage uses fixed seeds and runs against a private copy of
+``pokemon_strategies.db``, so results are comparable between runs. Every
+sample of a stage alternates with a sample of a fixed pure-Python reference
+workload (``reference_us``); --check compares each stage relative to its reference,
+so a faster or slower machine, or a busy host, does not look like a change
+in the code.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.stub_pokepaste import StubPokepasteServer
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+ROOT = Path(__file__).resolve().parent.parent
+SEED = 20240601
+
+# Entry points timed by ``python -X importtime`` (budgets: tests/test_import_budgets.py).
+# ui_app is imported after streamlit, as it is when the Streamlit server runs the script.
+STARTUP_MODULES = ("ui_app", "team_generator", "api_server")
+IMPORT_PRELOAD = {"ui_app": ("streamlit",)}
+
+
+def _summarize(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "median_us": round(statistics.median(samples) * 1e6, 2),
+        "p95_us": round(samples[int(0.95 * (len(samples) - 1))] * 1e6, 2),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+    }
+
+
+def _reference_work(i: int) -> list:
+    """Interpreter-bound work (seeded draws, tuples, sorting) that no change to the app affects."""
+    rng = random.Random(SEED + i)
+    return sorted((rng.randrange(1000), rng.random()) for _ in range(500))
+
+
+def _time_each(func: Callable[[int], object], runs: int, warmup: int = 10) -> dict[str, float]:
+    """Sample ``func``, alternating with samples of the reference workload."""
+    for i in range(warmup):
+        func(i)
+    samples = []
+    reference = []
+    # Collections triggered by earlier stages' garbage would land in random samples.
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(runs):
+            started = time.perf_counter()
+            _reference_work(i)
+            reference.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            func(i)
+            samples.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return {**_summarize(samples), "reference_us": round(statistics.median(reference) * 1e6, 2)}
+
+
+def import_time_us(module: str, preload: tuple[str, ...] = ()) -> int:
+    """Cumulative import time of ``module`` in a fresh interpreter."""
+    code = "; ".join(f"import {name}" for name in (*preload, module))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    # Lines look like "import time:   self |  cumulative | name", nested imports indented.
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].rstrip() == f" {module}":
+            return int(fields[1])
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def bench_startup(runs: int) -> dict[str, dict]:
+    results = {}
+    for module in STARTUP_MODULES:
+        samples = [import_time_us(module, IMPORT_PRELOAD.get(module, ())) / 1e6 for _ in range(runs)]
+        results[f"startup.import_{module}"] = _summarize(samples)
+    return results
+
+
+def bench_catalog_load(db_path: Path, runs: int) -> dict[str, dict]:
+    """Catalog load from SQLite and from a fresh snapshot of the same database.
+
+    A snapshot catalog decodes builds on first use, so the snapshot is also
+    timed with every build looked up once.
+    """
+    import sqlite3
+
+    from build_catalog import BuildCatalog, read_build_data
+    from catalog_snapshot import load_snapshot, write_snapshot
+
+    conn = sqlite3.connect(db_path)
+    try:
+        builds, usage_weights = read_build_data(conn)
+    finally:
+        conn.close()
+    snapshot = db_path.with_suffix(".snapshot")
+    write_snapshot(builds, usage_weights, snapshot, db_path)
+    return {
+        "catalog.load_sqlite": _time_each(lambda i: BuildCatalog.from_db(db_path), runs, warmup=2),
+        "catalog.load_snapshot": _time_each(lambda i: load_snapshot(snapshot, db_path), runs, warmup=2),
+        "catalog.load_snapshot_all_builds": _time_each(
+            lambda i: _touch_builds(load_snapshot(snapshot, db_path)), runs, warmup=2
+        ),
+    }
+
+
+def _touch_builds(catalog) -> None:
+    for build_id in catalog.all_build_ids():
+        catalog.get(build_id)
+
+
+def bench_generation(ui_app, runs: int) -> dict[str, dict]:
+    from build_catalog import TIER_ORDER
+
+    results = {}
+    for tier in TIER_ORDER:
+        for include_lower in (True, False):
+            label = "lower" if include_lower else "strict"
+            results[f"generate.{tier}.{label}"] = _time_each(
+                lambda i: ui_app._build_random_team_for_tier(
+                    tier, include_lower_tiers=include_lower, rng=random.Random(SEED + i)
+                ),
+                runs,
+            )
+    return results
+
+
+def bench_scoring(ui_app, teams: int, runs: int) -> dict[str, dict]:
+    candidates = [ui_app._generate_team_choices("OU", rng=random.Random(SEED + i)) for i in range(teams)]
+    scorer = ui_app._get_team_generator().scorer
+    return {f"score.{teams}_teams": _time_each(lambda i: scorer.score(candidates), runs, warmup=2)}
+
+
+def bench_parsing(ui_app, teams: int, runs: int) -> dict[str, dict]:
+    text = "\n\n".join(
+        ui_app._build_random_team_for_tier("OU", rng=random.Random(SEED + i)) for i in range(teams)
+    )
+    from showdown_format import iter_sets
+
+    result = _time_each(lambda i: list(iter_sets(text.splitlines())), runs)
+    result["sets_per_sec"] = round(teams * 6 / (result["median_us"] / 1e6))
+    return {f"parse.{teams}_teams": result}
+
+
+def bench_streaming(ui_app, teams: int, runs: int) -> dict[str, dict]:
+    """Throughput of the streaming export parser and the packed-format writer on a headed backup."""
+    import io
+
+    from showdown_format import iter_sets, pack_team
+
+    text = "\n".join(
+        f"=== [gen9ou] Benchmarks/Team {i} ===\n\n"
+        + ui_app._build_random_team_for_tier("OU", rng=random.Random(SEED + i))
+        + "\n"
+        for i in range(teams)
+    )
+    sets = list(iter_sets(io.StringIO(text)))
+
+    stream = _time_each(lambda i: sum(1 for _ in iter_sets(io.StringIO(text))), runs, warmup=1)
+    stream["sets_per_sec"] = round(len(sets) / (stream["median_us"] / 1e6))
+    pack = _time_each(lambda i: pack_team(sets), runs, warmup=1)
+    pack["sets_per_sec"] = round(len(sets) / (pack["median_us"] / 1e6))
+    return {f"parse.stream_{teams}_teams": stream, f"pack.{teams}_teams": pack}
+
+
+def bench_rendering(ui_app, runs: int) -> dict[str, dict]:
+    """Grid rendering with a cold card cache and with every card already cached."""
+    from team_render import cards_from_choices, render_card, render_grid
+
+    catalog = ui_app._get_build_catalog()
+    grids = [
+        cards_from_choices(catalog, ui_app._generate_team_choices("OU", rng=random.Random(SEED + i)))
+        for i in range(runs)
+    ]
+
+    def cold(i: int) -> str:
+        render_card.cache_clear()
+        return render_grid(grids[i])
+
+    def cached(i: int) -> str:
+        return render_grid(grids[i])
+
+    results = {"render.grid_6": _time_each(cold, runs)}
+    results["render.grid_6"]["alloc_bytes_per_grid"] = _peak_allocation(cold, runs)
+    for grid in grids:
+        render_grid(grid)
+    results["render.grid_6_cached"] = _time_each(cached, runs)
+    results["render.grid_6_cached"]["alloc_bytes_per_grid"] = _peak_allocation(cached, runs)
+    return results
+
+
+def _peak_allocation(func: Callable[[int], object], runs: int) -> int:
+    """Median peak of newly allocated bytes during one call."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(runs):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func(i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks))
+
+
+def bench_upload(ui_app, runs: int, latency: float) -> dict[str, dict]:
+    from pokepaste_uploader import showdown_to_pokepaste
+
+    team_text = ui_app._build_random_team_for_tier("OU", rng=random.Random(SEED))
+    with StubPokepasteServer(latency=latency) as stub:
+        result = _time_each(
+            lambda i: showdown_to_pokepaste(f"{team_text}\n\n{i}", base_url=stub.base_url),
+            runs,
+        )
+    return {"upload.stub": result}
+
+
+def run(runs: int, parse_teams: int, upload_latency: float) -> dict[str, dict]:
+    import ui_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = Path(tmp) / ui_app.DB_PATH.name
+        shutil.copy2(ui_app.DB_PATH, db_copy)
+        ui_app.DB_PATH = db_copy
+
+        # Warm the per-process catalog and connection so the first sample of
+        # the first stage does not pay the one-off load cost.
+        ui_app._build_random_team_for_tier("OU", rng=random.Random(SEED))
+
+        results = bench_startup(max(3, runs // 40))
+        results.update(bench_catalog_load(db_copy, max(5, runs // 10)))
+        results.update(bench_generation(ui_app, runs))
+        results.update(bench_scoring(ui_app, 1000, max(5, runs // 20)))
+        results.update(bench_parsing(ui_app, parse_teams, max(5, runs // 20)))
+        results.update(bench_streaming(ui_app, parse_teams, max(5, runs // 20)))
+        results.update(bench_rendering(ui_app, runs))
+        results.update(bench_upload(ui_app, max(10, runs // 4), upload_latency))
+        ui_app._get_db_pool().close()
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Return a message for every stage whose median is more than threshold % slower.
+
+    When both sides have a ``reference_us``, the baseline median is first
+    scaled by how much slower or faster the reference ran during the stage.
+    """
+    regressions = []
+    for stage, base in baseline.items():
+        current = results.get(stage)
+        if current is None or stage.startswith("_"):
+            continue
+        scale = 1.0
+        if "reference_us" in current and "reference_us" in base:
+            scale = current["reference_us"] / base["reference_us"]
+        expected = base["median_us"] * scale
+        if current["median_us"] > expected * (1 + threshold / 100):
+            change = (current["median_us"] / expected - 1) * 100
+            regressions.append(
+                f"{stage}: {current['median_us']:.1f}us vs baseline {expected:.1f}us "
+                f"(+{change:.0f}%, machine speed x{scale:.2f})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the team builder benchmarks.")
+    parser.add_argument("--runs", type=int, default=200, help="samples per generation/render stage")
+    parser.add_argument("--parse-teams", type=int, default=1000, help="teams in the parse input")
+    parser.add_argument("--upload-latency", type=float, default=0.0, help="stub Pokepaste latency in seconds")
+    parser.add_argument("-o", "--output", type=Path, help="also write results to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail if a stage regressed past --threshold")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs, args.parse_teams, args.upload_latency)
+    payload = json.dumps(results, indent=2, sort_keys=True)
+    print(payload)
+    if args.output:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    if args.save_baseline:
+        # The machine is recorded for reference; compare() skips keys starting with "_".
+        saved = {"_environment": environment(), **results}
+        args.baseline.write_text(json.dumps(saved, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    if args.check:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
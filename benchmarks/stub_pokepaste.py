@@ -0,0 +1,94 @@
+"""Local stand-in for pokepast.es used by the tests, benchmarks and load tests.
+
+``POST /create`` answers like the real site: ``303 See Other`` with the new
+paste in the ``Location`` header. Latency and error rate are configurable so
+slow or flaky Pokepaste behaviour can be reproduced offline.
+"""
+
+import itertools
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubPokepasteServer:
+    """Threaded HTTP server on localhost; use as a context manager.
+
+    Parameters
+    ----------
+    latency: float
+        Seconds to wait before answering each request.
+    error_rate: float
+        Fraction of requests answered with ``503 Service Unavailable``.
+    seed: int | None
+        Seed for the error draws, so error sequences are reproducible.
+    fail_first: int
+        Number of initial requests answered with 503 before ``error_rate`` applies.
+    """
+
+    def __init__(
+        self, latency: float = 0.0, error_rate: float = 0.0, seed: int | None = None, fail_first: int = 0
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.requests = 0
+        self.errors = 0
+
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubPokepasteServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubPokepasteServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _next_response(self) -> tuple[int, str | None]:
+        with self._lock:
+            self.requests += 1
+            if self.requests <= self.fail_first or self._rng.random() < self.error_rate:
+                self.errors += 1
+                return 503, None
+            return 303, f"/{next(self._ids):016x}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, location = stub._next_response()
+                self.send_response(status)
+                if location:
+                    self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,183 @@
+"""Local stand-in for the Smogon dex used to exercise ``strategy_refresh.py``.
+
+Serves the dex index (``/dex/sv/pokemon/``) and one page per species
+(``/dex/sv/pokemon/<slug>/``) with the strategies embedded in
+``dexSettings`` like the real site. Pages carry an ETag and honour
+``If-None-Match``. Latency and the fraction of pages served without
+strategies are configurable:
+
+    with StubSmogonServer.from_db(latency=0.01, empty_rate=0.1, seed=1) as stub:
+        strategy_refresh.refresh(["OU"], tmp_dir, stub.base_url, rate=0, backoff=0)
+"""
+
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from db_migrations import DB_PATH
+from showdown_format import parse_spread
+from sprite_assets import species_slugs
+from strategy_refresh import EV_KEYS, INDEX_PATH, POKEMON_PATH
+
+
+def dex_page(rpc: str, arguments: dict, result: object) -> bytes:
+    """A minimal dex page embedding one RPC result."""
+    settings = {"injectRpcs": [[json.dumps([rpc, arguments]), result]]}
+    return (
+        "<!DOCTYPE html><html><head><script type=\"text/javascript\">\n"
+        f"  dexSettings = {json.dumps(settings)};\n"
+        "</script></head><body></body></html>\n"
+    ).encode("utf-8")
+
+
+class StubSmogonServer:
+    """Threaded HTTP server on localhost; use as a context manager.
+
+    Parameters
+    ----------
+    species: dict
+        Species name -> Smogon format -> list of Smogon movesets (dicts with
+        name, items, abilities, natures, teratypes, evconfigs, moveslots).
+        Changing a species' formats while the server runs changes its page
+        and ETag; the set of species is fixed when the server is created.
+    latency: float
+        Seconds to wait before answering each request.
+    empty_rate: float
+        Fraction of species pages served without any strategies.
+    seed: int | None
+        Seed for the empty-page draws, so runs are reproducible.
+    """
+
+    def __init__(
+        self,
+        species: dict[str, dict[str, list[dict]]],
+        latency: float = 0.0,
+        empty_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.species = species
+        self.latency = latency
+        self.empty_rate = empty_rate
+        self.requests: Counter[int] = Counter()
+
+        self._paths = {POKEMON_PATH.format(slug=species_slugs(name).dex): name for name in species}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_db(cls, db_path: Path | str = DB_PATH, **kwargs) -> "StubSmogonServer":
+        """A stub serving every build in the strategy database as Smogon movesets."""
+        conn = sqlite3.connect(db_path)
+        try:
+            builds = conn.execute("SELECT id, pokemon_name, tier FROM pokemon_builds ORDER BY id").fetchall()
+            options: dict[int, dict[str, list]] = {build_id: {} for build_id, _, _ in builds}
+            for key, query in (
+                ("items", "SELECT build_id, item_name FROM build_items ORDER BY id"),
+                ("abilities", "SELECT build_id, ability_name FROM build_abilities ORDER BY id"),
+                ("natures", "SELECT build_id, nature_name FROM build_natures ORDER BY id"),
+                ("teratypes", "SELECT build_id, tera_type FROM build_tera_types ORDER BY id"),
+                ("evs", "SELECT build_id, ev_string FROM build_evs ORDER BY id"),
+            ):
+                for build_id, value in conn.execute(query):
+                    options[build_id].setdefault(key, []).append(value)
+            moves: dict[int, dict[str, list[str]]] = {}
+            for build_id, slot, move_name in conn.execute(
+                "SELECT build_id, move_slot, move_name FROM build_moves ORDER BY id"
+            ):
+                moves.setdefault(build_id, {}).setdefault(slot, []).append(move_name)
+        finally:
+            conn.close()
+
+        species: dict[str, dict[str, list[dict]]] = {}
+        for build_id, pokemon_name, tier in builds:
+            build = options[build_id]
+            evs = parse_spread(" / ".join(build.get("evs", ())), 0)
+            species.setdefault(pokemon_name, {}).setdefault(tier, []).append(
+                {
+                    "name": f"Set {build_id}",
+                    "items": build.get("items", []),
+                    "abilities": build.get("abilities", []),
+                    "natures": build.get("natures", []),
+                    "teratypes": build.get("teratypes", []),
+                    "evconfigs": [dict(zip(EV_KEYS, evs))] if build.get("evs") else [],
+                    "moveslots": [
+                        [{"move": move, "type": None} for move in slot_moves]
+                        for _, slot_moves in sorted(moves.get(build_id, {}).items())
+                    ],
+                }
+            )
+        return cls(species, **kwargs)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubSmogonServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubSmogonServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _page(self, path: str) -> bytes | None:
+        if path == INDEX_PATH:
+            pokemon = [{"name": name, "formats": list(formats)} for name, formats in self.species.items()]
+            return dex_page("dump-basics", {"gen": "sv"}, {"pokemon": pokemon})
+        name = self._paths.get(path)
+        if name is not None:
+            with self._lock:
+                empty = self._rng.random() < self.empty_rate
+            strategies = [] if empty else [{"format": f, "movesets": sets} for f, sets in self.species[name].items()]
+            return dex_page("dump-pokemon", {"gen": "sv", "alias": species_slugs(name).dex}, {"strategies": strategies})
+        return None
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = stub._page(self.path)
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"' if body is not None else None
+                if body is None:
+                    status, body = 404, b""
+                elif etag == self.headers.get("If-None-Match"):
+                    status, body = 304, b""
+                else:
+                    status = 200
+                with stub._lock:
+                    stub.requests[status] += 1
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
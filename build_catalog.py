@@ -0,0 +1,518 @@
+import json
+import random
+import sqlite3
+import zlib
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import NamedTuple
+
+from db_migrations import DICTIONARIES, EV_COLUMNS, has_table
+from showdown_format import STATS
+from weighted_sampling import AliasTable
+
+
+MOVE_SLOTS = ("Move1", "Move2", "Move3", "Move4")
+
+TIER_ORDER = ["AG", "Uber", "OU", "UU", "RU", "NU", "PU", "ZU"]
+EXCLUDED_TIERS = ["NFE", "LC"]  # Tiers to exclude from higher tier team generation
+
+# Usage weights are fractions (see usage_stats.py). Anything without a recorded
+# weight stays possible but rare; groups with no weights at all stay uniform.
+MISSING_WEIGHT = 0.01
+
+
+class BuildOptions(NamedTuple):
+    """Every option stored for a single build, as compact tuples."""
+
+    pokemon_name: str
+    tier: str
+    items: tuple[str, ...]
+    abilities: tuple[str, ...]
+    natures: tuple[str, ...]
+    evs: str | None
+    tera_types: tuple[str, ...]
+    moves: tuple[tuple[str, ...], ...]  # one tuple of candidates per move slot
+
+
+class BuildChoice(NamedTuple):
+    """A concrete set: a build id plus the index chosen for each option list."""
+
+    build_id: int
+    item: int
+    ability: int
+    nature: int
+    tera_type: int
+    moves: tuple[int, ...]  # one index per move slot of the build
+
+
+class BuildCatalog:
+    """In-memory copy of the build data in ``pokemon_strategies.db``.
+
+    The database is read once; afterwards random builds are served with plain
+    list/tuple indexing instead of one SQLite query per component.
+
+    ``builds`` may be any sequence indexed by build id. A snapshot (see
+    catalog_snapshot.py) also passes ``keys``, the (tier, pokemon_name) of
+    every build id, and ``option_tables``, which loads a build's option alias
+    tables, so no build is decoded until it is used.
+    """
+
+    def __init__(
+        self,
+        builds: Sequence[BuildOptions | None],
+        usage_weights: dict[tuple, float] | None = None,
+        fingerprint: int | None = None,
+        *,
+        keys: Sequence[tuple[str, str] | None] | None = None,
+        option_tables: Callable[[int], tuple] | None = None,
+    ):
+        # Indexed directly by integer build id; gaps in the id sequence are None.
+        self._builds = builds
+        if keys is None:
+            keys = [(build.tier, build.pokemon_name) if build is not None else None for build in builds]
+
+        grouped: dict[tuple[str, str], list[int]] = {}
+        for build_id, key in enumerate(keys):
+            if key is not None:
+                grouped.setdefault(key, []).append(build_id)
+        self._all_build_ids = [build_id for build_id, key in enumerate(keys) if key is not None]
+        self._build_ids = {key: tuple(ids) for key, ids in grouped.items()}
+        self._build_eligibility_index()
+        self.has_usage_weights = bool(usage_weights) or option_tables is not None
+        self._usage_weights = usage_weights or {}
+        self._load_option_tables = option_tables
+        self._build_alias_tables(self._usage_weights)
+        # Short content hash so team codes made against other data can be rejected.
+        # Snapshots store it, since hashing the builds is a good part of the load time.
+        self.fingerprint = fingerprint if fingerprint is not None else builds_fingerprint(builds)
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> "BuildCatalog":
+        """Load every build and its options; see ``read_build_data``."""
+        return cls(*read_build_data(conn))
+
+    @classmethod
+    def from_db(cls, db_path: Path | str) -> "BuildCatalog":
+        conn = sqlite3.connect(db_path)
+        try:
+            return cls.from_connection(conn)
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self._all_build_ids)
+
+    def get(self, build_id: int) -> BuildOptions | None:
+        if 0 <= build_id < len(self._builds):
+            return self._builds[build_id]
+        return None
+
+    def all_build_ids(self) -> list[int]:
+        return list(self._all_build_ids)
+
+    def option_tables(self, build_id: int) -> tuple | None:
+        """Usage alias tables (item, ability, nature, tera type, per-slot moves) for a build, if any.
+
+        Built on first use for each build and kept.
+        """
+        if not self.has_usage_weights:
+            return None
+        tables = self._option_alias.get(build_id)
+        if tables is None:
+            build = self.get(build_id)
+            if build is None:
+                return None
+            if self._load_option_tables is not None:
+                tables = self._load_option_tables(build_id)
+            else:
+                tables = option_alias_tables(build, self._usage_weights)
+            self._option_alias[build_id] = tables
+        return tables
+
+    def _build_eligibility_index(self) -> None:
+        """Precompute which species can be drawn for every tier/flag combination.
+
+        Each tier with builds gets one bit; every species gets the mask of
+        tiers it has builds in. Pools for every (tier, include_lower_tiers)
+        pair are sorted tuples, so sampling needs no queries at all.
+        """
+        tiers = sorted({tier for tier, _ in self._build_ids})
+        self._tier_bits = {tier: 1 << bit for bit, tier in enumerate(tiers)}
+        self._species_masks: dict[str, int] = {}
+        for tier, pokemon_name in self._build_ids:
+            self._species_masks[pokemon_name] = self._species_masks.get(pokemon_name, 0) | self._tier_bits[tier]
+
+        self._pools: dict[tuple[str, bool], tuple[str, ...]] = {}
+        for tier in tiers:
+            for include_lower_tiers in (False, True):
+                mask = self._tiers_mask(self.allowed_tiers(tier, include_lower_tiers))
+                self._pools[tier, include_lower_tiers] = tuple(
+                    sorted(name for name, species_mask in self._species_masks.items() if species_mask & mask)
+                )
+
+    def _build_alias_tables(self, usage_weights: dict[tuple[str, str, str, str], float]) -> None:
+        """Precompute alias tables so weighted draws are O(1) per pick.
+
+        ``usage_weights`` maps (tier, pokemon_name, kind, name) to a weight,
+        where kind is one of species, build (name is the build id), item,
+        ability, nature, tera_type or move. Groups whose weights are all equal
+        get no table and keep using uniform draws. Option tables are built
+        per build on first use (see ``option_tables``).
+        """
+        self._species_alias: dict[tuple[str, bool], AliasTable | None] = {}
+        self._build_alias: dict[tuple[str, str], AliasTable | None] = {}
+        self._option_alias: dict[int, tuple] = {}
+        if not usage_weights:
+            return
+
+        def weight(tier: str, pokemon_name: str, kind: str, name: str) -> float:
+            return usage_weights.get((tier, pokemon_name, kind, name), MISSING_WEIGHT)
+
+        for (tier, include_lower_tiers), pool in self._pools.items():
+            weights = []
+            for name in pool:
+                # Prefer the species' usage in the requested tier, else in its own tiers.
+                own = usage_weights.get((tier, name, "species", name))
+                if own is None:
+                    own = max(
+                        weight(t, name, "species", name) for t in self.species_tiers(name, tier, include_lower_tiers)
+                    )
+                weights.append(own)
+            self._species_alias[tier, include_lower_tiers] = _alias_or_none(weights)
+
+        for (tier, pokemon_name), build_ids in self._build_ids.items():
+            weights = [weight(tier, pokemon_name, "build", str(build_id)) for build_id in build_ids]
+            self._build_alias[tier, pokemon_name] = _alias_or_none(weights)
+
+    @staticmethod
+    def allowed_tiers(tier: str, include_lower_tiers: bool = True) -> list[str]:
+        """The tiers a team for ``tier`` may draw builds from."""
+        if include_lower_tiers and tier in TIER_ORDER:
+            # Remove excluded tiers (NFE, LC) from the selected tier and everything below it
+            return [t for t in TIER_ORDER[TIER_ORDER.index(tier) :] if t not in EXCLUDED_TIERS]
+        return [tier]
+
+    def _tiers_mask(self, tiers: list[str]) -> int:
+        mask = 0
+        for tier in tiers:
+            mask |= self._tier_bits.get(tier, 0)
+        return mask
+
+    @property
+    def tiers(self) -> list[str]:
+        """Every tier that has at least one build."""
+        return list(self._tier_bits)
+
+    @property
+    def pokemon_names(self) -> list[str]:
+        """Every species with at least one build."""
+        return list(self._species_masks)
+
+    def species_pool(self, tier: str, include_lower_tiers: bool = True) -> tuple[str, ...]:
+        """Sorted species with at least one build in the allowed tiers."""
+        return self._pools.get((tier, include_lower_tiers), ())
+
+    def species_tiers(self, pokemon_name: str, tier: str, include_lower_tiers: bool = True) -> list[str]:
+        """The allowed tiers in which ``pokemon_name`` has builds, in tier order."""
+        species_mask = self._species_masks.get(pokemon_name, 0)
+        return [t for t in self.allowed_tiers(tier, include_lower_tiers) if species_mask & self._tier_bits.get(t, 0)]
+
+    def sample_species(
+        self,
+        tier: str,
+        include_lower_tiers: bool,
+        count: int,
+        rng: random.Random | None = None,
+        weighted: bool = False,
+    ) -> list[str]:
+        """Draw ``count`` distinct species from the pool (all of them if the pool is smaller).
+
+        With ``weighted`` the draws follow usage weights via the pool's alias
+        table, rejecting duplicates. The result is in draw order, so a pool
+        no larger than ``count`` comes back as a random (weighted) permutation.
+        """
+        rng = rng or random
+        pool = self.species_pool(tier, include_lower_tiers)
+        count = min(count, len(pool))
+
+        table = self._species_alias.get((tier, include_lower_tiers)) if weighted else None
+        if table is None:
+            return rng.sample(pool, count)
+
+        seen: set[int] = set()
+        chosen: list[str] = []
+        attempts = 0
+        while len(chosen) < count and attempts < count * 20:
+            attempts += 1
+            index = table.sample(rng)
+            if index not in seen:
+                seen.add(index)
+                chosen.append(pool[index])
+        if len(chosen) < count:
+            # Weight is concentrated on a few species; fill the rest uniformly.
+            rest = [index for index in range(len(pool)) if index not in seen]
+            chosen += [pool[index] for index in rng.sample(rest, count - len(chosen))]
+        return chosen
+
+    def build_ids(self, tier: str, pokemon_name: str) -> tuple[int, ...]:
+        return self._build_ids.get((tier, pokemon_name), ())
+
+    def random_choice(
+        self,
+        tier: str,
+        pokemon_name: str,
+        rng: random.Random | None = None,
+        weighted: bool = False,
+    ) -> BuildChoice | None:
+        """Pick a random build for a Pokemon in a tier and a random index for each option.
+
+        With ``weighted`` the build and every option follow usage weights.
+        Returns None when the Pokemon has no builds in that tier.
+        """
+        rng = rng or random
+        build_ids = self.build_ids(tier, pokemon_name)
+        if not build_ids:
+            return None
+
+        build_table = self._build_alias.get((tier, pokemon_name)) if weighted else None
+        build_id = build_ids[build_table.sample(rng)] if build_table else rng.choice(build_ids)
+        build = self._builds[build_id]
+
+        option_tables = self.option_tables(build_id) if weighted else None
+        if option_tables is None:
+            return BuildChoice(
+                build_id=build_id,
+                item=_random_index(rng, build.items),
+                ability=_random_index(rng, build.abilities),
+                nature=_random_index(rng, build.natures),
+                tera_type=_random_index(rng, build.tera_types),
+                moves=tuple(rng.randrange(len(slot)) for slot in build.moves),
+            )
+
+        item_table, ability_table, nature_table, tera_table, move_tables = option_tables
+        return BuildChoice(
+            build_id=build_id,
+            item=_weighted_index(rng, build.items, item_table),
+            ability=_weighted_index(rng, build.abilities, ability_table),
+            nature=_weighted_index(rng, build.natures, nature_table),
+            tera_type=_weighted_index(rng, build.tera_types, tera_table),
+            moves=tuple(_weighted_index(rng, slot, table) for slot, table in zip(build.moves, move_tables)),
+        )
+
+    def resolve(self, choice: BuildChoice) -> dict:
+        """Turn a choice back into the dict shape the Showdown set builder expects."""
+        build = self._builds[choice.build_id]
+        return {
+            "item": build.items[choice.item] if build.items else None,
+            "ability": build.abilities[choice.ability] if build.abilities else None,
+            "nature": build.natures[choice.nature] if build.natures else None,
+            "evs": build.evs,
+            "tera_type": build.tera_types[choice.tera_type] if build.tera_types else None,
+            "moves": [slot[index] for slot, index in zip(build.moves, choice.moves)],
+        }
+
+    def is_valid(self, choice: BuildChoice) -> bool:
+        """Whether every index in the choice exists in this catalog."""
+        build = self.get(choice.build_id)
+        if build is None or len(choice.moves) != len(build.moves):
+            return False
+        return (
+            _index_ok(choice.item, build.items)
+            and _index_ok(choice.ability, build.abilities)
+            and _index_ok(choice.nature, build.natures)
+            and _index_ok(choice.tera_type, build.tera_types)
+            and all(0 <= index < len(slot) for slot, index in zip(build.moves, choice.moves))
+        )
+
+    def random_build(self, tier: str, pokemon_name: str, rng: random.Random | None = None) -> dict:
+        """Pick a random build for a Pokemon in a tier and random options within it.
+
+        Returns the same dict shape the Showdown set builder expects, or an
+        empty dict when the Pokemon has no builds in that tier.
+        """
+        choice = self.random_choice(tier, pokemon_name, rng)
+        return self.resolve(choice) if choice is not None else {}
+
+
+def option_alias_tables(build: BuildOptions, usage_weights: dict[tuple[str, str, str, str], float]) -> tuple:
+    """Alias tables for a build's items, abilities, natures, tera types and each move slot; None where uniform."""
+
+    def table(kind: str, options: Sequence[str]) -> AliasTable | None:
+        return _alias_or_none(
+            [usage_weights.get((build.tier, build.pokemon_name, kind, option), MISSING_WEIGHT) for option in options]
+        )
+
+    return (
+        table("item", build.items),
+        table("ability", build.abilities),
+        table("nature", build.natures),
+        table("tera_type", build.tera_types),
+        tuple(table("move", slot) for slot in build.moves),
+    )
+
+
+def builds_fingerprint(builds: Sequence[BuildOptions | None]) -> int:
+    """32-bit checksum of every build, so team codes from another catalog are rejected."""
+    return zlib.crc32(repr(builds).encode("utf-8"))
+
+
+def read_build_data(
+    conn: sqlite3.Connection,
+) -> tuple[list[BuildOptions | None], dict[tuple[str, str, str, str], float] | None]:
+    """Every build (indexed by build id) and the usage weights, using one query per table.
+
+    If the denormalized ``build_options`` table exists (see
+    ``db_migrations.py --denormalize``) the builds are read in a single query;
+    a normalized database (``db_migrations.py --normalize``) is read from its
+    integer tables rather than the compatibility views.
+    """
+    if has_table(conn, "build_options"):
+        builds = _builds_from_options_table(conn)
+    elif has_table(conn, "builds"):
+        builds = _builds_from_normalized(conn)
+    else:
+        builds = _builds_from_tables(conn)
+    usage_weights = _load_usage_weights(conn) if has_table(conn, "usage_weights") else None
+    return builds, usage_weights
+
+
+def _builds_from_tables(conn: sqlite3.Connection) -> list[BuildOptions | None]:
+    rows = conn.execute("SELECT id, pokemon_name, tier FROM pokemon_builds ORDER BY id").fetchall()
+    if not rows:
+        return []
+
+    size = max(row[0] for row in rows) + 1
+    items = _group_by_build(conn, "SELECT build_id, item_name FROM build_items ORDER BY id")
+    abilities = _group_by_build(conn, "SELECT build_id, ability_name FROM build_abilities ORDER BY id")
+    natures = _group_by_build(conn, "SELECT build_id, nature_name FROM build_natures ORDER BY id")
+    evs = _group_by_build(conn, "SELECT build_id, ev_string FROM build_evs ORDER BY id")
+    teras = _group_by_build(conn, "SELECT build_id, tera_type FROM build_tera_types ORDER BY id")
+
+    moves: dict[int, dict[str, list[str]]] = {}
+    for build_id, slot, move_name in conn.execute(
+        "SELECT build_id, move_slot, move_name FROM build_moves ORDER BY id"
+    ):
+        moves.setdefault(build_id, {}).setdefault(slot, []).append(move_name)
+
+    builds: list[BuildOptions | None] = [None] * size
+    for build_id, pokemon_name, tier in rows:
+        build_moves = moves.get(build_id, {})
+        ev_parts = evs.get(build_id)
+        builds[build_id] = BuildOptions(
+            pokemon_name=pokemon_name,
+            tier=tier,
+            items=tuple(items.get(build_id, ())),
+            abilities=tuple(abilities.get(build_id, ())),
+            natures=tuple(natures.get(build_id, ())),
+            # EVs in the DB are stored as individual stats (e.g. "252 Atk", "4 SpD")
+            # so they are joined once here rather than on every team.
+            evs=" / ".join(ev_parts) if ev_parts else None,
+            tera_types=tuple(teras.get(build_id, ())),
+            moves=tuple(tuple(build_moves[slot]) for slot in MOVE_SLOTS if build_moves.get(slot)),
+        )
+    return builds
+
+
+def _builds_from_normalized(conn: sqlite3.Connection) -> list[BuildOptions | None]:
+    rows = conn.execute(f"SELECT id, species_id, tier, {', '.join(EV_COLUMNS)} FROM builds ORDER BY id").fetchall()
+    if not rows:
+        return []
+
+    names = {
+        table: dict(conn.execute(f"SELECT id, name FROM {table}"))
+        for table in DICTIONARIES
+    }
+
+    def grouped(table: str, column: str, dictionary: str) -> dict[int, tuple[str, ...]]:
+        lookup = names[dictionary]
+        lists: dict[int, list[str]] = {}
+        for build_id, value in conn.execute(f"SELECT build_id, {column} FROM {table} ORDER BY build_id, position"):
+            lists.setdefault(build_id, []).append(lookup[value])
+        return {build_id: tuple(values) for build_id, values in lists.items()}
+
+    items = grouped("build_item_ids", "item_id", "items")
+    abilities = grouped("build_ability_ids", "ability_id", "abilities")
+    natures = grouped("build_nature_ids", "nature_id", "natures")
+    teras = grouped("build_tera_type_ids", "tera_type_id", "types")
+
+    move_names = names["moves"]
+    moves: dict[int, dict[int, list[str]]] = {}
+    for build_id, slot, move_id in conn.execute(
+        "SELECT build_id, slot, move_id FROM build_move_ids ORDER BY build_id, slot, position"
+    ):
+        moves.setdefault(build_id, {}).setdefault(slot, []).append(move_names[move_id])
+
+    # Many builds share a spread, so each distinct one is formatted once.
+    spreads: dict[tuple, str | None] = {}
+    species = names["species"]
+    builds: list[BuildOptions | None] = [None] * (rows[-1][0] + 1)
+    for build_id, species_id, tier, *evs in rows:
+        key = tuple(evs)
+        if key not in spreads:
+            spreads[key] = " / ".join(
+                f"{value} {stat}" for stat, value in zip(STATS, evs) if value is not None
+            ) or None
+        build_moves = moves.get(build_id, {})
+        builds[build_id] = BuildOptions(
+            pokemon_name=species[species_id],
+            tier=tier,
+            items=items.get(build_id, ()),
+            abilities=abilities.get(build_id, ()),
+            natures=natures.get(build_id, ()),
+            evs=spreads[key],
+            tera_types=teras.get(build_id, ()),
+            moves=tuple(tuple(build_moves[slot]) for slot in sorted(build_moves)),
+        )
+    return builds
+
+
+def _builds_from_options_table(conn: sqlite3.Connection) -> list[BuildOptions | None]:
+    rows = conn.execute("SELECT build_id, pokemon_name, tier, options FROM build_options ORDER BY build_id").fetchall()
+    if not rows:
+        return []
+
+    builds: list[BuildOptions | None] = [None] * (max(row[0] for row in rows) + 1)
+    for build_id, pokemon_name, tier, packed in rows:
+        options = json.loads(packed)
+        build_moves = options["moves"]
+        builds[build_id] = BuildOptions(
+            pokemon_name=pokemon_name,
+            tier=tier,
+            items=tuple(options["items"]),
+            abilities=tuple(options["abilities"]),
+            natures=tuple(options["natures"]),
+            evs=" / ".join(options["evs"]) if options["evs"] else None,
+            tera_types=tuple(options["tera_types"]),
+            moves=tuple(tuple(build_moves[slot]) for slot in MOVE_SLOTS if build_moves.get(slot)),
+        )
+    return builds
+
+
+def _random_index(rng, options: tuple) -> int:
+    return rng.randrange(len(options)) if options else 0
+
+
+def _weighted_index(rng, options: tuple, table: AliasTable | None) -> int:
+    return table.sample(rng) if table is not None else _random_index(rng, options)
+
+
+def _alias_or_none(weights: list[float]) -> AliasTable | None:
+    if len(weights) < 2 or min(weights) == max(weights):
+        return None
+    return AliasTable(weights)
+
+
+def _index_ok(index: int, options: tuple) -> bool:
+    return 0 <= index < len(options) if options else index == 0
+
+
+def _group_by_build(conn: sqlite3.Connection, query: str) -> dict[int, list[str]]:
+    grouped: dict[int, list[str]] = {}
+    for build_id, value in conn.execute(query):
+        grouped.setdefault(build_id, []).append(value)
+    return grouped
+
+
+def _load_usage_weights(conn: sqlite3.Connection) -> dict[tuple[str, str, str, str], float]:
+    rows = conn.execute("SELECT tier, pokemon_name, kind, name, weight FROM usage_weights")
+    return {(tier, pokemon_name, kind, name): weight for tier, pokemon_name, kind, name, weight in rows}
@@ -0,0 +1,378 @@
+"""Binary, memory-mappable snapshot of the build catalog.
+
+Compiling the database once lets every worker load the catalog with a
+single ``mmap`` instead of running SQL. The catalog reads builds, option
+lists and usage alias tables through views into the mapping, so workers
+on one host share its page-cache pages and only decode the builds they use:
+
+    python catalog_snapshot.py                 # writes pokemon_strategies.snapshot
+
+Layout (little endian): a header (magic, format version, section count,
+size and mtime of the source database, catalog fingerprint, CRC32 of
+everything after the header), a table of (offset, length) per section, then the sections, each
+aligned to 8 bytes:
+
+    string_offsets  u32[N + 1]   interned strings: names, tiers, options, EV spreads
+    string_data     utf-8
+    build_name      i32[B]       string id per build id, -1 where the id is unused
+    build_tier      i32[B]       string id
+    build_evs       i32[B]       string id, -1 if the build has no EVs
+    build_lists     u32[B + 1]   first option list of each build: items, abilities,
+                                 natures, tera types, then one list per move slot
+    list_offsets    u32[L + 1]   first value of each option list
+    list_values     i32[V]       string ids
+    list_table      i32[L]       first entry of each list's alias table, -1 if uniform
+    table_prob      f64[...]     alias table probabilities, one per option of a weighted list
+    table_alias     i32[...]     alias table aliases
+    weight_keys     i32[W * 4]   usage weights: tier, species, kind, option name
+    weight_values   f64[W]
+
+``load_catalog`` uses the snapshot when it matches the database and falls
+back to SQLite when it is missing, stale or damaged.
+"""
+
+import argparse
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import metrics
+from build_catalog import BuildCatalog, BuildOptions, builds_fingerprint, option_alias_tables, read_build_data
+from db_migrations import DB_PATH
+from weighted_sampling import AliasTable
+
+
+SNAPSHOT_PATH = DB_PATH.with_suffix(".snapshot")
+MAGIC = b"PTBCAT\0\0"
+VERSION = 3
+
+SECTIONS = (
+    ("string_offsets", "I"),
+    ("string_data", "B"),
+    ("build_name", "i"),
+    ("build_tier", "i"),
+    ("build_evs", "i"),
+    ("build_lists", "I"),
+    ("list_offsets", "I"),
+    ("list_values", "i"),
+    ("list_table", "i"),
+    ("table_prob", "d"),
+    ("table_alias", "i"),
+    ("weight_keys", "i"),
+    ("weight_values", "d"),
+)
+_HEADER = struct.Struct("<8sIIqqII")
+_SECTION = struct.Struct("<QQ")
+# Lists stored per build before its move slots.
+_FIXED_LISTS = 4
+# Usage weight kinds BuildCatalog needs up front; option weights are stored as alias tables.
+CATALOG_WEIGHT_KINDS = ("species", "build")
+
+
+class SnapshotError(ValueError):
+    """The snapshot is missing, stale, damaged or from another format version."""
+
+
+def _source_stamp(db_path: Path | str) -> tuple[int, int]:
+    """(size, mtime in ns) of the database, or (-1, -1) if it does not exist."""
+    try:
+        stat = os.stat(db_path)
+    except FileNotFoundError:
+        return -1, -1
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_snapshot(
+    builds: list[BuildOptions | None],
+    usage_weights: dict[tuple[str, str, str, str], float] | None,
+    path: Path | str = SNAPSHOT_PATH,
+    source: Path | str = DB_PATH,
+) -> int:
+    """Write a snapshot of ``builds`` taken from ``source``; returns its size in bytes.
+
+    The file is replaced atomically, so running workers keep their mapping of
+    the old one.
+    """
+    strings: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    arrays = {name: array(code) for name, code in SECTIONS}
+    arrays["build_lists"].append(0)
+    arrays["list_offsets"].append(0)
+    for build in builds:
+        if build is None:
+            arrays["build_name"].append(-1)
+            arrays["build_tier"].append(-1)
+            arrays["build_evs"].append(-1)
+        else:
+            arrays["build_name"].append(intern(build.pokemon_name))
+            arrays["build_tier"].append(intern(build.tier))
+            arrays["build_evs"].append(intern(build.evs) if build.evs is not None else -1)
+            lists = (build.items, build.abilities, build.natures, build.tera_types, *build.moves)
+            if usage_weights:
+                *fixed, moves = option_alias_tables(build, usage_weights)
+                tables = (*fixed, *moves)
+            else:
+                tables = (None,) * len(lists)
+            for options, table in zip(lists, tables):
+                arrays["list_values"].extend(intern(option) for option in options)
+                arrays["list_offsets"].append(len(arrays["list_values"]))
+                if table is None:
+                    arrays["list_table"].append(-1)
+                else:
+                    prob, alias = table.arrays()
+                    arrays["list_table"].append(len(arrays["table_prob"]))
+                    arrays["table_prob"].extend(prob)
+                    arrays["table_alias"].extend(alias)
+        arrays["build_lists"].append(len(arrays["list_offsets"]) - 1)
+
+    for key, weight in (usage_weights or {}).items():
+        arrays["weight_keys"].extend(intern(part) for part in key)
+        arrays["weight_values"].append(weight)
+
+    data = bytearray()
+    for value in strings:
+        arrays["string_offsets"].append(len(data))
+        data += value.encode("utf-8")
+    arrays["string_offsets"].append(len(data))
+    arrays["string_data"] = array("B", data)
+
+    if sys.byteorder != "little":
+        for values in arrays.values():
+            values.byteswap()
+
+    table = bytearray()
+    body = bytearray()
+    start = _HEADER.size + _SECTION.size * len(SECTIONS)
+    for name, _ in SECTIONS:
+        raw = arrays[name].tobytes()
+        table += _SECTION.pack(start + len(body), len(raw))
+        body += raw + b"\0" * (-len(raw) % 8)
+
+    size, mtime_ns = _source_stamp(source)
+    payload = bytes(table + body)
+    header = _HEADER.pack(
+        MAGIC, VERSION, len(SECTIONS), size, mtime_ns, builds_fingerprint(builds), zlib.crc32(payload)
+    )
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp, path)
+    return len(header) + len(payload)
+
+
+def load_snapshot(path: Path | str = SNAPSHOT_PATH, source: Path | str | None = DB_PATH) -> BuildCatalog:
+    """Map a snapshot and return a catalog served from the mapping. Raises SnapshotError if it cannot be used.
+
+    With ``source`` the snapshot must have been written from that database
+    as it is now (same size and mtime); pass None to skip the check, e.g.
+    when the database is not deployed at all. The mapping stays open for as
+    long as the catalog is alive.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as exc:
+        raise SnapshotError(f"cannot map {path}: {exc}") from None
+    try:
+        with memoryview(mapped) as view:
+            fingerprint, bounds = _validate(view, source)
+    except BaseException:
+        mapped.close()
+        raise
+
+    builds = MappedBuilds(mapped, bounds)
+    return BuildCatalog(
+        builds,
+        builds.usage_weights(CATALOG_WEIGHT_KINDS),
+        fingerprint,
+        keys=builds.keys(),
+        option_tables=builds.option_tables if builds.has_usage_weights else None,
+    )
+
+
+def _validate(view: memoryview, source: Path | str | None) -> tuple[int, dict[str, tuple[int, int]]]:
+    """Check the header and checksum; returns the fingerprint and (offset, length) of every section."""
+    if len(view) < _HEADER.size:
+        raise SnapshotError("file is too short")
+    magic, version, section_count, size, mtime_ns, fingerprint, crc = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION or section_count != len(SECTIONS):
+        raise SnapshotError(f"unsupported snapshot format (version {version})")
+    if source is not None and (size, mtime_ns) != _source_stamp(source):
+        raise SnapshotError(f"stale snapshot: {source} changed since it was written")
+    with view[_HEADER.size :] as payload:
+        if zlib.crc32(payload) != crc:
+            raise SnapshotError("checksum mismatch")
+
+    bounds = {}
+    for index, (name, code) in enumerate(SECTIONS):
+        offset, length = _SECTION.unpack_from(view, _HEADER.size + index * _SECTION.size)
+        if offset + length > len(view) or offset % 8 or length % array(code).itemsize:
+            raise SnapshotError(f"section {name} is out of bounds")
+        bounds[name] = (offset, length)
+    return fingerprint, bounds
+
+
+class MappedBuilds(Sequence):
+    """The builds of a mapped snapshot, indexed by build id.
+
+    Every section is a typed view into the mapping, so workers mapping the
+    same file share its page-cache pages. A build is decoded to
+    ``BuildOptions`` the first time it is looked up and kept from then on;
+    strings are decoded once each.
+    """
+
+    def __init__(self, mapped: mmap.mmap, bounds: dict[str, tuple[int, int]]):
+        self._mapped = mapped
+        view = memoryview(mapped)
+        self._sections = {name: _section(view, *bounds[name], code) for name, code in SECTIONS}
+        view.release()
+        self._offsets = self._sections["string_offsets"]
+        self._data = self._sections["string_data"]
+        self._strings: list[str | None] = [None] * (len(self._offsets) - 1)
+        self._decoded: list[BuildOptions | None] = [None] * len(self._sections["build_name"])
+
+    @property
+    def has_usage_weights(self) -> bool:
+        return len(self._sections["weight_values"]) > 0
+
+    def __len__(self) -> int:
+        return len(self._decoded)
+
+    def __getitem__(self, build_id: int) -> BuildOptions | None:
+        build = self._decoded[build_id]
+        if build is None:
+            name = self._sections["build_name"][build_id]
+            if name < 0:
+                return None
+            evs = self._sections["build_evs"][build_id]
+            lists = self._lists(build_id)
+            build = self._decoded[build_id] = BuildOptions(
+                self._string(name),
+                self._string(self._sections["build_tier"][build_id]),
+                *lists[:3],
+                self._string(evs) if evs >= 0 else None,
+                lists[3],
+                tuple(lists[_FIXED_LISTS:]),
+            )
+        return build
+
+    def keys(self) -> list[tuple[str, str] | None]:
+        """(tier, pokemon_name) of every build id, None where the id is unused, without decoding any build."""
+        return [
+            (self._string(tier), self._string(name)) if name >= 0 else None
+            for name, tier in zip(self._sections["build_name"], self._sections["build_tier"])
+        ]
+
+    def option_tables(self, build_id: int) -> tuple:
+        """The stored alias tables of a build's option lists, in ``option_alias_tables`` order."""
+        list_offsets = self._sections["list_offsets"]
+        list_table = self._sections["list_table"]
+        prob = self._sections["table_prob"]
+        alias = self._sections["table_alias"]
+        build_lists = self._sections["build_lists"]
+        tables = []
+        for list_id in range(build_lists[build_id], build_lists[build_id + 1]):
+            start = list_table[list_id]
+            if start < 0:
+                tables.append(None)
+            else:
+                stop = start + list_offsets[list_id + 1] - list_offsets[list_id]
+                tables.append(AliasTable.from_arrays(prob[start:stop], alias[start:stop]))
+        return (*tables[:_FIXED_LISTS], tuple(tables[_FIXED_LISTS:]))
+
+    def usage_weights(self, kinds: Iterable[str]) -> dict[tuple[str, str, str, str], float]:
+        """The stored usage weights of the given kinds."""
+        keys = self._sections["weight_keys"]
+        weights = {}
+        for i, weight in enumerate(self._sections["weight_values"]):
+            tier, species, kind, name = keys[4 * i : 4 * i + 4]
+            if self._string(kind) in kinds:
+                weights[self._string(tier), self._string(species), self._string(kind), self._string(name)] = weight
+        return weights
+
+    def _string(self, index: int) -> str:
+        value = self._strings[index]
+        if value is None:
+            value = self._strings[index] = str(self._data[self._offsets[index] : self._offsets[index + 1]], "utf-8")
+        return value
+
+    def _lists(self, build_id: int) -> list[tuple[str, ...]]:
+        build_lists = self._sections["build_lists"]
+        bounds = self._sections["list_offsets"][build_lists[build_id] : build_lists[build_id + 1] + 1].tolist()
+        first = bounds[0]
+        names = list(map(self._string, self._sections["list_values"][first : bounds[-1]].tolist()))
+        return [tuple(names[start - first : stop - first]) for start, stop in zip(bounds, bounds[1:])]
+
+
+def _section(view: memoryview, offset: int, length: int, code: str) -> Sequence:
+    """A typed view of one section; a byte-swapped copy on big-endian hosts."""
+    raw = view[offset : offset + length]
+    if sys.byteorder == "little":
+        return raw.cast(code)
+    section = array(code)
+    section.frombytes(raw)
+    raw.release()
+    section.byteswap()
+    return section
+
+
+def load_catalog(
+    db_path: Path | str = DB_PATH,
+    snapshot_path: Path | str | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> BuildCatalog:
+    """The catalog from the snapshot if it is current, otherwise from SQLite.
+
+    The snapshot defaults to ``db_path`` with a ``.snapshot`` suffix. ``conn``
+    is used for the SQLite fallback when given (e.g. a pooled connection);
+    otherwise ``db_path`` is opened.
+    """
+    if snapshot_path is None:
+        snapshot_path = Path(db_path).with_suffix(".snapshot")
+    source = db_path if os.path.exists(db_path) else None
+    try:
+        catalog = load_snapshot(snapshot_path, source)
+    except SnapshotError:
+        pass
+    else:
+        metrics.count("catalog_loads", source="snapshot")
+        return catalog
+    catalog = BuildCatalog.from_connection(conn) if conn is not None else BuildCatalog.from_db(db_path)
+    metrics.count("catalog_loads", source="sqlite")
+    return catalog
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile the build database into a catalog snapshot.")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("-o", "--output", type=Path, help="default: the database path with a .snapshot suffix")
+    args = parser.parse_args()
+    output = args.output or args.db.with_suffix(".snapshot")
+
+    conn = sqlite3.connect(args.db)
+    try:
+        builds, usage_weights = read_build_data(conn)
+    finally:
+        conn.close()
+    size = write_snapshot(builds, usage_weights, output, args.db)
+    count = sum(1 for build in builds if build is not None)
+    print(f"Wrote {count} builds ({size:,} bytes) to {output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""Versioned schema migrations for ``pokemon_strategies.db``.
+
+The schema version is stored in ``PRAGMA user_version``. Each entry in
+``MIGRATIONS`` upgrades the database by one version, so running the module
+against an up-to-date database is a no-op:
+
+    python db_migrations.py                 # apply pending migrations
+    python db_migrations.py --denormalize   # also rebuild build_options
+    python db_migrations.py --explain       # show query plans of hot queries
+    python db_migrations.py --normalize     # convert to the interned-id layout
+
+The normalized layout (see ``normalize``) is a one-off conversion rather
+than a numbered migration; it keeps the old table names as read-only views.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+from showdown_format import STATS, parse_spread
+
+
+DB_PATH = Path(__file__).resolve().parent / "pokemon_strategies.db"
+
+# Tables of a fresh database (version 0), as created by strategy_import.py.
+BASE_SCHEMA = """
+CREATE TABLE pokemon_builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pokemon_name TEXT NOT NULL,
+    tier TEXT NOT NULL
+);
+CREATE TABLE build_moves (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id INTEGER,
+    move_slot TEXT,
+    move_name TEXT,
+    FOREIGN KEY (build_id) REFERENCES pokemon_builds (id)
+);
+CREATE TABLE build_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id INTEGER,
+    item_name TEXT,
+    FOREIGN KEY (build_id) REFERENCES pokemon_builds (id)
+);
+CREATE TABLE build_abilities (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id INTEGER,
+    ability_name TEXT,
+    FOREIGN KEY (build_id) REFERENCES pokemon_builds (id)
+);
+CREATE TABLE build_natures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id INTEGER,
+    nature_name TEXT,
+    FOREIGN KEY (build_id) REFERENCES pokemon_builds (id)
+);
+CREATE TABLE build_evs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id INTEGER,
+    ev_string TEXT,
+    FOREIGN KEY (build_id) REFERENCES pokemon_builds (id)
+);
+CREATE TABLE build_tera_types (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id INTEGER,
+    tera_type TEXT,
+    FOREIGN KEY (build_id) REFERENCES pokemon_builds (id)
+);
+"""
+
+MIGRATIONS: list[str] = [
+    # 1: covering indexes for every per-build lookup and the tier/species lookups.
+    """
+    CREATE INDEX IF NOT EXISTS idx_pokemon_builds_tier_name ON pokemon_builds (tier, pokemon_name);
+    CREATE INDEX IF NOT EXISTS idx_pokemon_builds_name_tier ON pokemon_builds (pokemon_name, tier);
+    CREATE INDEX IF NOT EXISTS idx_build_moves_build_slot ON build_moves (build_id, move_slot, move_name);
+    CREATE INDEX IF NOT EXISTS idx_build_items_build ON build_items (build_id, item_name);
+    CREATE INDEX IF NOT EXISTS idx_build_abilities_build ON build_abilities (build_id, ability_name);
+    CREATE INDEX IF NOT EXISTS idx_build_natures_build ON build_natures (build_id, nature_name);
+    CREATE INDEX IF NOT EXISTS idx_build_evs_build ON build_evs (build_id, id, ev_string);
+    CREATE INDEX IF NOT EXISTS idx_build_tera_types_build ON build_tera_types (build_id, tera_type);
+    ANALYZE;
+    """,
+    # 2: optional usage weights for weighted sampling (filled by usage_stats.py).
+    """
+    CREATE TABLE IF NOT EXISTS usage_weights (
+        tier TEXT NOT NULL,
+        pokemon_name TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        weight REAL NOT NULL,
+        PRIMARY KEY (tier, pokemon_name, kind, name)
+    );
+    """,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Per-build and per-species lookups that must stay index searches, used by
+# --explain and checked in tests/test_db_migrations.py.
+HOT_QUERIES: list[tuple[str, tuple]] = [
+    ("SELECT id FROM pokemon_builds WHERE pokemon_name = ? AND tier = ?", ("Great Tusk", "OU")),
+    ("SELECT DISTINCT pokemon_name FROM pokemon_builds WHERE tier = ?", ("OU",)),
+    ("SELECT DISTINCT tier FROM pokemon_builds WHERE pokemon_name = ? AND tier IN (?, ?)", ("Great Tusk", "OU", "UU")),
+    ("SELECT move_name FROM build_moves WHERE build_id = ? AND move_slot = ?", (1, "Move1")),
+    ("SELECT item_name FROM build_items WHERE build_id = ?", (1,)),
+    ("SELECT ev_string FROM build_evs WHERE build_id = ? ORDER BY id", (1,)),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def has_table(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def is_stale(conn: sqlite3.Connection) -> bool:
+    """Return True if the database is missing migrations this code expects."""
+    return get_schema_version(conn) < SCHEMA_VERSION
+
+
+def migrate(conn: sqlite3.Connection) -> list[int]:
+    """Apply every pending migration, each in its own transaction.
+
+    Returns the list of versions that were applied.
+    """
+    applied = []
+    current = get_schema_version(conn)
+    for version in range(current + 1, SCHEMA_VERSION + 1):
+        script = MIGRATIONS[version - 1]
+        conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        applied.append(version)
+    return applied
+
+
+def build_denormalized_options(conn: sqlite3.Connection) -> int:
+    """(Re)build ``build_options``: one row per build with every option JSON-packed.
+
+    Returns the number of builds written.
+    """
+    options: dict[int, dict] = {}
+    for build_id, pokemon_name, tier in conn.execute("SELECT id, pokemon_name, tier FROM pokemon_builds"):
+        options[build_id] = {
+            "pokemon_name": pokemon_name,
+            "tier": tier,
+            "items": [],
+            "abilities": [],
+            "natures": [],
+            "evs": [],
+            "tera_types": [],
+            "moves": {},
+        }
+
+    for key, table, column in (
+        ("items", "build_items", "item_name"),
+        ("abilities", "build_abilities", "ability_name"),
+        ("natures", "build_natures", "nature_name"),
+        ("evs", "build_evs", "ev_string"),
+        ("tera_types", "build_tera_types", "tera_type"),
+    ):
+        for build_id, value in conn.execute(f"SELECT build_id, {column} FROM {table} ORDER BY id"):
+            if build_id in options:
+                options[build_id][key].append(value)
+
+    for build_id, slot, move_name in conn.execute("SELECT build_id, move_slot, move_name FROM build_moves ORDER BY id"):
+        if build_id in options:
+            options[build_id]["moves"].setdefault(slot, []).append(move_name)
+
+    rows = [
+        (build_id, data.pop("pokemon_name"), data.pop("tier"), json.dumps(data, separators=(",", ":")))
+        for build_id, data in options.items()
+    ]
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS build_options")
+        conn.execute(
+            """
+            CREATE TABLE build_options (
+                build_id INTEGER PRIMARY KEY,
+                pokemon_name TEXT NOT NULL,
+                tier TEXT NOT NULL,
+                options TEXT NOT NULL
+            )
+            """
+        )
+        conn.executemany("INSERT INTO build_options VALUES (?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+# Interned-id layout written by ``normalize``. Every name is stored once in a
+# dictionary table; option rows keep their order within a build in ``position``.
+EV_COLUMNS = tuple(f"ev_{stat.lower()}" for stat in STATS)
+# Bounds on ``slot`` and ``position`` that keep the views' synthetic ids unique.
+MAX_MOVE_SLOTS = 8
+MAX_POSITIONS = 16
+DICTIONARIES = ("species", "moves", "items", "abilities", "natures", "types")
+
+NORMALIZED_SCHEMA = f"""
+{"".join(f"CREATE TABLE {name} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);" for name in DICTIONARIES)}
+CREATE TABLE builds (
+    id INTEGER PRIMARY KEY,
+    species_id INTEGER NOT NULL REFERENCES species (id),
+    tier TEXT NOT NULL,
+    -- NULL for stats the spread leaves out; all NULL when the build has none
+    {", ".join(f"{column} INTEGER" for column in EV_COLUMNS)}
+);
+CREATE INDEX idx_builds_tier_species ON builds (tier, species_id);
+CREATE INDEX idx_builds_species_tier ON builds (species_id, tier);
+CREATE TABLE build_move_ids (
+    build_id INTEGER NOT NULL REFERENCES builds (id),
+    slot INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    move_id INTEGER NOT NULL REFERENCES moves (id),
+    PRIMARY KEY (build_id, slot, position)
+) WITHOUT ROWID;
+{"".join(
+    f"""
+CREATE TABLE build_{kind}_ids (
+    build_id INTEGER NOT NULL REFERENCES builds (id),
+    position INTEGER NOT NULL,
+    {kind}_id INTEGER NOT NULL REFERENCES {dictionary} (id),
+    PRIMARY KEY (build_id, position)
+) WITHOUT ROWID;"""
+    for kind, dictionary in (("item", "items"), ("ability", "abilities"), ("nature", "natures"), ("tera_type", "types"))
+)}
+"""
+
+# The pre-normalization tables as views, so existing read queries keep working.
+# Synthetic ids sort like the original ones within a build; ``normalize`` keeps
+# them unique by rejecting builds beyond MAX_MOVE_SLOTS / MAX_POSITIONS.
+COMPATIBILITY_VIEWS = f"""
+CREATE VIEW pokemon_builds AS
+    SELECT b.id, s.name AS pokemon_name, b.tier FROM builds b JOIN species s ON s.id = b.species_id;
+CREATE VIEW build_moves AS
+    SELECT (b.build_id * {MAX_MOVE_SLOTS} + b.slot) * {MAX_POSITIONS} + b.position AS id, b.build_id, 'Move' || b.slot AS move_slot,
+           m.name AS move_name
+    FROM build_move_ids b JOIN moves m ON m.id = b.move_id;
+CREATE VIEW build_items AS
+    SELECT b.build_id * {MAX_POSITIONS} + b.position AS id, b.build_id, d.name AS item_name
+    FROM build_item_ids b JOIN items d ON d.id = b.item_id;
+CREATE VIEW build_abilities AS
+    SELECT b.build_id * {MAX_POSITIONS} + b.position AS id, b.build_id, d.name AS ability_name
+    FROM build_ability_ids b JOIN abilities d ON d.id = b.ability_id;
+CREATE VIEW build_natures AS
+    SELECT b.build_id * {MAX_POSITIONS} + b.position AS id, b.build_id, d.name AS nature_name
+    FROM build_nature_ids b JOIN natures d ON d.id = b.nature_id;
+CREATE VIEW build_tera_types AS
+    SELECT b.build_id * {MAX_POSITIONS} + b.position AS id, b.build_id, d.name AS tera_type
+    FROM build_tera_type_ids b JOIN types d ON d.id = b.tera_type_id;
+CREATE VIEW build_evs AS
+{" UNION ALL".join(
+    f"""
+    SELECT id * {len(STATS)} + {index} AS id, id AS build_id, {column} || ' {stat}' AS ev_string
+    FROM builds WHERE {column} IS NOT NULL"""
+    for index, (stat, column) in enumerate(zip(STATS, EV_COLUMNS))
+)};
+"""
+
+
+def is_normalized(conn: sqlite3.Connection) -> bool:
+    """Return True if the database uses the interned-id layout."""
+    return has_table(conn, "builds")
+
+
+def normalize(source: sqlite3.Connection, dest: Path | str) -> int:
+    """Write the builds of ``source`` to a new database at ``dest`` in the normalized layout.
+
+    ``source`` is read through the original table names, so either layout
+    works. ``dest`` is written next to itself and then replaced atomically;
+    it may be the source file. Returns the number of builds written.
+
+    The per-stat EV rows become six integer columns, so EV spreads read back
+    in stat order ("252 Atk / 4 SpD / 252 Spe") whatever order they were
+    stored in. A stat stored as 0 stays in the spread; one left out is NULL.
+
+    Raises ValueError if a build has more than MAX_POSITIONS options in one
+    list or a move slot outside 1..MAX_MOVE_SLOTS - 1, since the
+    compatibility views could not give those rows unique ids.
+    """
+    interned: dict[str, dict[str, int]] = {name: {} for name in DICTIONARIES}
+
+    def intern(dictionary: str, name: str) -> int:
+        ids = interned[dictionary]
+        if name not in ids:
+            ids[name] = len(ids) + 1
+        return ids[name]
+
+    positions: dict[tuple, int] = {}
+
+    def position(*key) -> int:
+        positions[key] = positions.get(key, -1) + 1
+        if positions[key] >= MAX_POSITIONS:
+            raise ValueError(f"build {key[1]} has more than {MAX_POSITIONS} {key[0]} options")
+        return positions[key]
+
+    spreads: dict[int, list[str]] = {}
+    for build_id, ev_string in source.execute("SELECT build_id, ev_string FROM build_evs ORDER BY id"):
+        spreads.setdefault(build_id, []).append(ev_string)
+    builds = []
+    for build_id, pokemon_name, tier in source.execute("SELECT id, pokemon_name, tier FROM pokemon_builds ORDER BY id"):
+        parts = spreads.get(build_id)
+        evs = parse_spread(" / ".join(parts), None) if parts else (None,) * len(STATS)
+        builds.append((build_id, intern("species", pokemon_name), tier, *evs))
+
+    moves = []
+    for build_id, move_slot, move_name in source.execute(
+        "SELECT build_id, move_slot, move_name FROM build_moves ORDER BY id"
+    ):
+        slot = int(move_slot.removeprefix("Move"))
+        if not 0 < slot < MAX_MOVE_SLOTS:
+            raise ValueError(f"build {build_id} has move slot {move_slot!r}")
+        moves.append((build_id, slot, position("move", build_id, slot), intern("moves", move_name)))
+
+    options = {}
+    for kind, dictionary, table, column in (
+        ("item", "items", "build_items", "item_name"),
+        ("ability", "abilities", "build_abilities", "ability_name"),
+        ("nature", "natures", "build_natures", "nature_name"),
+        ("tera_type", "types", "build_tera_types", "tera_type"),
+    ):
+        options[kind] = [
+            (build_id, position(kind, build_id), intern(dictionary, name))
+            for build_id, name in source.execute(f"SELECT build_id, {column} FROM {table} ORDER BY id")
+        ]
+
+    usage_weights = []
+    if has_table(source, "usage_weights"):
+        usage_weights = source.execute("SELECT tier, pokemon_name, kind, name, weight FROM usage_weights").fetchall()
+
+    dest = Path(dest)
+    tmp = dest.with_name(dest.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        with conn:
+            conn.executescript(NORMALIZED_SCHEMA)
+            for dictionary, ids in interned.items():
+                conn.executemany(f"INSERT INTO {dictionary} (name, id) VALUES (?, ?)", ids.items())
+            conn.executemany(f"INSERT INTO builds VALUES ({', '.join('?' * (3 + len(STATS)))})", builds)
+            conn.executemany("INSERT INTO build_move_ids VALUES (?, ?, ?, ?)", moves)
+            for kind, rows in options.items():
+                conn.executemany(f"INSERT INTO build_{kind}_ids VALUES (?, ?, ?)", rows)
+            conn.executescript(MIGRATIONS[1])
+            conn.executemany("INSERT INTO usage_weights VALUES (?, ?, ?, ?, ?)", usage_weights)
+            conn.executescript(COMPATIBILITY_VIEWS)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp, dest)
+    return len(builds)
+
+
+def explain(conn: sqlite3.Connection, query: str, params: tuple = ()) -> list[str]:
+    """Return the ``EXPLAIN QUERY PLAN`` detail lines for a query."""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="database to migrate")
+    parser.add_argument("--denormalize", action="store_true", help="rebuild the build_options table")
+    parser.add_argument("--explain", action="store_true", help="print query plans for the hot queries")
+    parser.add_argument("--normalize", action="store_true", help="convert to the normalized interned-id layout")
+    parser.add_argument("-o", "--output", type=Path, help="write the normalized database here instead of over --db")
+    args = parser.parse_args()
+
+    if args.normalize:
+        source = sqlite3.connect(args.db)
+        try:
+            count = normalize(source, args.output or args.db)
+        finally:
+            source.close()
+        args.db = args.output or args.db
+        print(f"Wrote {count} normalized builds to {args.db}.")
+
+    conn = sqlite3.connect(args.db)
+    try:
+        before = get_schema_version(conn)
+        applied = migrate(conn)
+        if applied:
+            print(f"Migrated {args.db} from version {before} to {applied[-1]}.")
+        else:
+            print(f"{args.db} is already at version {before}.")
+
+        if args.denormalize:
+            count = build_denormalized_options(conn)
+            print(f"Wrote {count} rows to build_options.")
+
+        if args.explain:
+            for query, params in HOT_QUERIES:
+                print(query)
+                for detail in explain(conn, query, params):
+                    print(f"    {detail}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import atexit
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+from urllib.parse import quote
+
+
+class ConnectionPool:
+    """A bounded pool of long-lived, read-only SQLite connections.
+
+    Connections are checked out for the duration of a ``with`` block and then
+    returned for reuse by any thread. Streamlit runs each rerun on a fresh
+    script thread, so tying connections to threads would open a new one on
+    almost every click; a shared pool keeps at most ``max_size`` open.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        max_size: int = 4,
+        timeout: float | None = 30.0,
+        mmap_size: int = 64 * 1024 * 1024,
+        cache_size_kib: int = 8 * 1024,
+        immutable: bool = True,
+        on_query: Callable[[str], None] | None = None,
+    ):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        # Seconds to wait for a free connection when all max_size are in use.
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.immutable = immutable
+        # Called with the SQL text of every statement run on a pooled connection.
+        self.on_query = on_query
+
+        # Last in, first out, so the warmest connection is reused first.
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        atexit.register(self.close)
+
+    @property
+    def uri(self) -> str:
+        uri = f"file:{quote(self.db_path.resolve().as_posix())}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        return uri
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the ``with`` block, opening one if the pool has room.
+
+        Blocks up to ``timeout`` seconds when every connection is in use.
+        Callers must not close the connection or keep it past the block.
+        """
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                closed = self._closed
+                if closed:
+                    self._opened -= 1
+            if closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close idle connections now and checked-out ones when they are returned."""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._opened -= 1
+
+    def __len__(self) -> int:
+        """Number of open connections, idle or checked out."""
+        with self._lock:
+            return self._opened
+
+    def _checkout(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool has been closed")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            grow = self._opened < self.max_size
+            if grow:
+                self._opened += 1
+        if grow:
+            try:
+                return self._open()
+            except BaseException:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection free after {self.timeout} seconds") from None
+
+    def _open(self) -> sqlite3.Connection:
+        # Connections move between threads, but only one thread uses a
+        # connection at a time.
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        # Negative cache_size is in KiB rather than pages.
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kib)}")
+        conn.execute("PRAGMA query_only = ON")
+        if self.on_query is not None:
+            conn.set_trace_callback(self.on_query)
+        return conn
@@ -0,0 +1,171 @@
+"""Lightweight in-process metrics: stage timers and counters.
+
+Everything is recorded in a process-wide registry that can be exported as
+Prometheus text or a JSON snapshot, and optionally served over HTTP for a
+local scraper:
+
+    with metrics.timer("generate"):
+        ...
+    metrics.count("pokepaste_responses", status=303)
+    metrics.serve(9108)  # GET /metrics (Prometheus) and /metrics.json
+
+Code running inside ``with metrics.trace() as trace:`` additionally records
+into ``trace``, which gives the per-request breakdown shown in the UI.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+# http.server is only needed by serve(); importing it costs more than the rest of this module.
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+PREFIX = "teambuilder"
+
+
+class Trace:
+    """Stage durations and counters recorded for a single request."""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.counters: dict[str, float] = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("metrics_trace", default=None)
+
+
+class Metrics:
+    """Thread-safe registry of counters and stage timers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        # stage -> [count, total seconds, max seconds]
+        self._timers: dict[str, list[float]] = {}
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.counters[name] = trace.counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            timer = self._timers.setdefault(stage, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.stages[stage] = trace.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            stages = {
+                stage: {"count": int(count), "total_seconds": total, "max_seconds": peak}
+                for stage, (count, total, peak) in sorted(self._timers.items())
+            }
+        return {"counters": counters, "stages": stages}
+
+    def prometheus_text(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+
+        if snapshot["stages"]:
+            lines.append(f"# TYPE {PREFIX}_stage_seconds summary")
+            for stage, data in snapshot["stages"].items():
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {data["total_seconds"]:.6f}')
+            lines.append(f"# TYPE {PREFIX}_stage_seconds_max gauge")
+            for stage, data in snapshot["stages"].items():
+                lines.append(f'{PREFIX}_stage_seconds_max{{stage="{stage}"}} {data["max_seconds"]:.6f}')
+
+        seen = set()
+        for counter in snapshot["counters"]:
+            name = f"{PREFIX}_{counter['name']}_total"
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            labels = ",".join(f'{k}="{v}"' for k, v in counter["labels"].items())
+            lines.append(f"{name}{{{labels}}} {counter['value']:g}" if labels else f"{name} {counter['value']:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+
+REGISTRY = Metrics()
+count = REGISTRY.count
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+snapshot = REGISTRY.snapshot
+prometheus_text = REGISTRY.prometheus_text
+
+
+@contextmanager
+def trace():
+    """Collect everything recorded in this context into a fresh ``Trace``."""
+    current = Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+def serve(port: int, host: str = "127.0.0.1", registry: Metrics = REGISTRY) -> "ThreadingHTTPServer":
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` on a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = registry.prometheus_text().encode("utf-8")
+                content_type = "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body = json.dumps(registry.snapshot()).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,161 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+# The on-disk store is pruned every this many inserts rather than on each one.
+PRUNE_EVERY = 1000
+
+
+def cache_key(normalized_team: str, title: str, visibility: str) -> str:
+    """Content address of an upload: identical text, title and visibility share a paste."""
+    digest = hashlib.sha256()
+    for part in (normalized_team, title, visibility):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PasteCache:
+    """Map upload content hashes to existing Pokepaste URLs.
+
+    An in-process LRU sits in front of an on-disk SQLite store, so identical
+    teams are only uploaded once per ``ttl`` even across restarts. Entries are
+    evicted when they are older than ``ttl`` seconds or when the store grows
+    beyond ``max_entries`` (least recently used first). Expired entries are
+    never returned; the store itself is pruned every ``PRUNE_EVERY`` inserts,
+    so it can briefly hold up to that many entries over the limit. Hits served
+    from memory refresh ``last_used`` on disk in batches (at the latest
+    before a prune), so hot entries are not the first to be evicted.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str | None = None,
+        *,
+        memory_size: int = 1024,
+        max_entries: int = 100_000,
+        ttl: float = 30 * 24 * 3600,
+    ):
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        # key -> last memory hit not yet written to the store
+        self._touched: dict[str, float] = {}
+        self._conn: sqlite3.Connection | None = None
+        if db_path is not None:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pastes (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pastes_last_used ON pastes (last_used)")
+            self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached paste URL for ``key`` or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                if self._conn is not None:
+                    self._touched[key] = now
+                    if len(self._touched) >= PRUNE_EVERY:
+                        with self._conn:
+                            self._flush_touched()
+                return entry[0]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT url, created FROM pastes WHERE key = ? AND created > ?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row is not None:
+                    with self._conn:
+                        self._conn.execute("UPDATE pastes SET last_used = ? WHERE key = ?", (now, key))
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, url: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, url, now)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO pastes (key, url, created, last_used) VALUES (?, ?, ?, ?)",
+                        (key, url, now, now),
+                    )
+                    self._inserts += 1
+                    if self._inserts % PRUNE_EVERY == 0:
+                        self._prune(now)
+
+    def prune(self) -> None:
+        """Apply the retention limits to the on-disk store now."""
+        with self._lock:
+            if self._conn is not None:
+                with self._conn:
+                    self._prune(time.time())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                with self._conn:
+                    self._flush_touched()
+                self._conn.close()
+                self._conn = None
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE pastes SET last_used = MAX(last_used, ?) WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _prune(self, now: float) -> None:
+        self._flush_touched()
+        self._conn.execute("DELETE FROM pastes WHERE created <= ?", (now - self.ttl,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM pastes").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM pastes WHERE key IN (SELECT key FROM pastes ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def _remember(self, key: str, url: str, created: float) -> None:
+        self._memory[key] = (url, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
@@ -1,4 +1,53 @@
-import requests
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import metrics
+from paste_cache import PasteCache, cache_key
+
+# requests is imported on first upload; it is a large share of the app's import time.
+if TYPE_CHECKING:
+    import requests
+
+
+PASTE_URL = "https://pokepast.es"
+
+# Status codes worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: "requests.Session | None" = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pokepaste")
+
+
+def _never_sent(exc: "requests.RequestException") -> bool:
+    """Whether a failed POST certainly did not reach the server, so retrying cannot duplicate the paste."""
+    import requests
+    from urllib3.exceptions import NewConnectionError
+
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(exc, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def _get_session() -> "requests.Session":
+    """Return the process-wide session so uploads reuse keep-alive connections."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
 
 
 def showdown_to_pokepaste(
@@ -7,6 +56,12 @@ def showdown_to_pokepaste(
     author: str = "",
     notes: str = "",
     public: bool = True,
+    *,
+    base_url: str | None = None,
+    timeout: float = 30,
+    retries: int = 2,
+    backoff: float = 0.5,
+    cache: PasteCache | None = None,
 ) -> str:
     """Upload a Pokémon Showdown team text to Pokepaste and return the paste URL.
 
@@ -22,8 +77,23 @@ def showdown_to_pokepaste(
         Optional notes / description.
     public: bool
         If True, paste is public; if False, it is unlisted.
+    base_url: str | None
+        Pokepaste server to upload to; defaults to ``PASTE_URL``, read at call
+        time so a load test can point the whole app at a local stand-in.
+    timeout: float
+        Timeout in seconds for each attempt.
+    retries: int
+        Extra attempts after failing to connect or a retryable status. Read
+        timeouts and dropped connections are not retried: the paste may
+        already exist, and a retry would create a duplicate.
+    backoff: float
+        Base delay in seconds between attempts; doubles after each attempt.
+    cache: PasteCache | None
+        If given, identical uploads return the previously created paste URL
+        without contacting Pokepaste.
     """
-    url = "https://pokepast.es/create"
+    base_url = base_url or PASTE_URL
+    url = f"{base_url}/create"
 
     # Normalise line endings to CRLF with a trailing newline to better
     # match browser form submissions, which Pokepaste's parser expects.
@@ -32,26 +102,62 @@ def showdown_to_pokepaste(
     if not normalized_team.endswith("\r\n"):
         normalized_team += "\r\n"
 
+    visibility = "public" if public else "unlisted"
+    key = None
+    if cache is not None:
+        key = cache_key(normalized_team, title, visibility)
+        cached_url = cache.get(key)
+        metrics.count("paste_cache_lookups", result="hit" if cached_url is not None else "miss")
+        if cached_url is not None:
+            return cached_url
+
     data = {
         "paste": normalized_team,
         "title": title,
         "author": author,
         "notes": notes,
-        "visibility": "public" if public else "unlisted",
+        "visibility": visibility,
     }
 
-    # Pokepaste returns a redirect (303 See Other in practice) to the new paste;
-    # we do not follow redirects so we can grab the Location header directly.
-    response = requests.post(url, data=data, allow_redirects=False, timeout=30)
+    import requests
+
+    session = _get_session()
+    attempt = 0
+    while True:
+        try:
+            # Pokepaste returns a redirect (303 See Other in practice) to the new paste;
+            # we do not follow redirects so we can grab the Location header directly.
+            with metrics.timer("pokepaste_post"):
+                response = session.post(url, data=data, allow_redirects=False, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            metrics.count("pokepaste_responses", status=type(exc).__name__)
+            if attempt >= retries or not _never_sent(exc):
+                raise
+        else:
+            metrics.count("pokepaste_responses", status=response.status_code)
+            if response.status_code in (301, 302, 303) and "Location" in response.headers:
+                paste_url = response.headers["Location"]
+                if paste_url.startswith("/"):
+                    paste_url = base_url + paste_url
+                if cache is not None:
+                    cache.put(key, paste_url)
+                return paste_url
 
-    if response.status_code in (301, 302, 303) and "Location" in response.headers:
-        paste_url = response.headers["Location"]
-        if paste_url.startswith("/"):
-            paste_url = "https://pokepast.es" + paste_url
-        return paste_url
+            if attempt >= retries or response.status_code not in RETRY_STATUSES:
+                raise RuntimeError(
+                    f"Failed to create pokepaste: status {response.status_code}, "
+                    f"response: {response.text[:500]}"
+                )
+        time.sleep(backoff * 2**attempt)
+        attempt += 1
 
-    raise RuntimeError(
-        f"Failed to create pokepaste: status {response.status_code}, "
-        f"response: {response.text[:500]}"
-    )
 
+def upload_in_background(team_text: str, **kwargs) -> Future:
+    """Start a Pokepaste upload on the shared executor and return its future.
+
+    Accepts the same keyword arguments as ``showdown_to_pokepaste``. The
+    future resolves to the paste URL or raises the upload error. The caller's
+    context (including any active ``metrics.trace()``) is carried over.
+    """
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, showdown_to_pokepaste, team_text, **kwargs)
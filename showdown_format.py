@@ -0,0 +1,353 @@
+"""Streaming reader and writers for Pokemon Showdown team formats.
+
+``iter_sets``/``iter_teams`` read the export format ("Nickname (Species) (M)
+@ Item", "Ability: ...", "- Move", ...) line by line from any iterable of
+lines, such as an open file, so backups with tens of thousands of sets are
+never held in memory. ``format_set`` writes the export format back and
+``pack_team``/``unpack_team`` handle Showdown's one-line packed format.
+"""
+
+import re
+from functools import lru_cache
+from collections.abc import Iterable, Iterator, Mapping
+from typing import NamedTuple
+
+
+STATS = ("HP", "Atk", "Def", "SpA", "SpD", "Spe")
+_STAT_INDEX = {stat.lower(): index for index, stat in enumerate(STATS)}
+
+_HEADER = re.compile(r"^===\s*(?:\[(?P<format>[^\]]*)\]\s*)?(?P<title>.*?)\s*===$")
+_NOT_ALPHANUMERIC = re.compile(r"[^A-Za-z0-9]+")
+
+
+class ShowdownSet(NamedTuple):
+    species: str
+    nickname: str | None = None
+    gender: str | None = None  # "M", "F" or None
+    item: str | None = None
+    ability: str | None = None
+    level: int = 100
+    shiny: bool = False
+    happiness: int = 255
+    pokeball: str | None = None
+    hidden_power: str | None = None
+    dynamax_level: int = 10
+    gigantamax: bool = False
+    tera_type: str | None = None
+    evs: tuple[int, ...] | None = None  # in STATS order; None when the set has no EVs line
+    ivs: tuple[int, ...] | None = None  # in STATS order; None means all 31
+    nature: str | None = None
+    moves: tuple[str, ...] = ()
+
+
+class TeamHeader(NamedTuple):
+    format: str | None
+    folder: str | None
+    name: str
+
+
+class ShowdownTeam(NamedTuple):
+    header: TeamHeader | None
+    sets: list[ShowdownSet]
+
+
+_DEFAULTS = tuple(ShowdownSet._field_defaults.get(name) for name in ShowdownSet._fields)
+_SPECIES, _NICKNAME, _GENDER, _ITEM = (ShowdownSet._fields.index(name) for name in ("species", "nickname", "gender", "item"))
+_NATURE, _SHINY, _MOVES = (ShowdownSet._fields.index(name) for name in ("nature", "shiny", "moves"))
+
+
+def iter_sets(lines: Iterable[str]) -> Iterator[ShowdownSet]:
+    """Yield every set in an export, ignoring team headers."""
+    for record in _iter_records(lines):
+        if isinstance(record, ShowdownSet):
+            yield record
+
+
+def iter_teams(lines: Iterable[str]) -> Iterator[ShowdownTeam]:
+    """Yield teams, split on ``=== [format] Folder/Name ===`` headers.
+
+    Sets before the first header form a team with no header.
+    """
+    team = None
+    for record in _iter_records(lines):
+        if isinstance(record, TeamHeader):
+            if team is not None and (team.sets or team.header):
+                yield team
+            team = ShowdownTeam(record, [])
+        else:
+            if team is None:
+                team = ShowdownTeam(None, [])
+            team.sets.append(record)
+    if team is not None and (team.sets or team.header):
+        yield team
+
+
+def parse_set(text: str) -> ShowdownSet:
+    """Parse a single set; raises ValueError if the text holds none."""
+    for record in iter_sets(text.splitlines()):
+        return record
+    raise ValueError("No Showdown set found")
+
+
+def _iter_records(lines: Iterable[str]) -> Iterator["ShowdownSet | TeamHeader"]:
+    # The set being read, as a list in ShowdownSet field order; moves are collected separately.
+    values: list | None = None
+    moves: list[str] = []
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            if values is not None:
+                values[_MOVES] = tuple(moves)
+                yield ShowdownSet._make(values)
+                values = None
+            continue
+
+        if values is not None and line[0] in "-~":
+            moves.append(line[1:].strip())
+            continue
+
+        if line[0] == "=" and line.startswith("===") and line.endswith("===") and len(line) > 6:
+            if values is not None:
+                values[_MOVES] = tuple(moves)
+                yield ShowdownSet._make(values)
+                values = None
+            yield _parse_header(line)
+            continue
+
+        if values is None:
+            values = _parse_first_line(line)
+            moves = []
+            continue
+
+        key, sep, value = line.partition(": ")
+        field = _LINE_FIELDS.get(key) if sep else None
+        if field is not None:
+            index, convert = field
+            values[index] = convert(value.strip())
+        elif line.endswith(" Nature"):
+            values[_NATURE] = line[: -len(" Nature")].strip()
+        elif line == "Shiny":
+            values[_SHINY] = True
+    if values is not None:
+        values[_MOVES] = tuple(moves)
+        yield ShowdownSet._make(values)
+
+
+def _parse_header(line: str) -> TeamHeader:
+    match = _HEADER.match(line)
+    title = match["title"] if match else line.strip("= ")
+    folder, _, name = title.rpartition("/")
+    return TeamHeader(match["format"] if match else None, folder or None, name)
+
+
+def _parse_first_line(line: str) -> list:
+    """Split "Nickname (Species) (M) @ Item" into a new list of set fields."""
+    values = list(_DEFAULTS)
+    name, sep, item = line.rpartition(" @ ")
+    if not sep:
+        name, item = line, ""
+    values[_ITEM] = item.strip() or None
+
+    name = name.strip()
+    if name.endswith((" (M)", " (F)")):
+        values[_GENDER] = name[-2]
+        name = name[:-4].rstrip()
+    if name.endswith(")") and " (" in name:
+        nickname, _, species = name[:-1].rpartition(" (")
+        values[_NICKNAME] = nickname.strip()
+        name = species.strip()
+    values[_SPECIES] = name
+    return values
+
+
+@lru_cache(maxsize=4096)
+def parse_spread(text: str, default: int | None) -> tuple[int | None, ...]:
+    """Parse "252 SpA / 4 SpD / 252 Spe" into six values in STATS order."""
+    values = [default] * len(STATS)
+    for part in text.split("/"):
+        amount, _, stat = part.strip().partition(" ")
+        index = _STAT_INDEX.get(stat.strip().lower())
+        if index is not None:
+            values[index] = _int_or(amount, default)
+    return tuple(values)
+
+
+def _int_or(text: str, default: int) -> int:
+    try:
+        return int(text)
+    except ValueError:
+        return default
+
+
+def _yes(text: str) -> bool:
+    return text.lower() == "yes"
+
+
+# "Key: value" lines: the ShowdownSet field each one sets and how to convert the value.
+_LINE_FIELDS = {
+    key: (ShowdownSet._fields.index(name), convert)
+    for key, name, convert in (
+        ("Ability", "ability", str),
+        ("Tera Type", "tera_type", str),
+        ("EVs", "evs", lambda value: parse_spread(value, 0)),
+        ("IVs", "ivs", lambda value: parse_spread(value, 31)),
+        # "Nature: X" is not Showdown syntax, but it is what this app used to write.
+        ("Nature", "nature", str),
+        ("Level", "level", lambda value: _int_or(value, 100)),
+        ("Shiny", "shiny", _yes),
+        ("Happiness", "happiness", lambda value: _int_or(value, 255)),
+        ("Pokeball", "pokeball", str),
+        ("Hidden Power", "hidden_power", str),
+        ("Dynamax Level", "dynamax_level", lambda value: _int_or(value, 10)),
+        ("Gigantamax", "gigantamax", _yes),
+    )
+}
+
+
+@lru_cache(maxsize=4096)
+def format_spread(values: tuple[int, ...], default: int) -> str:
+    """The inverse of the EVs/IVs line: only stats that differ from ``default``."""
+    return " / ".join(f"{value} {stat}" for stat, value in zip(STATS, values) if value != default)
+
+
+def format_set(record: ShowdownSet) -> str:
+    """Write a set in Showdown's export format."""
+    name = f"{record.nickname} ({record.species})" if record.nickname else record.species
+    if record.gender:
+        name += f" ({record.gender})"
+    lines = [f"{name} @ {record.item}" if record.item else name]
+    if record.ability:
+        lines.append(f"Ability: {record.ability}")
+    if record.level != 100:
+        lines.append(f"Level: {record.level}")
+    if record.shiny:
+        lines.append("Shiny: Yes")
+    if record.happiness != 255:
+        lines.append(f"Happiness: {record.happiness}")
+    if record.pokeball:
+        lines.append(f"Pokeball: {record.pokeball}")
+    if record.hidden_power:
+        lines.append(f"Hidden Power: {record.hidden_power}")
+    if record.dynamax_level != 10:
+        lines.append(f"Dynamax Level: {record.dynamax_level}")
+    if record.gigantamax:
+        lines.append("Gigantamax: Yes")
+    if record.tera_type:
+        lines.append(f"Tera Type: {record.tera_type}")
+    if record.evs and any(record.evs):
+        lines.append(f"EVs: {format_spread(record.evs, 0)}")
+    if record.nature:
+        lines.append(f"{record.nature} Nature")
+    if record.ivs and any(value != 31 for value in record.ivs):
+        lines.append(f"IVs: {format_spread(record.ivs, 31)}")
+    lines.extend(f"- {move}" for move in record.moves)
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=8192)
+def pack_name(name: str | None) -> str:
+    """Showdown's packed form of a name: letters and digits only."""
+    return _NOT_ALPHANUMERIC.sub("", name) if name else ""
+
+
+def pack_team(sets: Iterable[ShowdownSet]) -> str:
+    """Serialize sets to Showdown's packed format (what ``Teams.pack`` produces).
+
+    Abilities are written by name rather than as the 0/1/H slot shorthand,
+    which needs a Pokedex; Showdown accepts both.
+    """
+    return "]".join(_pack_set(record) for record in sets)
+
+
+def _pack_set(record: ShowdownSet) -> str:
+    name = record.nickname or record.species
+    species = "" if pack_name(name) == pack_name(record.species) else pack_name(record.species)
+    evs = _pack_spread(record.evs, 0)
+    ivs = _pack_spread(record.ivs, 31)
+    misc = str(record.happiness) if record.happiness != 255 else ""
+    if record.pokeball or record.hidden_power or record.gigantamax or record.dynamax_level != 10 or record.tera_type:
+        misc += "," + ",".join(
+            (
+                record.hidden_power or "",
+                pack_name(record.pokeball),
+                "G" if record.gigantamax else "",
+                str(record.dynamax_level) if record.dynamax_level != 10 else "",
+                record.tera_type or "",
+            )
+        )
+    return "|".join(
+        (
+            name,
+            species,
+            pack_name(record.item),
+            pack_name(record.ability),
+            ",".join(pack_name(move) for move in record.moves),
+            record.nature or "",
+            evs,
+            record.gender or "",
+            ivs,
+            "S" if record.shiny else "",
+            str(record.level) if record.level != 100 else "",
+            misc,
+        )
+    )
+
+
+def _pack_spread(values: tuple[int, ...] | None, default: int) -> str:
+    if not values or all(value == default for value in values):
+        return ""
+    return ",".join("" if value == default else str(value) for value in values)
+
+
+def unpack_team(packed: str, names: Mapping[str, str] | None = None) -> list[ShowdownSet]:
+    """Parse Showdown's packed format back into sets.
+
+    Packed species, items, abilities and moves have their spaces and punctuation
+    stripped; ``names`` maps those packed ids back to display names (for
+    instance built from the build catalog). Unknown ids are kept as is.
+    Raises ValueError on malformed input.
+    """
+    names = names or {}
+
+    def display(packed_name: str) -> str | None:
+        return names.get(packed_name, packed_name) if packed_name else None
+
+    sets = []
+    for chunk in packed.split("]") if packed else ():
+        fields = chunk.split("|")
+        if len(fields) < 12:
+            raise ValueError(f"Packed set has {len(fields)} fields, expected 12: {chunk!r}")
+        name, species, item, ability, moves, nature, evs, gender, ivs, shiny, level, misc = fields[:12]
+        happiness, *extra = misc.split(",")
+        hidden_power, pokeball, gigantamax, dynamax_level, tera_type = (extra + [""] * 5)[:5]
+        sets.append(
+            ShowdownSet(
+                species=display(species) or name,
+                nickname=name if species else None,
+                gender=gender or None,
+                item=display(item),
+                ability=display(ability),
+                level=_int_or(level, 100) if level else 100,
+                shiny=shiny == "S",
+                happiness=_int_or(happiness, 255) if happiness else 255,
+                pokeball=display(pokeball),
+                hidden_power=hidden_power or None,
+                dynamax_level=_int_or(dynamax_level, 10) if dynamax_level else 10,
+                gigantamax=gigantamax == "G",
+                tera_type=tera_type or None,
+                evs=_unpack_spread(evs, 0),
+                ivs=_unpack_spread(ivs, 31),
+                nature=nature or None,
+                moves=tuple(display(move) for move in moves.split(",") if move),
+            )
+        )
+    return sets
+
+
+def _unpack_spread(text: str, default: int) -> tuple[int, ...] | None:
+    if not text:
+        return None
+    values = text.split(",")
+    if len(values) != len(STATS):
+        raise ValueError(f"Packed spread needs {len(STATS)} values: {text!r}")
+    return tuple(_int_or(value, default) if value else default for value in values)
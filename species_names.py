@@ -0,0 +1,20 @@
+"""Species and option naming helpers shared by the importers, the constraint engine and the sprite index."""
+
+import re
+
+
+# Species whose own name contains a hyphen, so "Chi-Yu" is not a form of "Chi".
+HYPHENATED_SPECIES = ("Chi-Yu", "Chien-Pao", "Ting-Lu", "Wo-Chien", "Ho-Oh", "Hakamo-o", "Jangmo-o", "Kommo-o", "Porygon-Z")
+
+
+def to_id(name: str) -> str:
+    """Showdown id of a display name: lowercase alphanumerics only."""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def base_species(pokemon_name: str) -> str:
+    """Species a form belongs to, e.g. "Rotom" for "Rotom-Wash" and "Chi-Yu" for "Chi-Yu"."""
+    for species in HYPHENATED_SPECIES:
+        if pokemon_name == species or pokemon_name.startswith(species + "-"):
+            return species
+    return pokemon_name.split("-", 1)[0]
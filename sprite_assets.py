@@ -0,0 +1,202 @@
+"""Species slugs and the optional local sprite store.
+
+Showdown sprite files and Smogon dex pages name species differently
+("urshifu-rapidstrike" vs "urshifu-rapid-strike", "tapukoko" vs
+"tapu-koko"), so both slugs are derived once per species, with
+``SLUG_OVERRIDES`` for the forms the rules get wrong.
+
+Sprites can be mirrored into a content-addressed directory that Streamlit
+serves as static files (``server.enableStaticServing``), so pages load
+without third-party requests:
+
+    python sprite_assets.py prefetch
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import unicodedata
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from db_migrations import DB_PATH
+from species_names import base_species, to_id
+
+
+SPRITE_URL = "https://play.pokemonshowdown.com/sprites/gen5/{slug}.png"
+SMOGON_URL = "https://www.smogon.com/dex/sv/pokemon/{slug}/"
+
+# Streamlit serves <app dir>/static/ at app/static/ when static serving is enabled.
+STATIC_DIR = Path(__file__).resolve().parent / "static" / "sprites"
+STATIC_URL = "app/static/sprites/{file}"
+MANIFEST_NAME = "manifest.json"
+
+
+class SpeciesSlugs(NamedTuple):
+    sprite: str  # Showdown sprite id, e.g. "urshifu-rapidstrike"
+    dex: str  # Smogon dex path segment, e.g. "urshifu-rapid-strike"
+
+
+# Forms without a sprite of their own, and names the rules below would mangle.
+SLUG_OVERRIDES = {
+    "Greninja-Bond": SpeciesSlugs("greninja", "greninja-bond"),
+    "Sinistcha-Masterpiece": SpeciesSlugs("sinistcha", "sinistcha"),
+    "Poltchageist-Artisan": SpeciesSlugs("poltchageist", "poltchageist"),
+    "Type: Null": SpeciesSlugs("typenull", "type-null"),
+    "Nidoran-F": SpeciesSlugs("nidoranf", "nidoran-f"),
+    "Nidoran-M": SpeciesSlugs("nidoranm", "nidoran-m"),
+}
+
+
+def _ascii(name: str) -> str:
+    return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+
+
+def species_slugs(pokemon_name: str) -> SpeciesSlugs:
+    """Sprite id and dex slug of a species name (e.g. "Tapu Koko", "Charizard-Mega-X")."""
+    override = SLUG_OVERRIDES.get(pokemon_name)
+    if override is not None:
+        return override
+    name = _ascii(pokemon_name)
+    base = base_species(name)
+    forme = name[len(base) + 1 :]
+    sprite = to_id(base) + ("-" + to_id(forme) if forme else "")
+    dex = re.sub(r"[^a-z0-9]+", "-", re.sub(r"['.:%]", "", name.lower())).strip("-")
+    return SpeciesSlugs(sprite, dex)
+
+
+def slug_index(names: Iterable[str]) -> dict[str, SpeciesSlugs]:
+    return {name: species_slugs(name) for name in names}
+
+
+def database_species(db_path: Path | str = DB_PATH) -> list[str]:
+    """Every ``pokemon_name`` in ``pokemon_builds``."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return [name for (name,) in conn.execute("SELECT DISTINCT pokemon_name FROM pokemon_builds ORDER BY pokemon_name")]
+    finally:
+        conn.close()
+
+
+def load_manifest(static_dir: Path = STATIC_DIR) -> dict[str, str]:
+    """Sprite id -> stored file name; empty if nothing was prefetched."""
+    try:
+        return json.loads((static_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+class SpriteIndex:
+    """Sprite and Smogon dex URLs for every known species, computed once.
+
+    Sprites found in the local store are served from ``STATIC_URL``; anything
+    else falls back to the Showdown sprite server.
+    """
+
+    def __init__(self, names: Iterable[str], static_dir: Path | None = STATIC_DIR):
+        self._manifest = load_manifest(static_dir) if static_dir else {}
+        self.slugs = slug_index(names)
+        self._urls = {name: self._resolve(slugs) for name, slugs in self.slugs.items()}
+
+    @property
+    def local_sprites(self) -> int:
+        return len(self._manifest)
+
+    def _resolve(self, slugs: SpeciesSlugs) -> tuple[str, str]:
+        stored = self._manifest.get(slugs.sprite)
+        sprite = STATIC_URL.format(file=stored) if stored else SPRITE_URL.format(slug=slugs.sprite)
+        return sprite, SMOGON_URL.format(slug=slugs.dex)
+
+    def urls(self, pokemon_name: str) -> tuple[str, str]:
+        """(sprite URL, Smogon dex URL) for a species, indexed or not."""
+        urls = self._urls.get(pokemon_name)
+        if urls is None:
+            urls = self._urls[pokemon_name] = self._resolve(species_slugs(pokemon_name))
+        return urls
+
+
+def _store(static_dir: Path, data: bytes) -> str:
+    """Write ``data`` under its content hash and return the file name."""
+    file_name = hashlib.sha256(data).hexdigest()[:16] + ".png"
+    path = static_dir / file_name
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return file_name
+
+
+def prefetch(
+    names: Iterable[str],
+    static_dir: Path = STATIC_DIR,
+    base_url: str = SPRITE_URL,
+    workers: int = 8,
+    timeout: float = 10,
+) -> tuple[int, int, list[str]]:
+    """Download every missing sprite into ``static_dir``.
+
+    Returns (downloaded, already stored, failed sprite ids). Sprites already
+    in the manifest are skipped, so reruns only fetch new species.
+    """
+    import requests
+
+    static_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(static_dir)
+    sprite_ids = sorted({slugs.sprite for slugs in slug_index(names).values()})
+    missing = [sprite for sprite in sprite_ids if not (sprite in manifest and (static_dir / manifest[sprite]).exists())]
+
+    session = requests.Session()
+
+    def fetch(sprite: str) -> tuple[str, str | None]:
+        try:
+            response = session.get(base_url.format(slug=sprite), timeout=timeout)
+        except requests.RequestException:
+            return sprite, None
+        if response.status_code != 200 or not response.content:
+            return sprite, None
+        return sprite, _store(static_dir, response.content)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for sprite, file_name in pool.map(fetch, missing):
+            if file_name is None:
+                failed.append(sprite)
+            else:
+                manifest[sprite] = file_name
+    session.close()
+
+    tmp = static_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, static_dir / MANIFEST_NAME)
+    return len(missing) - len(failed), len(sprite_ids) - len(missing), failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the local sprite store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch = commands.add_parser("prefetch", help="download sprites for every species in the build database")
+    fetch.add_argument("--db", type=Path, default=DB_PATH)
+    fetch.add_argument("--dir", type=Path, default=STATIC_DIR, help="sprite store directory")
+    fetch.add_argument("--base-url", default=SPRITE_URL, help="sprite URL template with a {slug} field")
+    fetch.add_argument("--workers", type=int, default=8)
+    slugs = commands.add_parser("slugs", help="print the slug index as JSON")
+    slugs.add_argument("--db", type=Path, default=DB_PATH)
+    args = parser.parse_args()
+
+    names = database_species(args.db)
+    if args.command == "slugs":
+        print(json.dumps({name: slugs._asdict() for name, slugs in slug_index(names).items()}, indent=2))
+        return
+    downloaded, stored, failed = prefetch(names, args.dir, args.base_url, args.workers)
+    print(f"Downloaded {downloaded} sprites, {stored} already stored, into {args.dir}.")
+    if failed:
+        raise SystemExit(f"error: {len(failed)} sprites failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Transactional bulk import of ``tier_strategies/<tier>.json`` into the strategy database.
+
+    python strategy_import.py                     # every tier file in tier_strategies/
+    python strategy_import.py --tier OU --tier UU
+
+The import works on a copy of the database (or a fresh one if there is none)
+and swaps it in with an atomic rename, so the app never sees a half-written
+file. Each tier file replaces the builds of its tier, one transaction per
+tier. Builds whose contents did not change keep their rows and ids. Only
+removed builds are deleted and only new ones inserted.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+from build_catalog import MOVE_SLOTS
+from db_migrations import BASE_SCHEMA, DB_PATH, build_denormalized_options, has_table, is_normalized, migrate
+from strategy_refresh import OUTPUT_DIR, STATE_NAME
+
+
+# Child tables of pokemon_builds and the option column of each.
+OPTION_TABLES = {
+    "items": ("build_items", "item_name"),
+    "abilities": ("build_abilities", "ability_name"),
+    "natures": ("build_natures", "nature_name"),
+    "evs": ("build_evs", "ev_string"),
+    "tera_types": ("build_tera_types", "tera_type"),
+}
+BUILD_TABLES = ("pokemon_builds", "build_moves", *(table for table, _ in OPTION_TABLES.values()))
+
+
+class ImportSummary(NamedTuple):
+    tiers: list[str]
+    added: int
+    removed: int
+    unchanged: int
+
+
+def build_key(pokemon_name: str, build: dict) -> tuple:
+    """Everything stored for a build, comparable between a tier file and the database."""
+    return (
+        pokemon_name,
+        *(tuple(build.get(key) or ()) for key in OPTION_TABLES),
+        tuple(tuple(slot) for slot in build.get("moves") or () if slot),
+    )
+
+
+def _tier_keys(conn: sqlite3.Connection, tier: str) -> dict[int, tuple]:
+    """build id -> build_key of every build stored for ``tier``."""
+    builds = {
+        build_id: {"name": name, "moves": {}}
+        for build_id, name in conn.execute("SELECT id, pokemon_name FROM pokemon_builds WHERE tier = ?", (tier,))
+    }
+    for key, (table, column) in OPTION_TABLES.items():
+        rows = conn.execute(
+            f"SELECT t.build_id, t.{column} FROM {table} t JOIN pokemon_builds b ON b.id = t.build_id "
+            "WHERE b.tier = ? ORDER BY t.id",
+            (tier,),
+        )
+        for build_id, value in rows:
+            builds[build_id].setdefault(key, []).append(value)
+    rows = conn.execute(
+        "SELECT t.build_id, t.move_slot, t.move_name FROM build_moves t JOIN pokemon_builds b ON b.id = t.build_id "
+        "WHERE b.tier = ? ORDER BY t.id",
+        (tier,),
+    )
+    for build_id, slot, move_name in rows:
+        builds[build_id]["moves"].setdefault(slot, []).append(move_name)
+    for build in builds.values():
+        build["moves"] = [build["moves"][slot] for slot in MOVE_SLOTS if slot in build["moves"]]
+    return {build_id: build_key(build.pop("name"), build) for build_id, build in builds.items()}
+
+
+def import_tier(conn: sqlite3.Connection, tier: str, species: dict[str, list[dict]]) -> tuple[int, int, int]:
+    """Make the builds of ``tier`` match ``species`` (name -> builds); returns (added, removed, unchanged).
+
+    Runs in the caller's transaction.
+    """
+    wanted = Counter(build_key(name, build) for name, builds in species.items() for build in builds)
+    removed = []
+    for build_id, key in _tier_keys(conn, tier).items():
+        if wanted[key] > 0:
+            wanted[key] -= 1
+        else:
+            removed.append((build_id,))
+    unchanged = sum(len(builds) for builds in species.values()) - wanted.total()
+
+    if removed:
+        conn.execute("CREATE TEMP TABLE removed_builds (id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT INTO removed_builds VALUES (?)", removed)
+        for table in BUILD_TABLES[1:]:
+            conn.execute(f"DELETE FROM {table} WHERE build_id IN (SELECT id FROM removed_builds)")
+        conn.execute("DELETE FROM pokemon_builds WHERE id IN (SELECT id FROM removed_builds)")
+        conn.execute("DROP TABLE removed_builds")
+
+    next_id = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM sqlite_sequence WHERE name = 'pokemon_builds'")
+    next_id = max(next_id.fetchone()[0], conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM pokemon_builds").fetchone()[0])
+    rows: dict[str, list[tuple]] = {table: [] for table in BUILD_TABLES}
+    for name, builds in species.items():
+        for build in builds:
+            key = build_key(name, build)
+            if wanted[key] <= 0:
+                continue
+            wanted[key] -= 1
+            rows["pokemon_builds"].append((next_id, name, tier))
+            for option, (table, _) in OPTION_TABLES.items():
+                rows[table].extend((next_id, value) for value in build.get(option) or ())
+            for slot, moves in zip(MOVE_SLOTS, key[-1]):
+                rows["build_moves"].extend((next_id, slot, move) for move in moves)
+            next_id += 1
+
+    conn.executemany("INSERT INTO pokemon_builds (id, pokemon_name, tier) VALUES (?, ?, ?)", rows["pokemon_builds"])
+    conn.executemany("INSERT INTO build_moves (build_id, move_slot, move_name) VALUES (?, ?, ?)", rows["build_moves"])
+    for table, column in OPTION_TABLES.values():
+        conn.executemany(f"INSERT INTO {table} (build_id, {column}) VALUES (?, ?)", rows[table])
+    return len(rows["pokemon_builds"]), len(removed), unchanged
+
+
+def tier_files(tier_dir: Path = OUTPUT_DIR, tiers: list[str] | None = None) -> list[Path]:
+    if tiers:
+        return [tier_dir / f"{tier}.json" for tier in tiers]
+    return sorted(path for path in tier_dir.glob("*.json") if path.name != STATE_NAME)
+
+
+def import_tiers(
+    tier_dir: Path = OUTPUT_DIR, db_path: Path = DB_PATH, tiers: list[str] | None = None
+) -> ImportSummary:
+    """Import tier files into a copy of ``db_path`` and atomically replace it.
+
+    Raises ValueError for a normalized database (``db_migrations.py
+    --normalize``): import into the original layout and normalize afterwards.
+    """
+    files = tier_files(tier_dir, tiers)
+    tmp = db_path.with_name(db_path.name + ".import")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        if db_path.exists():
+            source = sqlite3.connect(db_path)
+            try:
+                if is_normalized(source):
+                    raise ValueError(f"{db_path} is normalized; import into the original layout first")
+                source.backup(conn)
+            finally:
+                source.close()
+        else:
+            conn.executescript(BASE_SCHEMA)
+        migrate(conn)
+
+        # The copy is thrown away if anything fails, so it needs no durability
+        # until it is complete; the journal only serves per-tier rollback.
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute("PRAGMA synchronous = OFF")
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND tbl_name IN ({', '.join('?' * len(BUILD_TABLES))})",
+            BUILD_TABLES,
+        ).fetchall()
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+
+        added = removed = unchanged = 0
+        for path in files:
+            with open(path, encoding="utf-8") as f:
+                species = json.load(f)
+            with conn:
+                counts = import_tier(conn, path.stem, species)
+            added, removed, unchanged = added + counts[0], removed + counts[1], unchanged + counts[2]
+
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.execute("ANALYZE")
+        if has_table(conn, "build_options"):
+            build_denormalized_options(conn)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("VACUUM")
+    except BaseException:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    fd = os.open(tmp, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, db_path)
+    return ImportSummary([path.stem for path in files], added, removed, unchanged)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import tier_strategies/<tier>.json into the strategy database.")
+    parser.add_argument("--dir", type=Path, default=OUTPUT_DIR, help="directory of tier files")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--tier", action="append", help="tier to import (repeatable); default: every tier file")
+    args = parser.parse_args()
+
+    try:
+        summary = import_tiers(args.dir, args.db, args.tier)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"error: {exc}")
+    print(
+        f"Imported {', '.join(summary.tiers)} into {args.db}: {summary.added} builds added, "
+        f"{summary.removed} removed, {summary.unchanged} unchanged."
+    )
+    if summary.added or summary.removed:
+        print("Rerun catalog_snapshot.py if you use a catalog snapshot.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Concurrent, incremental refresh of Smogon strategies into tier JSON files.
+
+    python strategy_refresh.py                        # every tier in TIER_ORDER plus NFE and LC
+    python strategy_refresh.py --tier OU --tier UU
+    python strategy_refresh.py --base-url http://127.0.0.1:8000 --rate 0   # a local stand-in
+
+Smogon dex pages embed their data as JSON (``dexSettings``), so no browser is
+needed. The species list comes from the dex index. Every species page is
+fetched once for all tiers by a bounded thread pool. Requests to each host are
+spaced by ``--rate``.
+
+Pages are fetched conditionally (ETag / Last-Modified), and a page whose
+content hash has not changed is not parsed again. A page that comes back
+without any strategies is retried straight away instead of in a second pass.
+Progress is checkpointed to ``tier_strategies/refresh_state.json``, so an
+interrupted run resumes with the species it had not finished. Tier files
+whose content did not change are not rewritten.
+
+Each ``tier_strategies/<tier>.json`` maps species names to their builds:
+
+    {"Great Tusk": [{"name": "Rapid Spin", "items": ["Booster Energy"], "abilities": ["Protosynthesis"],
+                     "natures": ["Jolly"], "evs": ["252 Atk", "4 SpD", "252 Spe"], "tera_types": ["Steel"],
+                     "moves": [["Rapid Spin"], ["Headlong Rush"], ["Ice Spinner", "Knock Off"], ["Bulk Up"]]}]}
+
+``moves`` holds one list of alternatives per move slot. A species with no
+strategies for the tier maps to an empty list.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+from urllib.parse import urlsplit
+
+import metrics
+from build_catalog import EXCLUDED_TIERS, TIER_ORDER
+from showdown_format import STATS
+from sprite_assets import species_slugs
+
+if TYPE_CHECKING:
+    import requests
+
+
+BASE_URL = "https://www.smogon.com"
+INDEX_PATH = "/dex/sv/pokemon/"
+POKEMON_PATH = "/dex/sv/pokemon/{slug}/"
+REFRESH_TIERS = TIER_ORDER + EXCLUDED_TIERS
+
+OUTPUT_DIR = Path(__file__).resolve().parent / "tier_strategies"
+STATE_NAME = "refresh_state.json"
+STATE_VERSION = 1
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Keys of a Smogon EV config, in STATS order.
+EV_KEYS = ("hp", "atk", "def", "spa", "spd", "spe")
+
+_DEX_SETTINGS = re.compile(r"dexSettings\s*=\s*")
+
+
+class RefreshSummary(NamedTuple):
+    updated: int  # pages fetched and parsed
+    unchanged: int  # 304 or the same content hash as last time
+    empty: list[str]  # species whose page still had no strategies after the retries; previous data is kept
+    failed: list[str]  # species that could not be fetched; their previous data is kept
+    resumed: int  # species skipped because an interrupted run had already finished them
+
+
+class HostRateLimiter:
+    """Spaces requests to each host at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def dex_rpcs(html: str) -> dict[str, object]:
+    """The results embedded in a dex page's ``dexSettings``, by RPC name (e.g. "dump-pokemon")."""
+    match = _DEX_SETTINGS.search(html)
+    if match is None:
+        return {}
+    try:
+        settings, _ = json.JSONDecoder().raw_decode(html, match.end())
+    except ValueError:
+        return {}
+    results = {}
+    for entry in settings.get("injectRpcs", []) if isinstance(settings, dict) else ():
+        try:
+            call, result = entry
+            # The call is a JSON-encoded ["rpc-name", {arguments}] list.
+            name = (json.loads(call) if isinstance(call, str) else call)[0]
+        except (TypeError, ValueError, IndexError, KeyError):
+            continue
+        results[name] = result
+    return results
+
+
+def parse_listing(html: str) -> dict[str, list[str]]:
+    """Species name -> Smogon formats, from the dex index page."""
+    basics = dex_rpcs(html).get("dump-basics")
+    if not isinstance(basics, dict):
+        return {}
+    return {entry["name"]: list(entry.get("formats") or ()) for entry in basics.get("pokemon", ()) if entry.get("name")}
+
+
+def moveset_build(moveset: dict) -> dict:
+    """A Smogon moveset in the tier JSON build format."""
+    evconfigs = moveset.get("evconfigs") or [{}]
+    return {
+        "name": moveset.get("name", ""),
+        "items": list(moveset.get("items") or ()),
+        "abilities": list(moveset.get("abilities") or ()),
+        "natures": list(moveset.get("natures") or ()),
+        "evs": [f"{evconfigs[0][key]} {stat}" for key, stat in zip(EV_KEYS, STATS) if evconfigs[0].get(key)],
+        "tera_types": list(moveset.get("teratypes") or ()),
+        "moves": [
+            [move["move"] if isinstance(move, dict) else move for move in slot]
+            for slot in moveset.get("moveslots") or ()
+            if slot
+        ],
+    }
+
+
+def parse_strategies(html: str) -> dict[str, list[dict]]:
+    """Format -> builds, from a species page. Empty if the page has no strategies."""
+    dump = dex_rpcs(html).get("dump-pokemon")
+    if not isinstance(dump, dict):
+        return {}
+    strategies: dict[str, list[dict]] = {}
+    for strategy in dump.get("strategies") or ():
+        builds = [moveset_build(moveset) for moveset in strategy.get("movesets") or ()]
+        if builds:
+            strategies.setdefault(strategy.get("format", ""), []).extend(builds)
+    return strategies
+
+
+def fetch_species(
+    session: "requests.Session",
+    limiter: HostRateLimiter,
+    url: str,
+    previous: dict | None,
+    retries: int = 2,
+    timeout: float = 20,
+    backoff: float = 1.0,
+) -> tuple[str, dict | None]:
+    """Fetch one species page; returns (status, record).
+
+    status is "updated", "unchanged", "empty" or "failed". The record holds
+    the page validators, content hash and parsed strategies. A page that
+    fails, or stays empty after the retries, keeps the previous record; it
+    is None only if the page failed and there was none. Empty pages are
+    retried without validators.
+    """
+    import requests
+
+    headers = {}
+    if previous and previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous and previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+
+    status = "failed"
+    record = previous
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        limiter.wait(url)
+        try:
+            with metrics.timer("smogon_get"):
+                response = session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException as exc:
+            metrics.count("smogon_responses", status=type(exc).__name__)
+            continue
+        metrics.count("smogon_responses", status=response.status_code)
+
+        if response.status_code == 304 and previous is not None:
+            return "unchanged", previous
+        if response.status_code in RETRY_STATUSES:
+            continue
+        if response.status_code != 200:
+            break
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if previous and previous.get("sha256") == digest:
+            return "unchanged", {**previous, **validators}
+        strategies = parse_strategies(response.text)
+        if strategies:
+            return "updated", {**validators, "sha256": digest, "strategies": strategies}
+        # Smogon sometimes serves a page before its strategies are filled in.
+        status = "empty"
+        headers = {}
+    if status == "empty" and not (previous and previous.get("strategies")):
+        record = {"etag": None, "last_modified": None, "sha256": None, "strategies": {}}
+    return status, record
+
+
+def load_state(output_dir: Path = OUTPUT_DIR) -> dict:
+    try:
+        state = json.loads((output_dir / STATE_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        state = {"version": STATE_VERSION, "run": None, "pokemon": {}}
+    return state
+
+
+def _write_json(path: Path, data: object, indent: int | None = 2) -> None:
+    """Atomically replace ``path`` with ``data``; a file that already holds it is left alone."""
+    text = json.dumps(data, indent=indent, ensure_ascii=False) + "\n"
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return
+    except OSError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def refresh(
+    tiers: Iterable[str] = REFRESH_TIERS,
+    output_dir: Path = OUTPUT_DIR,
+    base_url: str = BASE_URL,
+    workers: int = 4,
+    rate: float = 2.0,
+    retries: int = 2,
+    timeout: float = 20,
+    backoff: float = 1.0,
+    checkpoint_every: int = 25,
+) -> RefreshSummary:
+    """Refresh the strategies of every species in ``tiers`` and rewrite their tier files.
+
+    ``rate`` is the maximum number of requests per second to each host (0
+    for no limit). The state file is rewritten after every
+    ``checkpoint_every`` finished species and when the run stops for any
+    reason.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    tiers = list(tiers)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state = load_state(output_dir)
+    records: dict[str, dict] = state["pokemon"]
+    limiter = HostRateLimiter(rate)
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    try:
+        limiter.wait(base_url)
+        response = session.get(base_url + INDEX_PATH, timeout=timeout)
+        response.raise_for_status()
+        listing = parse_listing(response.text)
+        if not listing:
+            raise ValueError(f"no species found at {base_url + INDEX_PATH}")
+        members = {tier: [name for name, formats in listing.items() if tier in formats] for tier in tiers}
+        names = list(dict.fromkeys(name for tier in tiers for name in members[tier]))
+
+        # Resume an interrupted run over the same tiers.
+        run = state.get("run")
+        done = set(run["done"]) if run and run.get("tiers") == tiers else set()
+        state["run"] = {"tiers": tiers, "done": sorted(done)}
+        pending = [name for name in names if name not in done]
+
+        counts = {"updated": 0, "unchanged": 0}
+        empty: list[str] = []
+        failed: list[str] = []
+        since_checkpoint = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh") as pool:
+            futures = {
+                pool.submit(
+                    fetch_species,
+                    session,
+                    limiter,
+                    base_url + POKEMON_PATH.format(slug=species_slugs(name).dex),
+                    records.get(name),
+                    retries,
+                    timeout,
+                    backoff,
+                ): name
+                for name in pending
+            }
+            try:
+                while futures:
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name = futures.pop(future)
+                        status, record = future.result()
+                        if record is not None:
+                            records[name] = record
+                        if status == "failed":
+                            # Not marked done, so a resumed run tries it again.
+                            failed.append(name)
+                            continue
+                        if status == "empty":
+                            empty.append(name)
+                        else:
+                            counts[status] += 1
+                        done.add(name)
+                        since_checkpoint += 1
+                    if since_checkpoint >= checkpoint_every:
+                        state["run"]["done"] = sorted(done)
+                        _write_json(output_dir / STATE_NAME, state, indent=None)
+                        since_checkpoint = 0
+            finally:
+                for future in futures:
+                    future.cancel()
+                state["run"]["done"] = sorted(done)
+                _write_json(output_dir / STATE_NAME, state, indent=None)
+
+        for tier in tiers:
+            tier_data = {name: records.get(name, {}).get("strategies", {}).get(tier, []) for name in members[tier]}
+            _write_json(output_dir / f"{tier}.json", tier_data)
+        state["run"] = None
+        _write_json(output_dir / STATE_NAME, state, indent=None)
+    finally:
+        session.close()
+    return RefreshSummary(counts["updated"], counts["unchanged"], sorted(empty), sorted(failed), len(names) - len(pending))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh Smogon strategies into tier_strategies/<tier>.json.")
+    parser.add_argument("--tier", action="append", choices=REFRESH_TIERS, help="tier to refresh (repeatable); default: all")
+    parser.add_argument("--dir", type=Path, default=OUTPUT_DIR, help="output directory")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="requests per second per host; 0 for no limit")
+    parser.add_argument("--retries", type=int, default=2, help="retries for failed or empty pages")
+    args = parser.parse_args()
+
+    tiers = args.tier or REFRESH_TIERS
+    summary = refresh(tiers, args.dir, args.base_url.rstrip("/"), args.workers, args.rate, args.retries)
+    print(
+        f"Refreshed {', '.join(tiers)}: {summary.updated} updated, {summary.unchanged} unchanged, "
+        f"{summary.resumed} resumed, {len(summary.empty)} empty, {len(summary.failed)} failed."
+    )
+    if summary.empty:
+        print(f"No strategies: {', '.join(summary.empty)}")
+    if summary.failed:
+        raise SystemExit(f"error: {len(summary.failed)} species failed: {', '.join(summary.failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Short, shareable team codes.
+
+A code packs each member as two varints: the build id, and its option
+indices folded into one mixed-radix integer whose radices are the option
+list lengths in the catalog. The members are prefixed with a format version
+and the 32-bit catalog fingerprint and encoded as unpadded URL-safe base64.
+Decoding needs no network access and no database queries, only the
+in-memory ``BuildCatalog``.
+"""
+
+import base64
+
+from build_catalog import BuildCatalog, BuildChoice
+
+
+CODE_VERSION = 2
+# A team never has more members; longer codes are rejected rather than rendered.
+MAX_MEMBERS = 6
+_HEADER_SIZE = 5
+
+
+def encode_team(catalog: BuildCatalog, choices: list[BuildChoice]) -> str:
+    return code_from_bytes(team_bytes(catalog, choices))
+
+
+def decode_team(catalog: BuildCatalog, code: str) -> list[BuildChoice]:
+    """Decode a team code back into build choices.
+
+    Raises ValueError if the code is malformed or was made against a
+    different build database.
+    """
+    try:
+        data = base64.urlsafe_b64decode(code + "=" * (-len(code) % 4))
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid team code: {exc}") from exc
+    return choices_from_bytes(catalog, data)
+
+
+def team_bytes(catalog: BuildCatalog, choices: list[BuildChoice]) -> bytes:
+    """The binary form of a team code, for storage (see team_history.py)."""
+    if len(choices) > MAX_MEMBERS:
+        raise ValueError(f"A team code holds at most {MAX_MEMBERS} members")
+    out = bytearray([CODE_VERSION])
+    out += catalog.fingerprint.to_bytes(4, "big")
+    for choice in choices:
+        if not catalog.is_valid(choice):
+            raise ValueError(f"Choice {choice} does not belong to this catalog")
+        packed = 0
+        indices = (choice.item, choice.ability, choice.nature, choice.tera_type, *choice.moves)
+        for index, radix in zip(indices, _radices(catalog, choice.build_id)):
+            packed = packed * radix + index
+        _write_varint(out, choice.build_id)
+        _write_varint(out, packed)
+    return bytes(out)
+
+
+def code_from_bytes(data: bytes) -> str:
+    """The shareable team code for the output of ``team_bytes``."""
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def choices_from_bytes(catalog: BuildCatalog, data: bytes) -> list[BuildChoice]:
+    """Inverse of ``team_bytes``; raises ValueError like ``decode_team``."""
+    if len(data) < _HEADER_SIZE or data[0] != CODE_VERSION:
+        raise ValueError("Invalid team code: unknown format version")
+    if int.from_bytes(data[1:_HEADER_SIZE], "big") != catalog.fingerprint:
+        raise ValueError("Team code was made with a different build database")
+
+    choices = []
+    pos = _HEADER_SIZE
+    while pos < len(data):
+        if len(choices) == MAX_MEMBERS:
+            raise ValueError(f"Invalid team code: more than {MAX_MEMBERS} members")
+        build_id, pos = _read_varint(data, pos)
+        packed, pos = _read_varint(data, pos)
+        if catalog.get(build_id) is None:
+            raise ValueError(f"Invalid team code: unknown build {build_id}")
+
+        indices = []
+        for radix in reversed(_radices(catalog, build_id)):
+            packed, index = divmod(packed, radix)
+            indices.append(index)
+        if packed:
+            raise ValueError(f"Invalid team code: bad options for build {build_id}")
+        indices.reverse()
+        choices.append(BuildChoice(build_id, *indices[:4], tuple(indices[4:])))
+
+    return choices
+
+
+def _radices(catalog: BuildCatalog, build_id: int) -> list[int]:
+    build = catalog.get(build_id)
+    counts = [len(build.items), len(build.abilities), len(build.natures), len(build.tera_types)]
+    counts += [len(slot) for slot in build.moves]
+    return [count or 1 for count in counts]
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise ValueError("Team codes can only hold non-negative integers")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Invalid team code: truncated")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
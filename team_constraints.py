@@ -0,0 +1,372 @@
+"""Constraint-aware team generation.
+
+Build options are interned to small integer ids once per catalog, so rule
+checks are bitset operations: the items already on the team are one int,
+the roles a species could still provide are one int, and so on. Teams are
+built by randomized backtracking with a node budget, which returns a valid
+team in bounded time or raises ``ConstraintError``.
+"""
+
+import random
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import NamedTuple
+
+from build_catalog import BuildCatalog, BuildChoice
+from species_names import base_species
+from weighted_sampling import AliasTable
+
+
+# Moves that give a set each team role.
+ROLE_MOVES: dict[str, frozenset[str]] = {
+    "hazard_setter": frozenset({"Stealth Rock", "Spikes", "Toxic Spikes", "Sticky Web", "Ceaseless Edge", "Stone Axe"}),
+    "hazard_removal": frozenset({"Rapid Spin", "Defog", "Court Change", "Mortal Spin", "Tidy Up"}),
+    "pivot": frozenset({"U-turn", "Volt Switch", "Flip Turn", "Parting Shot", "Teleport", "Chilly Reception", "Shed Tail"}),
+    "priority": frozenset(
+        {"Aqua Jet", "Bullet Punch", "Extreme Speed", "Ice Shard", "Mach Punch", "Shadow Sneak", "Sucker Punch",
+         "Vacuum Wave", "Quick Attack", "Accelerock", "Jet Punch", "Grassy Glide", "First Impression"}
+    ),
+    "setup": frozenset(
+        {"Swords Dance", "Dragon Dance", "Nasty Plot", "Calm Mind", "Bulk Up", "Quiver Dance", "Shell Smash",
+         "Shift Gear", "Agility", "Belly Drum", "Coil", "Victory Dance", "Tidy Up", "Iron Defense", "Curse"}
+    ),
+    "recovery": frozenset(
+        {"Recover", "Roost", "Slack Off", "Soft-Boiled", "Moonlight", "Morning Sun", "Synthesis", "Shore Up",
+         "Strength Sap", "Milk Drink", "Wish", "Rest", "Lunar Blessing", "Jungle Healing"}
+    ),
+    "status": frozenset({"Will-O-Wisp", "Thunder Wave", "Toxic", "Spore", "Sleep Powder", "Glare", "Yawn", "Nuzzle"}),
+}
+ROLES = tuple(ROLE_MOVES)
+_ROLE_BITS = {role: 1 << bit for bit, role in enumerate(ROLES)}
+
+# Candidate sets tried before the search restarts with a new species order.
+RESTART_NODES = 250
+
+# Distinct ban lists (and tier pools) whose derived tables an OptionIndex keeps.
+BAN_CACHE_SIZE = 32
+
+
+class TeamConstraints(NamedTuple):
+    """Rules a generated team must satisfy. The defaults are the standard clauses."""
+
+    item_clause: bool = True  # no two Pokemon hold the same item
+    species_clause: bool = True  # no two Pokemon share a base species (e.g. two Rotom forms)
+    unique_moves: bool = True  # no move appears twice in one set
+    required_roles: frozenset[str] = frozenset()  # see ROLE_MOVES
+    banned_items: frozenset[str] = frozenset()
+    banned_moves: frozenset[str] = frozenset()
+    max_tera_duplicates: int | None = None  # most Pokemon allowed to share a tera type
+
+
+class ConstrainedTeam(NamedTuple):
+    choices: list[BuildChoice]
+    nodes: int  # candidate sets tried
+    pruned: int  # candidates rejected by a constraint
+
+
+class ConstraintError(ValueError):
+    """No team satisfying the constraints was found within the node budget."""
+
+
+class OptionIndex:
+    """Integer ids for every item, move and tera type in a catalog."""
+
+    def __init__(self, catalog: BuildCatalog):
+        self.catalog = catalog
+        self.item_ids: dict[str, int] = {}
+        self.move_ids: dict[str, int] = {}
+        self.tera_ids: dict[str, int] = {}
+        self.species_ids: dict[str, int] = {}
+        # build id -> (item ids, tera ids, move ids per slot)
+        self.builds: dict[int, tuple[tuple[int, ...], tuple[int, ...], tuple[tuple[int, ...], ...]]] = {}
+        # Bounded per instance: the index is shared across threads by the app and
+        # the API, and every distinct ban list would otherwise be kept forever.
+        # lru_cache is thread-safe; a race at worst computes a table twice.
+        self.role_masks = lru_cache(maxsize=BAN_CACHE_SIZE)(self._role_masks)
+        self.species_builds = lru_cache(maxsize=BAN_CACHE_SIZE)(self._species_builds)
+
+        for build_id in catalog.all_build_ids():
+            build = catalog.get(build_id)
+            self.species_ids.setdefault(base_species(build.pokemon_name), len(self.species_ids))
+            self.builds[build_id] = (
+                tuple(_intern(self.item_ids, item) for item in build.items),
+                tuple(_intern(self.tera_ids, tera) for tera in build.tera_types),
+                tuple(tuple(_intern(self.move_ids, move) for move in slot) for slot in build.moves),
+            )
+        id_to_move = {move_id: move for move, move_id in self.move_ids.items()}
+        self.move_roles = [
+            sum(bit for role, bit in _ROLE_BITS.items() if id_to_move[move_id] in ROLE_MOVES[role])
+            for move_id in range(len(id_to_move))
+        ]
+
+    def mask(self, ids: dict[str, int], names: frozenset[str]) -> int:
+        result = 0
+        for name in names:
+            if name in ids:
+                result |= 1 << ids[name]
+        return result
+
+    def _role_masks(self, banned_moves: frozenset[str]) -> dict[int, int]:
+        """Bitmask of roles each build can still provide once banned moves are removed.
+
+        Call it as ``role_masks``, which caches the result per ban list.
+        """
+        banned = self.mask(self.move_ids, banned_moves)
+        return {
+            build_id: _or_all(self.move_roles[move_id] for slot in slots for move_id in slot if not banned >> move_id & 1)
+            for build_id, (_, _, slots) in self.builds.items()
+        }
+
+    def _species_builds(
+        self, tier: str, include_lower_tiers: bool, banned_moves: frozenset[str]
+    ) -> dict[str, tuple[list, int]]:
+        """Per species in the pool: its (tier, build id) candidates and the roles they could provide.
+
+        Call it as ``species_builds``, which caches the result per pool and ban list.
+        """
+        catalog = self.catalog
+        role_masks = self.role_masks(banned_moves)
+        result = {}
+        for name in catalog.species_pool(tier, include_lower_tiers):
+            builds = [
+                (species_tier, build_id)
+                for species_tier in catalog.species_tiers(name, tier, include_lower_tiers)
+                for build_id in catalog.build_ids(species_tier, name)
+            ]
+            result[name] = (builds, _or_all(role_masks[build_id] for _, build_id in builds))
+        return result
+
+
+def generate_constrained_team(
+    index: OptionIndex,
+    tier: str,
+    include_lower_tiers: bool,
+    constraints: TeamConstraints,
+    rng: random.Random | None = None,
+    num_pokemon: int = 6,
+    weighted: bool = False,
+    max_nodes: int = 5000,
+) -> ConstrainedTeam:
+    """Build a team that satisfies ``constraints`` by randomized backtracking.
+
+    Raises ConstraintError if the budget of ``max_nodes`` candidate sets runs
+    out, or if a required role is unknown or impossible in this tier.
+    """
+    rng = rng or random.Random()
+    catalog = index.catalog
+    unknown = constraints.required_roles - set(ROLES)
+    if unknown:
+        raise ConstraintError(f"Unknown roles {sorted(unknown)}, expected some of {list(ROLES)}")
+
+    pool = catalog.species_pool(tier, include_lower_tiers)
+    num_pokemon = min(num_pokemon, len(pool))
+    banned_items = index.mask(index.item_ids, constraints.banned_items)
+    banned_moves = index.mask(index.move_ids, constraints.banned_moves)
+    required = _or_all(_ROLE_BITS[role] for role in constraints.required_roles)
+
+    species_builds = index.species_builds(tier, include_lower_tiers, constraints.banned_moves)
+    unavailable = required & ~_or_all(roles for _, roles in species_builds.values())
+    if unavailable:
+        missing = [role for role in ROLES if unavailable & _ROLE_BITS[role]]
+        raise ConstraintError(f"No Pokemon in {tier} can provide roles {missing}")
+
+    team: list[BuildChoice] = []
+    stats = {"nodes": 0, "pruned": 0, "limit": 0}
+    tera_counts: dict[int, int] = {}
+
+    def search(start: int, used_items: int, used_species: int, roles: int) -> bool:
+        if len(team) == num_pokemon:
+            return not required & ~roles
+        remaining = num_pokemon - len(team)
+        for position in range(start, len(order) - remaining + 1):
+            unmet = required & ~roles
+            # Bitset pruning: the species from here on must still be able to cover every unmet role.
+            if unmet & ~suffix_roles[position]:
+                stats["pruned"] += 1
+                return False
+
+            name = order[position]
+            builds, species_roles = species_builds[name]
+            species_bit = 1 << index.species_ids[base_species(name)]
+            if constraints.species_clause and used_species & species_bit:
+                stats["pruned"] += 1
+                continue
+            # The last slot has to cover everything still missing on its own.
+            if remaining == 1 and unmet & ~species_roles:
+                stats["pruned"] += 1
+                continue
+
+            for _, build_id in rng.sample(builds, len(builds)):
+                if stats["nodes"] >= stats["limit"]:
+                    return False
+                stats["nodes"] += 1
+                picked = _pick_options(
+                    index, build_id, rng, constraints, used_items, banned_items, banned_moves, tera_counts, unmet, weighted
+                )
+                if picked is None:
+                    stats["pruned"] += 1
+                    continue
+
+                choice, item_id, tera_id, set_roles = picked
+                team.append(choice)
+                if tera_id is not None:
+                    tera_counts[tera_id] = tera_counts.get(tera_id, 0) + 1
+                item_bit = 1 << item_id if item_id is not None and constraints.item_clause else 0
+                if search(position + 1, used_items | item_bit, used_species | species_bit, roles | set_roles):
+                    return True
+                team.pop()
+                if tera_id is not None:
+                    tera_counts[tera_id] -= 1
+                stats["pruned"] += 1
+        return False
+
+    # Depth-first search gets stuck below a bad early pick, so restart with a
+    # fresh species order every RESTART_NODES candidates.
+    while stats["nodes"] < max_nodes:
+        order = _species_order(catalog, tier, include_lower_tiers, pool, num_pokemon, rng, weighted)
+        # suffix_roles[i]: every role some species at position >= i could provide.
+        suffix_roles = [0] * (len(order) + 1)
+        for position in range(len(order) - 1, -1, -1) if required else ():
+            suffix_roles[position] = suffix_roles[position + 1] | species_builds[order[position]][1]
+        stats["limit"] = min(max_nodes, stats["nodes"] + RESTART_NODES)
+        if search(0, 0, 0, 0):
+            return ConstrainedTeam(list(team), stats["nodes"], stats["pruned"])
+        team.clear()
+        tera_counts.clear()
+
+    raise ConstraintError(
+        f"No team for {tier} satisfies the constraints "
+        f"({stats['nodes']} candidates tried, {stats['pruned']} pruned)"
+    )
+
+
+def _species_order(
+    catalog: BuildCatalog,
+    tier: str,
+    include_lower_tiers: bool,
+    pool: tuple[str, ...],
+    num_pokemon: int,
+    rng: random.Random,
+    weighted: bool,
+) -> "list[str] | _LazyShuffle":
+    """The pool in random order; with ``weighted`` a usage-weighted draw goes first."""
+    if not weighted:
+        return _LazyShuffle(pool, rng)
+    front = catalog.sample_species(tier, include_lower_tiers, min(len(pool), num_pokemon * 4), rng, weighted)
+    chosen = set(front)
+    rest = [name for name in pool if name not in chosen]
+    rng.shuffle(rest)
+    return front + rest
+
+
+class _LazyShuffle:
+    """A Fisher-Yates shuffle that only fixes positions once they are read.
+
+    Most searches look at the first few species of a pool of hundreds, so
+    shuffling the whole pool up front would dominate the cost.
+    """
+
+    __slots__ = ("_items", "_rng", "_shuffled")
+
+    def __init__(self, items: Sequence[str], rng: random.Random):
+        self._items = list(items)
+        self._rng = rng
+        self._shuffled = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, position: int) -> str:
+        items = self._items
+        while self._shuffled <= position:
+            swap = self._rng.randrange(self._shuffled, len(items))
+            items[self._shuffled], items[swap] = items[swap], items[self._shuffled]
+            self._shuffled += 1
+        return items[position]
+
+
+def _pick_options(
+    index: OptionIndex,
+    build_id: int,
+    rng: random.Random,
+    constraints: TeamConstraints,
+    used_items: int,
+    banned_items: int,
+    banned_moves: int,
+    tera_counts: dict[int, int],
+    prefer_roles: int,
+    weighted: bool,
+) -> tuple[BuildChoice, int | None, int | None, int] | None:
+    """Pick options for one build that respect the constraints, or None if impossible."""
+    item_ids, tera_ids, move_slots = index.builds[build_id]
+    build = index.catalog.get(build_id)
+    tables = index.catalog.option_tables(build_id) if weighted else None
+    item_table, ability_table, nature_table, tera_table, move_tables = tables or (None, None, None, None, ())
+
+    item = 0
+    item_id = None
+    if item_ids:
+        blocked = banned_items | (used_items if constraints.item_clause else 0)
+        allowed = [i for i, option in enumerate(item_ids) if not blocked >> option & 1]
+        if not allowed:
+            return None
+        item = _pick(rng, allowed, item_table)
+        item_id = item_ids[item]
+
+    tera = 0
+    tera_id = None
+    if tera_ids:
+        limit = constraints.max_tera_duplicates
+        allowed = [i for i, option in enumerate(tera_ids) if limit is None or tera_counts.get(option, 0) < limit]
+        if not allowed:
+            return None
+        tera = _pick(rng, allowed, tera_table)
+        tera_id = tera_ids[tera]
+
+    moves = []
+    chosen_moves = 0
+    roles = 0
+    for slot_number, slot in enumerate(move_slots):
+        blocked = banned_moves | (chosen_moves if constraints.unique_moves else 0)
+        allowed = [i for i, option in enumerate(slot) if not blocked >> option & 1]
+        if not allowed:
+            return None
+        # Take a move that covers a still unmet role if this slot has one.
+        covering = [i for i in allowed if index.move_roles[slot[i]] & prefer_roles & ~roles]
+        table = move_tables[slot_number] if slot_number < len(move_tables) else None
+        move = rng.choice(covering) if covering else _pick(rng, allowed, table)
+        moves.append(move)
+        chosen_moves |= 1 << slot[move]
+        roles |= index.move_roles[slot[move]]
+
+    choice = BuildChoice(
+        build_id=build_id,
+        item=item,
+        ability=_pick(rng, range(len(build.abilities)), ability_table) if build.abilities else 0,
+        nature=_pick(rng, range(len(build.natures)), nature_table) if build.natures else 0,
+        tera_type=tera,
+        moves=tuple(moves),
+    )
+    return choice, item_id, tera_id, roles
+
+
+def _pick(rng: random.Random, allowed, table: AliasTable | None) -> int:
+    """Uniform pick from ``allowed``, or a weighted one if a table is given and lands inside it."""
+    if table is not None:
+        for _ in range(4):
+            index = table.sample(rng)
+            if index in allowed:
+                return index
+    return rng.choice(allowed)
+
+
+def _intern(ids: dict[str, int], name: str) -> int:
+    return ids.setdefault(name, len(ids))
+
+
+def _or_all(values) -> int:
+    result = 0
+    for value in values:
+        result |= value
+    return result
+
@@ -0,0 +1,202 @@
+"""Team generation without any UI dependency.
+
+``TeamGenerator`` wraps one in-memory ``BuildCatalog`` and is shared by the
+Streamlit app, the bulk command line and the JSON API. It is safe to use
+from many threads: the catalog is read-only, and the constraint index and
+coverage scorer are built once on first use.
+"""
+
+import random
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import metrics
+from build_catalog import TIER_ORDER, BuildCatalog, BuildChoice
+from catalog_snapshot import load_catalog
+from db_migrations import DB_PATH
+from team_constraints import OptionIndex, TeamConstraints, generate_constrained_team
+
+# type_coverage pulls in NumPy, which only best_of > 1 needs.
+if TYPE_CHECKING:
+    from type_coverage import CoverageScorer
+
+
+# "uniform" draws every species/build/option equally; "usage" follows usage_weights.
+WEIGHTINGS = ("uniform", "usage")
+
+
+def sorted_tiers(tiers: list[str]) -> list[str]:
+    """Tiers in TIER_ORDER, followed by any unknown tiers alphabetically."""
+    known = sorted((t for t in tiers if t in TIER_ORDER), key=TIER_ORDER.index)
+    return known + sorted(t for t in tiers if t not in TIER_ORDER)
+
+
+def build_showdown_set(name: str, build_data: dict) -> str:
+    """Convert a build dictionary into a Showdown set string."""
+    lines = []
+
+    # Name @ Item
+    item = build_data.get("item")
+    if item:
+        lines.append(f"{name} @ {item}")
+    else:
+        lines.append(name)
+
+    # Ability
+    ability = build_data.get("ability")
+    if ability:
+        lines.append(f"Ability: {ability}")
+
+    # Tera Type
+    tera = build_data.get("tera_type")
+    if tera:
+        lines.append(f"Tera Type: {tera}")
+
+    # EVs
+    evs = build_data.get("evs")
+    if evs:
+        lines.append(f"EVs: {evs}")
+
+    # Nature
+    nature = build_data.get("nature")
+    if nature:
+        lines.append(f"Nature: {nature}")
+
+    # Moves
+    for move in build_data.get("moves", []):
+        lines.append(f"- {move}")
+
+    return "\n".join(lines)
+
+
+class TeamGenerator:
+    """Random team generation over a shared, read-only build catalog."""
+
+    def __init__(self, catalog: BuildCatalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._option_index: OptionIndex | None = None
+        self._scorer: "CoverageScorer | None" = None
+
+    @classmethod
+    def from_db(cls, db_path: Path | str = DB_PATH) -> "TeamGenerator":
+        """Load the catalog from the database's snapshot if it is current, else from SQLite."""
+        return cls(load_catalog(db_path))
+
+    @property
+    def option_index(self) -> OptionIndex:
+        """Integer ids for every build option, used by the constraint engine."""
+        if self._option_index is None:
+            with self._lock:
+                if self._option_index is None:
+                    self._option_index = OptionIndex(self.catalog)
+        return self._option_index
+
+    @property
+    def scorer(self) -> "CoverageScorer":
+        """Type chart and typings for scoring candidate teams."""
+        if self._scorer is None:
+            with self._lock:
+                if self._scorer is None:
+                    from type_coverage import CoverageScorer
+
+                    self._scorer = CoverageScorer(self.catalog)
+        return self._scorer
+
+    @property
+    def tiers(self) -> list[str]:
+        return sorted_tiers(self.catalog.tiers)
+
+    def choices(
+        self,
+        tier: str,
+        num_pokemon: int = 6,
+        include_lower_tiers: bool = True,
+        rng: random.Random | None = None,
+        weighting: str = "uniform",
+        constraints: TeamConstraints | None = None,
+        best_of: int = 1,
+    ) -> list[BuildChoice]:
+        """Pick random builds and options for a team in the given tier.
+
+        If include_lower_tiers is True, allows Pokemon from the selected tier and any lower tiers.
+        All randomness comes from rng, so passing random.Random(seed) makes the team reproducible.
+        weighting is "uniform" or "usage"; "usage" follows the imported usage weights.
+        With constraints the team is built by the constraint engine and raises
+        team_constraints.ConstraintError if no valid team is found.
+        With best_of > 1 that many candidate teams are generated and the one with
+        the best type coverage (see type_coverage.py) is returned.
+        """
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"Unknown weighting {weighting!r}, expected one of {WEIGHTINGS}")
+        weighted = weighting == "usage"
+        rng = rng or random.Random()
+        catalog = self.catalog
+
+        if best_of > 1:
+            candidates = [
+                self.choices(tier, num_pokemon, include_lower_tiers, rng, weighting, constraints)
+                for _ in range(best_of)
+            ]
+            with metrics.timer("coverage_score"):
+                best, _ = self.scorer.best(candidates)
+            return candidates[best]
+
+        if constraints is not None:
+            if not catalog.species_pool(tier, include_lower_tiers):
+                raise ValueError(f"No Pokemon found in tiers {catalog.allowed_tiers(tier, include_lower_tiers)}")
+            result = generate_constrained_team(
+                self.option_index, tier, include_lower_tiers, constraints, rng, num_pokemon, weighted
+            )
+            metrics.count("constraint_pruned", result.pruned)
+            return result.choices
+
+        # Species pools per tier/flag are precomputed when the catalog loads
+        all_pokemon = catalog.species_pool(tier, include_lower_tiers)
+
+        # If strict matching (include_lower_tiers=False), we don't need extra filtering anymore
+        # because the database has been cleaned to only contain the native tier for each Pokemon.
+        # So if we query for tier='OU', we will only get Pokemon whose native tier is OU.
+
+        if len(all_pokemon) < num_pokemon:
+             # Fallback if not enough pokemon
+             if not all_pokemon:
+                 raise ValueError(f"No Pokemon found in tiers {catalog.allowed_tiers(tier, include_lower_tiers)}")
+             chosen_names = list(all_pokemon) # Take all if less than 6
+        else:
+            chosen_names = catalog.sample_species(tier, include_lower_tiers, num_pokemon, rng, weighted)
+
+        choices: list[BuildChoice] = []
+        for name in chosen_names:
+            # For each chosen pokemon, we need to pick a build.
+            # If we are including lower tiers, the pokemon might exist in multiple allowed tiers.
+            # We should probably pick a build from the highest available tier for that pokemon,
+            # or just random across allowed tiers. Random across allowed tiers is simpler and adds variety.
+            available_tiers_for_mon = catalog.species_tiers(name, tier, include_lower_tiers)
+
+            if not available_tiers_for_mon:
+                continue # Should not happen given the species pool
+
+            # Pick a random tier for this specific pokemon
+            chosen_tier = rng.choice(available_tiers_for_mon)
+
+            choice = catalog.random_choice(chosen_tier, name, rng, weighted)
+            if choice is not None:
+                choices.append(choice)
+
+        return choices
+
+    def team_text(self, choices: list[BuildChoice]) -> str:
+        """Render build choices as Showdown team text."""
+        catalog = self.catalog
+        team_sets = [
+            build_showdown_set(catalog.get(choice.build_id).pokemon_name, catalog.resolve(choice))
+            for choice in choices
+        ]
+        return "\n\n".join(team_sets)
+
+    def sets(self, choices: list[BuildChoice]) -> list[dict]:
+        """JSON-ready sets: the species name plus the resolved build options."""
+        catalog = self.catalog
+        return [{"name": catalog.get(choice.build_id).pokemon_name, **catalog.resolve(choice)} for choice in choices]
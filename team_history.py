@@ -0,0 +1,155 @@
+"""Append-only history of generated teams.
+
+Each team is one small row: its members as the binary team code (build ids
+and packed option indices, see ``team_codes.team_bytes``) plus the seed,
+tier, generation flags, time and paste URL. Showdown text and cards are
+rebuilt from the catalog only when a team is shown. Pages are read newest
+first with keyset pagination (``before`` = the last id of the previous
+page), so a page costs the same at any history size.
+
+Retention is bounded by row count and age. Old rows are pruned every
+``PRUNE_EVERY`` inserts, so inserts stay cheap.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+
+# Bits of TeamEntry.flags.
+LOWER_TIERS = 1
+USAGE_WEIGHTED = 2
+CONSTRAINED = 4
+
+PAGE_SIZE = 10
+PRUNE_EVERY = 1000
+
+
+class TeamEntry(NamedTuple):
+    id: int
+    created: float
+    tier: str
+    seed: int | None
+    flags: int
+    best_of: int
+    team: bytes
+    paste_url: str | None
+
+
+def team_flags(include_lower_tiers: bool, weighting: str, constrained: bool) -> int:
+    return (
+        (LOWER_TIERS if include_lower_tiers else 0)
+        | (USAGE_WEIGHTED if weighting == "usage" else 0)
+        | (CONSTRAINED if constrained else 0)
+    )
+
+
+class TeamHistory:
+    """SQLite store of generated teams, safe to share between threads."""
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        max_entries: int = 1_000_000,
+        max_age: float = 90 * 24 * 3600,
+    ):
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS teams (
+                id INTEGER PRIMARY KEY,
+                created REAL NOT NULL,
+                tier TEXT NOT NULL,
+                seed INTEGER,
+                flags INTEGER NOT NULL,
+                best_of INTEGER NOT NULL,
+                team BLOB NOT NULL,
+                paste_url TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_teams_tier_id ON teams (tier, id);
+            CREATE INDEX IF NOT EXISTS idx_teams_created ON teams (created);
+            """
+        )
+
+    def record(
+        self,
+        tier: str,
+        team: bytes,
+        seed: int | None = None,
+        flags: int = 0,
+        best_of: int = 1,
+        paste_url: str | None = None,
+    ) -> int:
+        """Append a team and return its id."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO teams (created, tier, seed, flags, best_of, team, paste_url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), tier, seed, flags, best_of, team, paste_url),
+            )
+            self._inserts += 1
+            if self._inserts % PRUNE_EVERY == 0:
+                self._prune(cursor.lastrowid)
+            return cursor.lastrowid
+
+    def page(
+        self,
+        tier: str | None = None,
+        before: int | None = None,
+        since: float | None = None,
+        limit: int = PAGE_SIZE,
+    ) -> list[TeamEntry]:
+        """Up to ``limit`` teams older than id ``before``, newest first.
+
+        ``tier`` and ``since`` (a Unix time) narrow the results.
+        """
+        conditions, params = [], []
+        if tier is not None:
+            conditions.append("tier = ?")
+            params.append(tier)
+        if before is not None:
+            conditions.append("id < ?")
+            params.append(before)
+        if since is not None:
+            conditions.append("created >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, created, tier, seed, flags, best_of, team, paste_url FROM teams {where} "
+                "ORDER BY id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [TeamEntry(*row) for row in rows]
+
+    def get(self, entry_id: int) -> TeamEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, created, tier, seed, flags, best_of, team, paste_url FROM teams WHERE id = ?",
+                (entry_id,),
+            ).fetchone()
+        return TeamEntry(*row) if row is not None else None
+
+    def prune(self) -> None:
+        """Apply the retention limits now."""
+        with self._lock, self._conn:
+            last = self._conn.execute("SELECT MAX(id) FROM teams").fetchone()[0]
+            if last is not None:
+                self._prune(last)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _prune(self, last_id: int) -> None:
+        # Ids only grow, so the newest max_entries rows are the last max_entries ids.
+        self._conn.execute("DELETE FROM teams WHERE id <= ?", (last_id - self.max_entries,))
+        self._conn.execute("DELETE FROM teams WHERE created < ?", (time.time() - self.max_age,))
@@ -0,0 +1,122 @@
+"""HTML for the team card grid, rendered from structured set data.
+
+Cards are built from ``Card`` tuples (from build choices or parsed Showdown
+sets) rather than from Showdown text, every field is HTML-escaped, and each
+rendered card is memoized in a bounded LRU so repeated sets cost a lookup.
+"""
+
+from collections.abc import Iterable
+from functools import lru_cache
+from html import escape as _html_escape
+from typing import NamedTuple
+
+import metrics
+from build_catalog import BuildCatalog, BuildChoice
+from showdown_format import STATS, ShowdownSet, parse_spread
+from sprite_assets import SpriteIndex
+
+
+CARD_CACHE_SIZE = 4096
+
+# Used when no index is passed: slug rules only, sprites from the Showdown server.
+REMOTE_SPRITES = SpriteIndex((), static_dir=None)
+
+# Templates are plain format strings, bound once at import time.
+_CARD = (
+    "<div class='team-card'>"
+    "<div class='team-card-header'>"
+    "<span class='team-name'>{name}</span>"
+    "<a href='{smogon_url}' target='_blank' class='smogon-link' title='View Smogon Strategy'>Smogon ↗</a>"
+    "</div>"
+    "<div class='team-card-body'>"
+    "<div>"
+    "<div class='team-sprite'><img src='{sprite_url}' alt='{name}'></div>"
+    "{info}"
+    "</div>"
+    "<div class='team-moves-col'><div class='team-moves-title'>Moves</div>{moves}</div>"
+    "<div class='team-evs-col'><div class='team-evs-title'>EVs</div>{evs}</div>"
+    "</div>"
+    "</div>"
+).format
+_INFO_ROW = "<div class='sprite-info-row'><span class='detail-label'>{label}:</span><span>{value}</span></div>".format
+_MOVE = "<span class='move-pill'>{}</span>".format
+_EV_ROW = "<div class='team-evs-row'>{}: {}</div>".format
+
+
+# Names come from a small vocabulary (species, items, moves), so escaping is memoized too.
+escape = lru_cache(maxsize=8192)(_html_escape)
+
+
+class Card(NamedTuple):
+    species: str
+    item: str | None = None
+    ability: str | None = None
+    tera_type: str | None = None
+    nature: str | None = None
+    evs: tuple[int, ...] | None = None  # in showdown_format.STATS order
+    moves: tuple[str, ...] = ()
+
+
+def card_from_set(record: ShowdownSet) -> Card:
+    return Card(record.species, record.item, record.ability, record.tera_type, record.nature, record.evs, record.moves)
+
+
+def cards_from_choices(catalog: BuildCatalog, choices: Iterable[BuildChoice]) -> list[Card]:
+    cards = []
+    for choice in choices:
+        build = catalog.resolve(choice)
+        cards.append(
+            Card(
+                catalog.get(choice.build_id).pokemon_name,
+                build["item"],
+                build["ability"],
+                build["tera_type"],
+                build["nature"],
+                # parse_spread is memoized, and the catalog only has a few hundred spreads.
+                parse_spread(build["evs"], 0) if build["evs"] else None,
+                tuple(build["moves"]),
+            )
+        )
+    return cards
+
+
+@lru_cache(maxsize=1024)
+def _header(species: str, sprites: SpriteIndex) -> dict[str, str]:
+    sprite_url, smogon_url = sprites.urls(species)
+    return {"name": escape(species), "smogon_url": escape(smogon_url), "sprite_url": escape(sprite_url)}
+
+
+@lru_cache(maxsize=1024)
+def _evs_html(evs: tuple[int, ...]) -> str:
+    return "<div class='team-evs-table'>" + "".join(map(_EV_ROW, STATS, evs)) + "</div>"
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def render_card(card: Card, sprites: SpriteIndex = REMOTE_SPRITES) -> str:
+    """Escaped HTML for one card."""
+    info = ""
+    if card.item:
+        info += _INFO_ROW(label="Item", value=escape(card.item))
+    if card.ability:
+        info += _INFO_ROW(label="Ability", value=escape(card.ability))
+    if card.tera_type:
+        info += _INFO_ROW(label="Tera", value=escape(card.tera_type))
+    if card.nature:
+        info += _INFO_ROW(label="Nature", value=escape(card.nature))
+    moves = "".join([_MOVE(escape(move)) for move in card.moves])
+    return _CARD(
+        info=f"<div class='sprite-info'>{info}</div>" if info else "",
+        moves=f"<div class='team-moves'>{moves}</div>" if moves else "",
+        evs=_evs_html(card.evs) if card.evs else "",
+        **_header(card.species, sprites),
+    )
+
+
+def render_grid(cards: Iterable[Card], sprites: SpriteIndex = REMOTE_SPRITES) -> str:
+    """HTML for the whole grid; counts card cache hits and misses in metrics."""
+    before = render_card.cache_info()
+    html = '<div class="team-grid-container">' + "".join([render_card(card, sprites) for card in cards]) + "</div>"
+    after = render_card.cache_info()
+    metrics.count("render_cards", after.hits - before.hits, result="hit")
+    metrics.count("render_cards", after.misses - before.misses, result="miss")
+    return html
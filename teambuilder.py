@@ -0,0 +1,263 @@
+"""Headless command line entry point for the team builder.
+
+    python -m teambuilder generate --tier OU --count 100000 --seed 1 --workers 8
+    python -m teambuilder generate --tier UU --count 10 --format showdown -o teams.txt
+    python -m teambuilder generate --tier OU --count 100 --clauses --role hazard_setter --role pivot
+    python -m teambuilder generate --tier OU --count 100 --best-of 1000
+    python -m teambuilder serve --port 8080 --max-concurrent 8
+"""
+
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TextIO
+
+from db_migrations import DB_PATH
+from team_constraints import ROLES, ConstraintError, TeamConstraints
+from team_generator import TeamGenerator
+
+
+# Showdown format ids for the tiers whose id is not simply "gen9" + tier.
+SHOWDOWN_FORMATS = {"AG": "gen9anythinggoes", "Uber": "gen9ubers"}
+
+CHUNK_SIZE = 500
+
+
+def _showdown_format(tier: str) -> str:
+    return SHOWDOWN_FORMATS.get(tier, f"gen9{tier.lower()}")
+
+
+@functools.cache
+def _worker_generator() -> TeamGenerator:
+    return TeamGenerator.from_db()
+
+
+def _generate_chunk(job: tuple) -> list[str]:
+    """Generate teams ``start..stop`` and return them already serialized.
+
+    Runs inside a worker process; each worker loads its own catalog on first use.
+    """
+    from pokepaste_uploader import showdown_to_pokepaste
+    from team_codes import encode_team
+
+    start, stop, tier, include_lower_tiers, seed, output_format, upload, weighting, constraints, best_of = job
+    generator = _worker_generator()
+    catalog = generator.catalog
+    lines = []
+    for index in range(start, stop):
+        rng = random.Random(f"{seed}-{index}")
+        choices = generator.choices(
+            tier,
+            include_lower_tiers=include_lower_tiers,
+            rng=rng,
+            weighting=weighting,
+            constraints=constraints,
+            best_of=best_of,
+        )
+        team_text = generator.team_text(choices)
+        paste_url = None
+        if upload:
+            paste_url = showdown_to_pokepaste(team_text, title=f"Random {tier} Team {index + 1}", author="PokemonTeamBuilder")
+
+        if output_format == "jsonl":
+            record = {
+                "index": index,
+                "tier": tier,
+                "code": encode_team(catalog, choices),
+                "sets": generator.sets(choices),
+            }
+            if paste_url:
+                record["paste_url"] = paste_url
+            lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+        else:
+            header = f"=== [{_showdown_format(tier)}] Random {tier} Team {index + 1} ==="
+            lines.append(f"{header}\n\n{team_text}\n\n")
+    return lines
+
+
+def generate(
+    out: TextIO,
+    tier: str,
+    count: int,
+    *,
+    include_lower_tiers: bool = True,
+    seed: int | None = None,
+    workers: int = 1,
+    output_format: str = "jsonl",
+    upload: bool = False,
+    weighting: str = "uniform",
+    constraints: TeamConstraints | None = None,
+    best_of: int = 1,
+) -> float:
+    """Generate ``count`` teams and stream them to ``out`` in index order.
+
+    Team ``i`` is always generated from ``random.Random(f"{seed}-{i}")``, so
+    the output does not depend on the number of workers. Returns the elapsed
+    time in seconds. With ``constraints`` every team is built by the
+    constraint engine (see team_constraints.py); with ``best_of`` > 1 each
+    team is the best type coverage out of that many candidates.
+    """
+    jobs = [
+        (
+            start,
+            min(start + CHUNK_SIZE, count),
+            tier,
+            include_lower_tiers,
+            seed,
+            output_format,
+            upload,
+            weighting,
+            constraints,
+            best_of,
+        )
+        for start in range(0, count, CHUNK_SIZE)
+    ]
+
+    # No more processes than chunks; a single chunk is cheaper without a pool.
+    workers = min(workers, len(jobs))
+    started = time.perf_counter()
+    if workers <= 1:
+        for job in jobs:
+            out.writelines(_generate_chunk(job))
+    else:
+        # spawn, not fork, so no worker inherits an open SQLite handle.
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            for lines in executor.map(_generate_chunk, jobs):
+                out.writelines(lines)
+        except BaseException:
+            # Drop the chunks not yet started, e.g. when the reader of a pipe
+            # goes away; only the ones already running are finished.
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    out.flush()
+    return time.perf_counter() - started
+
+
+def _constraints_from_args(args: argparse.Namespace) -> TeamConstraints | None:
+    """Constraints for the rule flags, or None if no rule was asked for."""
+    if not (
+        args.clauses or args.role or args.ban_item or args.ban_move or args.max_tera_duplicates is not None
+    ):
+        return None
+    return TeamConstraints(
+        item_clause=args.clauses,
+        species_clause=args.clauses,
+        unique_moves=args.clauses,
+        required_roles=frozenset(args.role),
+        banned_items=frozenset(args.ban_item),
+        banned_moves=frozenset(args.ban_move),
+        max_tera_duplicates=args.max_tera_duplicates,
+    )
+
+
+def _generate_command(args: argparse.Namespace) -> None:
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    out = open(args.output, "w", encoding="utf-8") if args.output != "-" else sys.stdout
+    try:
+        elapsed = generate(
+            out,
+            args.tier,
+            args.count,
+            include_lower_tiers=args.include_lower_tiers,
+            seed=seed,
+            workers=args.workers,
+            output_format=args.format,
+            upload=args.upload,
+            weighting=args.weighting,
+            constraints=_constraints_from_args(args),
+            best_of=args.best_of,
+        )
+    except ConstraintError as exc:
+        raise SystemExit(f"error: {exc}") from None
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head). Point stdout at devnull
+        # so the interpreter's final flush does not raise again, and stop quietly.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        raise SystemExit(1) from None
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    rate = args.count / elapsed if elapsed else float("inf")
+    print(f"Generated {args.count} {args.tier} teams in {elapsed:.2f}s ({rate:,.0f} teams/sec, seed {seed}).", file=sys.stderr)
+
+
+def _serve_command(args: argparse.Namespace) -> None:
+    from api_server import make_server
+
+    server = make_server(TeamGenerator.from_db(args.db), args.host, args.port, args.max_concurrent)
+    print(f"Serving the team API on http://{args.host}:{server.server_port}/ (Ctrl+C to stop).", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m teambuilder", description="Pokemon team builder tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="generate random teams in bulk")
+    gen.add_argument("--tier", default="OU")
+    gen.add_argument("--count", type=int, default=1)
+    gen.add_argument("--seed", type=int, help="base seed; printed when omitted so runs can be reproduced")
+    gen.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    gen.add_argument("--weighting", choices=["uniform", "usage"], default="uniform")
+    gen.add_argument(
+        "--best-of",
+        type=int,
+        default=1,
+        metavar="N",
+        help="generate N candidates per team and keep the best type coverage (default: 1)",
+    )
+    gen.add_argument("--format", choices=["jsonl", "showdown"], default="jsonl")
+    gen.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    gen.add_argument(
+        "--include-lower-tiers",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="allow Pokemon from lower tiers (default: on)",
+    )
+    gen.add_argument(
+        "--upload",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="upload every team to Pokepaste (default: off)",
+    )
+    rules = gen.add_argument_group("team rules", "any of these switches generation to the constraint engine")
+    rules.add_argument(
+        "--clauses",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="item clause, species clause and no repeated moves within a set (default: off)",
+    )
+    rules.add_argument("--role", action="append", default=[], choices=ROLES, help="required team role, repeatable")
+    rules.add_argument("--ban-item", action="append", default=[], metavar="ITEM")
+    rules.add_argument("--ban-move", action="append", default=[], metavar="MOVE")
+    rules.add_argument("--max-tera-duplicates", type=int, metavar="N", help="most Pokemon that may share a tera type")
+    gen.set_defaults(func=_generate_command)
+
+    serve = subparsers.add_parser("serve", help="serve the JSON team API (GET /tiers, POST /teams)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--max-concurrent", type=int, default=8, help="requests generating at the same time (default: 8)")
+    serve.add_argument("--db", default=DB_PATH, help="build database (default: pokemon_strategies.db)")
+    serve.set_defaults(func=_serve_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+import api_server
+import pokepaste_uploader
+from benchmarks.stub_pokepaste import StubPokepasteServer
+from db_migrations import DB_PATH
+from team_generator import TeamGenerator
+
+
+@pytest.fixture(scope="module")
+def generator():
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    return TeamGenerator.from_db()
+
+
+@pytest.fixture
+def server(generator):
+    server = api_server.make_server(generator, port=0, max_concurrent=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server, body: dict) -> tuple[int, dict]:
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    try:
+        conn.request("POST", "/teams", json.dumps(body))
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_count_times_best_of_is_capped(server):
+    status, body = _post(server, {"count": api_server.MAX_COUNT, "best_of": api_server.MAX_BEST_OF})
+    assert status == 400
+    assert "count * best_of" in body["error"]
+
+
+def test_unexpected_error_is_a_json_500(server, monkeypatch, capsys):
+    monkeypatch.setattr(api_server, "start_teams", lambda generator, body: 1 / 0)
+    assert _post(server, {"count": 1}) == (500, {"error": "internal server error"})
+    assert "ZeroDivisionError" in capsys.readouterr().err
+    # The slot was given back.
+    monkeypatch.undo()
+    assert _post(server, {"count": 1, "seed": 1})[0] == 200
+
+
+def test_slot_is_released_before_waiting_for_uploads(server, monkeypatch):
+    waiting = threading.Event()
+    finish_uploads = api_server.finish_uploads
+
+    def finish(result, futures):
+        waiting.set()
+        return finish_uploads(result, futures)
+
+    monkeypatch.setattr(api_server, "finish_uploads", finish)
+    with StubPokepasteServer(latency=3.0) as stub:
+        monkeypatch.setattr(pokepaste_uploader, "PASTE_URL", stub.base_url)
+        results = []
+        uploading = threading.Thread(target=lambda: results.append(_post(server, {"count": 1, "upload": True})))
+        uploading.start()
+        assert waiting.wait(10)
+        # The only slot is free while the first request waits on Pokepaste.
+        started = time.perf_counter()
+        assert _post(server, {"count": 1})[0] == 200
+        assert time.perf_counter() - started < api_server.QUEUE_TIMEOUT
+        uploading.join()
+    status, body = results[0]
+    assert status == 200
+    assert body["teams"][0]["paste_url"].startswith(stub.base_url)
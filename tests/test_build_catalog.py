@@ -0,0 +1,108 @@
+import random
+import sqlite3
+
+import pytest
+
+from build_catalog import EXCLUDED_TIERS, TIER_ORDER, BuildCatalog, BuildChoice, builds_fingerprint, read_build_data
+from db_migrations import DB_PATH
+
+
+@pytest.fixture(scope="module")
+def conn():
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    conn = sqlite3.connect(DB_PATH)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def catalog(conn):
+    return BuildCatalog.from_connection(conn)
+
+
+def _sql_pool(conn, tiers):
+    rows = conn.execute(
+        f"SELECT DISTINCT pokemon_name FROM pokemon_builds WHERE tier IN ({', '.join('?' * len(tiers))})", tiers
+    )
+    return tuple(sorted(name for name, in rows))
+
+
+def test_allowed_tiers():
+    assert BuildCatalog.allowed_tiers("UU") == ["UU", "RU", "NU", "PU", "ZU"]
+    assert BuildCatalog.allowed_tiers("UU", include_lower_tiers=False) == ["UU"]
+    # Tiers outside TIER_ORDER never pull in others.
+    assert BuildCatalog.allowed_tiers("LC") == ["LC"]
+    assert not set(EXCLUDED_TIERS) & set(BuildCatalog.allowed_tiers(TIER_ORDER[0]))
+
+
+@pytest.mark.parametrize("include_lower_tiers", [True, False])
+def test_species_pool_matches_the_database(conn, catalog, include_lower_tiers):
+    for (tier,) in conn.execute("SELECT DISTINCT tier FROM pokemon_builds"):
+        if include_lower_tiers and tier in TIER_ORDER:
+            tiers = [t for t in TIER_ORDER[TIER_ORDER.index(tier) :] if t not in EXCLUDED_TIERS]
+        else:
+            tiers = [tier]
+        assert catalog.species_pool(tier, include_lower_tiers) == _sql_pool(conn, tiers), tier
+
+
+def test_lower_tiers_widen_the_pool_but_never_add_excluded_tiers(conn, catalog):
+    ou = set(catalog.species_pool("OU"))
+    assert set(catalog.species_pool("OU", False)) < ou
+    assert set(_sql_pool(conn, ["UU"])) <= ou
+    only_excluded = set(_sql_pool(conn, EXCLUDED_TIERS)) - set(_sql_pool(conn, TIER_ORDER))
+    assert only_excluded and not only_excluded & ou
+    assert catalog.species_pool("Unknown") == ()
+
+
+def test_species_tiers(catalog):
+    for name in catalog.species_pool("OU"):
+        tiers = catalog.species_tiers(name, "OU")
+        assert tiers and all(catalog.build_ids(tier, name) for tier in tiers)
+        assert tiers == [tier for tier in BuildCatalog.allowed_tiers("OU") if tier in tiers]
+
+
+def test_random_choice_is_valid_and_resolves(catalog):
+    rng = random.Random(1)
+    for tier in catalog.tiers:
+        for name in catalog.species_pool(tier, False):
+            choice = catalog.random_choice(tier, name, rng)
+            assert choice.build_id in catalog.build_ids(tier, name)
+            assert catalog.is_valid(choice)
+            build = catalog.get(choice.build_id)
+            resolved = catalog.resolve(choice)
+            assert resolved["item"] == (build.items[choice.item] if build.items else None)
+            assert resolved["evs"] == build.evs
+            assert resolved["moves"] == [slot[index] for slot, index in zip(build.moves, choice.moves)]
+            assert all(move in slot for move, slot in zip(resolved["moves"], build.moves))
+
+
+def test_random_choice_is_reproducible(catalog):
+    name = catalog.species_pool("OU", False)[0]
+    assert catalog.random_choice("OU", name, random.Random(5)) is not None
+    assert catalog.random_choice("OU", name, random.Random(5)) == catalog.random_choice("OU", name, random.Random(5))
+    assert catalog.random_choice("OU", "Missingno") is None
+    assert catalog.random_build("OU", "Missingno") == {}
+
+
+def test_is_valid_rejects_out_of_range_indices(catalog):
+    choice = catalog.random_choice("OU", catalog.species_pool("OU", False)[0], random.Random(1))
+    build = catalog.get(choice.build_id)
+    assert not catalog.is_valid(choice._replace(build_id=-1))
+    assert not catalog.is_valid(choice._replace(build_id=max(catalog.all_build_ids()) + 1))
+    assert not catalog.is_valid(choice._replace(item=max(len(build.items), 1)))
+    assert not catalog.is_valid(choice._replace(ability=-1))
+    assert not catalog.is_valid(choice._replace(moves=choice.moves[:-1]))
+    assert not catalog.is_valid(choice._replace(moves=(*choice.moves[:-1], len(build.moves[-1]))))
+    assert not catalog.is_valid(BuildChoice(choice.build_id, 0, 0, 0, 0, ()))
+
+
+def test_fingerprint_is_stable_and_content_sensitive(conn, catalog):
+    builds, _ = read_build_data(conn)
+    assert BuildCatalog.from_connection(conn).fingerprint == catalog.fingerprint == builds_fingerprint(builds)
+    assert 0 <= catalog.fingerprint < 2**32
+
+    build_id = catalog.all_build_ids()[0]
+    edited = list(builds)
+    edited[build_id] = edited[build_id]._replace(items=(*edited[build_id].items, "Lucky Punch"))
+    assert builds_fingerprint(edited) != catalog.fingerprint
@@ -0,0 +1,113 @@
+import random
+import sqlite3
+
+import pytest
+
+from build_catalog import BuildCatalog, read_build_data
+from catalog_snapshot import MappedBuilds, SnapshotError, load_catalog, load_snapshot, write_snapshot
+from db_migrations import DB_PATH
+
+
+@pytest.fixture(scope="module")
+def build_data():
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return read_build_data(conn)
+    finally:
+        conn.close()
+
+
+def _usage_weights(builds) -> dict:
+    """Random weights for species, builds, items and some moves."""
+    rng = random.Random(1)
+    weights = {}
+    for build_id, build in enumerate(builds):
+        if build is None:
+            continue
+        key = (build.tier, build.pokemon_name)
+        weights[(*key, "species", build.pokemon_name)] = rng.random()
+        weights[(*key, "build", str(build_id))] = rng.random()
+        for item in build.items:
+            weights[(*key, "item", item)] = rng.random()
+        for slot in build.moves:
+            weights[(*key, "move", slot[0])] = rng.random()
+    return weights
+
+
+def _draws(catalog: BuildCatalog, weighted: bool) -> list:
+    rng = random.Random(5)
+    draws = []
+    for tier in catalog.tiers:
+        for _ in range(20):
+            names = catalog.sample_species(tier, True, 6, rng, weighted)
+            draws += [(name, catalog.random_choice(tier, name, rng, weighted)) for name in names]
+    return draws
+
+
+@pytest.mark.parametrize("weighted", [False, True], ids=["plain", "usage_weights"])
+def test_snapshot_matches_sqlite(build_data, tmp_path, weighted):
+    builds, usage_weights = build_data
+    if weighted:
+        usage_weights = _usage_weights(builds)
+    write_snapshot(builds, usage_weights, tmp_path / "catalog.snapshot", tmp_path / "missing.db")
+    expected = BuildCatalog(builds, usage_weights)
+    catalog = load_snapshot(tmp_path / "catalog.snapshot", None)
+
+    assert catalog.fingerprint == expected.fingerprint
+    assert catalog.has_usage_weights == expected.has_usage_weights
+    assert catalog.all_build_ids() == expected.all_build_ids()
+    assert [catalog.get(build_id) for build_id in range(len(builds))] == builds
+    for build_weighted in (False, True):
+        assert _draws(catalog, build_weighted) == _draws(expected, build_weighted)
+
+
+def test_builds_are_decoded_on_first_use(build_data, tmp_path):
+    builds, usage_weights = build_data
+    write_snapshot(builds, usage_weights, tmp_path / "catalog.snapshot", tmp_path / "missing.db")
+    catalog = load_snapshot(tmp_path / "catalog.snapshot", None)
+    mapped = catalog._builds
+    assert isinstance(mapped, MappedBuilds)
+    assert mapped._decoded.count(None) == len(builds)
+
+    build_id = catalog.all_build_ids()[0]
+    assert catalog.get(build_id) is catalog.get(build_id)
+    assert len(mapped._decoded) - mapped._decoded.count(None) == 1
+
+
+@pytest.mark.parametrize(
+    "damage",
+    [
+        lambda raw: raw[:10],
+        lambda raw: raw[:100],
+        lambda raw: raw[:-50] + bytes([raw[-50] ^ 1]) + raw[-49:],
+        lambda raw: raw[:8] + bytes([raw[8] + 1]) + raw[9:],
+        lambda raw: b"",
+    ],
+    ids=["short", "truncated", "corrupt", "version", "empty"],
+)
+def test_damaged_snapshot_falls_back_to_sqlite(build_data, tmp_path, damage):
+    builds, usage_weights = build_data
+    path = tmp_path / "catalog.snapshot"
+    write_snapshot(builds, usage_weights, path, DB_PATH)
+    path.write_bytes(damage(path.read_bytes()))
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, None)
+    catalog = load_catalog(DB_PATH, path)
+    assert not isinstance(catalog._builds, MappedBuilds)
+    assert catalog.fingerprint == BuildCatalog(builds, usage_weights).fingerprint
+
+
+def test_stale_snapshot_is_rejected(build_data, tmp_path):
+    builds, usage_weights = build_data
+    db = tmp_path / "builds.db"
+    db.write_bytes(DB_PATH.read_bytes())
+    path = tmp_path / "builds.snapshot"
+    write_snapshot(builds, usage_weights, path, db)
+    assert isinstance(load_catalog(db)._builds, MappedBuilds)
+
+    with open(db, "ab") as f:
+        f.write(b"\0" * 4096)
+    with pytest.raises(SnapshotError, match="stale"):
+        load_snapshot(path, db)
@@ -0,0 +1,98 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from build_catalog import _builds_from_tables, read_build_data
+from db_migrations import BASE_SCHEMA, DB_PATH, HOT_QUERIES, MAX_POSITIONS, explain, migrate, normalize
+from showdown_format import parse_spread
+
+
+def _fresh_db(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    conn.executescript(BASE_SCHEMA)
+    return conn
+
+
+def _shipped_db(tmp_path):
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    # A copy, so migrating cannot touch the shipped file.
+    shutil.copy2(DB_PATH, tmp_path / DB_PATH.name)
+    return sqlite3.connect(tmp_path / DB_PATH.name)
+
+
+@pytest.fixture(params=[_fresh_db, _shipped_db], ids=["fresh", "shipped"])
+def migrated(request, tmp_path):
+    conn = request.param(tmp_path)
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("query, params", HOT_QUERIES, ids=[query for query, _ in HOT_QUERIES])
+def test_hot_query_uses_an_index(migrated, query, params):
+    plan = explain(migrated, query, params)
+    assert not any(detail.startswith("SCAN") for detail in plan), plan
+    assert any("USING COVERING INDEX" in detail or "USING INDEX" in detail for detail in plan), plan
+
+
+def test_migrate_is_idempotent(migrated):
+    assert migrate(migrated) == []
+
+
+def _spread(evs):
+    return parse_spread(evs, None) if evs else None
+
+
+def _comparable(builds):
+    # Normalizing stores EVs per stat, so spreads come back in stat order.
+    return [build and build._replace(evs=_spread(build.evs)) for build in builds]
+
+
+def test_normalized_views_match_the_original_catalog(tmp_path):
+    source = _shipped_db(tmp_path)
+    original, usage_weights = read_build_data(source)
+    normalize(source, tmp_path / "normalized.db")
+    source.close()
+
+    conn = sqlite3.connect(tmp_path / "normalized.db")
+    try:
+        assert _comparable(_builds_from_tables(conn)) == _comparable(original)
+        assert _comparable(read_build_data(conn)[0]) == _comparable(original)
+        assert read_build_data(conn)[1] == usage_weights
+        for view in ("build_moves", "build_items", "build_abilities", "build_natures", "build_tera_types", "build_evs"):
+            assert conn.execute(f"SELECT COUNT(*) = COUNT(DISTINCT id) FROM {view}").fetchone() == (1,), view
+    finally:
+        conn.close()
+
+
+def test_normalize_keeps_explicit_zero_evs(tmp_path):
+    conn = _fresh_db(tmp_path)
+    conn.execute("INSERT INTO pokemon_builds (id, pokemon_name, tier) VALUES (1, 'Skarmory', 'OU')")
+    conn.executemany(
+        "INSERT INTO build_evs (build_id, ev_string) VALUES (1, ?)", [("252 HP",), ("0 Atk",), ("4 Def",)]
+    )
+    normalize(conn, tmp_path / "normalized.db")
+    conn.close()
+
+    conn = sqlite3.connect(tmp_path / "normalized.db")
+    try:
+        rows = conn.execute("SELECT ev_string FROM build_evs WHERE build_id = 1 ORDER BY id").fetchall()
+        assert rows == [("252 HP",), ("0 Atk",), ("4 Def",)]
+        assert read_build_data(conn)[0][1].evs == "252 HP / 0 Atk / 4 Def"
+    finally:
+        conn.close()
+
+
+def test_normalize_rejects_lists_the_views_cannot_number(tmp_path):
+    conn = _fresh_db(tmp_path)
+    conn.execute("INSERT INTO pokemon_builds (id, pokemon_name, tier) VALUES (1, 'Mew', 'OU')")
+    conn.executemany(
+        "INSERT INTO build_items (build_id, item_name) VALUES (1, ?)",
+        [(f"Item {i}",) for i in range(MAX_POSITIONS + 1)],
+    )
+    with pytest.raises(ValueError, match="item options"):
+        normalize(conn, tmp_path / "normalized.db")
+    assert not (tmp_path / "normalized.db").exists()
+    conn.close()
@@ -0,0 +1,21 @@
+import importlib.util
+import statistics
+
+import pytest
+
+from benchmarks.run_benchmarks import IMPORT_PRELOAD, import_time_us
+
+# Cumulative import time budgets in microseconds, as reported by ``python -X importtime``.
+IMPORT_BUDGETS_US = {"ui_app": 100_000, "team_generator": 50_000, "api_server": 150_000}
+RUNS = 3
+
+
+@pytest.mark.parametrize("module, budget", IMPORT_BUDGETS_US.items(), ids=list(IMPORT_BUDGETS_US))
+def test_import_time_within_budget(module, budget):
+    preload = IMPORT_PRELOAD.get(module, ())
+    for name in preload:
+        if importlib.util.find_spec(name) is None:
+            pytest.skip(f"{name} is not installed")
+    # Median of a few fresh interpreters, so one slow start does not fail the suite.
+    elapsed = statistics.median(import_time_us(module, preload) for _ in range(RUNS))
+    assert elapsed <= budget, f"importing {module} took {elapsed}us, budget {budget}us"
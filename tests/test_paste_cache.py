@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+
+import paste_cache
+from paste_cache import PasteCache, cache_key
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(paste_cache.time, "time", clock)
+    return clock
+
+
+def _keys(path) -> set[str]:
+    conn = sqlite3.connect(path)
+    try:
+        return {key for (key,) in conn.execute("SELECT key FROM pastes")}
+    finally:
+        conn.close()
+
+
+def test_cache_key_separates_fields():
+    assert cache_key("team", "title", "public") != cache_key("team", "title", "unlisted")
+    assert cache_key("ab", "c", "public") != cache_key("a", "bc", "public")
+
+
+def test_counters(tmp_path, clock):
+    cache = PasteCache(tmp_path / "cache.db", memory_size=1)
+    assert cache.get("a") is None
+    cache.put("a", "url-a")
+    cache.put("b", "url-b")  # evicts "a" from memory
+    assert cache.get("b") == "url-b"
+    assert cache.get("a") == "url-a"
+    assert cache.stats() == {"hits": 2, "disk_hits": 1, "misses": 1, "memory_entries": 1}
+    cache.close()
+
+
+def test_entries_survive_a_restart(tmp_path, clock):
+    cache = PasteCache(tmp_path / "cache.db")
+    cache.put("a", "url-a")
+    cache.close()
+    reopened = PasteCache(tmp_path / "cache.db")
+    assert reopened.get("a") == "url-a"
+    assert reopened.disk_hits == 1
+    reopened.close()
+
+
+@pytest.mark.parametrize("restart", [False, True], ids=["memory", "disk"])
+def test_expired_entries_are_not_returned(tmp_path, clock, restart):
+    cache = PasteCache(tmp_path / "cache.db", ttl=60)
+    cache.put("a", "url-a")
+    clock.now += 59
+    assert cache.get("a") == "url-a"
+    if restart:
+        cache.close()
+        cache = PasteCache(tmp_path / "cache.db", ttl=60)
+    clock.now += 2
+    assert cache.get("a") is None
+    cache.prune()
+    assert _keys(tmp_path / "cache.db") == set()
+    cache.close()
+
+
+def test_prune_keeps_the_most_recently_used(tmp_path, clock):
+    cache = PasteCache(tmp_path / "cache.db", memory_size=2, max_entries=3)
+    for key in "abcde":
+        clock.now += 1
+        cache.put(key, f"url-{key}")
+    clock.now += 1
+    assert cache.get("a") == "url-a"  # from disk
+    cache.prune()
+    assert _keys(tmp_path / "cache.db") == {"a", "d", "e"}
+    cache.close()
+
+
+def test_memory_hits_protect_hot_entries(tmp_path, clock):
+    cache = PasteCache(tmp_path / "cache.db", max_entries=2)
+    for key in "abc":
+        clock.now += 1
+        cache.put(key, f"url-{key}")
+    # "a" is the oldest on disk but hot in memory.
+    clock.now += 1
+    assert cache.get("a") == "url-a"
+    assert cache.disk_hits == 0
+    cache.prune()
+    assert _keys(tmp_path / "cache.db") == {"a", "c"}
+    cache.close()
+
+
+def test_store_is_pruned_every_prune_every_inserts(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(paste_cache, "PRUNE_EVERY", 5)
+    cache = PasteCache(tmp_path / "cache.db", max_entries=2)
+    for number in range(4):
+        clock.now += 1
+        cache.put(str(number), "url")
+    assert len(_keys(tmp_path / "cache.db")) == 4
+    clock.now += 1
+    cache.put("4", "url")
+    assert _keys(tmp_path / "cache.db") == {"3", "4"}
+    cache.close()
@@ -0,0 +1,65 @@
+import socket
+import time
+
+import pytest
+import requests
+
+from benchmarks.stub_pokepaste import StubPokepasteServer
+from paste_cache import PasteCache
+from pokepaste_uploader import showdown_to_pokepaste
+
+TEAM = "Great Tusk @ Booster Energy\nAbility: Protosynthesis\n- Headlong Rush\n"
+
+
+@pytest.fixture
+def stub():
+    with StubPokepasteServer() as server:
+        yield server
+
+
+def test_upload_returns_location(stub):
+    url = showdown_to_pokepaste(TEAM, base_url=stub.base_url)
+    assert url == f"{stub.base_url}/{1:016x}"
+    assert stub.requests == 1
+
+
+def test_retries_on_503(stub):
+    stub.fail_first = 2
+    url = showdown_to_pokepaste(TEAM, base_url=stub.base_url, retries=2, backoff=0)
+    assert url.startswith(stub.base_url)
+    assert stub.requests == 3
+
+
+def test_gives_up_after_last_retry(stub):
+    stub.error_rate = 1.0
+    with pytest.raises(RuntimeError, match="status 503"):
+        showdown_to_pokepaste(TEAM, base_url=stub.base_url, retries=2, backoff=0)
+    assert stub.requests == 3
+
+
+def test_read_timeout_is_not_retried(stub):
+    # The server may already have created the paste, so a retry could duplicate it.
+    stub.latency = 0.5
+    with pytest.raises(requests.ReadTimeout):
+        showdown_to_pokepaste(TEAM, base_url=stub.base_url, timeout=0.1, retries=2, backoff=0)
+    # The stub counts a request once its latency has passed.
+    time.sleep(1)
+    assert stub.requests == 1
+
+
+def test_connect_error_is_retried():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # Nothing listens on the port any more.
+    with pytest.raises(requests.ConnectionError):
+        showdown_to_pokepaste(TEAM, base_url=f"http://127.0.0.1:{port}", retries=1, backoff=0)
+
+
+def test_cache_hit_skips_upload(stub, tmp_path):
+    cache = PasteCache(tmp_path / "paste_cache.db")
+    first = showdown_to_pokepaste(TEAM, base_url=stub.base_url, cache=cache)
+    second = showdown_to_pokepaste(TEAM, base_url=stub.base_url, cache=cache)
+    assert first == second
+    assert stub.requests == 1
+    cache.close()
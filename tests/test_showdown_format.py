@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from build_catalog import BuildCatalog, BuildChoice
+from db_migrations import DB_PATH
+from showdown_format import (
+    ShowdownSet,
+    format_set,
+    iter_sets,
+    iter_teams,
+    pack_name,
+    pack_team,
+    parse_set,
+    parse_spread,
+    unpack_team,
+)
+from team_generator import TeamGenerator, build_showdown_set
+
+SETS = [
+    ShowdownSet("Great Tusk", item="Booster Energy", ability="Protosynthesis", tera_type="Ground",
+                evs=(0, 252, 4, 0, 0, 252), nature="Jolly",
+                moves=("Headlong Rush", "Ice Spinner", "Rapid Spin", "Knock Off")),
+    # Blank EVs, no item and no tera type.
+    ShowdownSet("Ditto", ability="Imposter", moves=("Transform",)),
+    ShowdownSet("Rotom-Wash", nickname="Fridge", gender="F", item="Leftovers", ability="Levitate", level=50,
+                shiny=True, tera_type="Steel", evs=(252, 0, 172, 0, 84, 0), ivs=(31, 0, 31, 31, 31, 31),
+                nature="Bold", moves=("Hydro Pump", "Volt Switch", "Will-O-Wisp", "Pain Split")),
+    ShowdownSet("Kommo-o", nickname="Kommo-o (Totem)", item="Throat Spray", ability="Soundproof",
+                moves=("Clangorous Soul",)),
+]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    return BuildCatalog.from_db(DB_PATH)
+
+
+def _catalog_sets(catalog):
+    """One set per build (first option everywhere) plus a few random teams."""
+    choices = [
+        BuildChoice(build_id, 0, 0, 0, 0, tuple(0 for _ in catalog.get(build_id).moves))
+        for build_id in catalog.all_build_ids()
+    ]
+    generator = TeamGenerator(catalog)
+    for seed in range(20):
+        choices += generator.choices("OU", rng=random.Random(seed))
+    for choice in choices:
+        name = catalog.get(choice.build_id).pokemon_name
+        build = catalog.resolve(choice)
+        expected = ShowdownSet(
+            name,
+            item=build["item"],
+            ability=build["ability"],
+            tera_type=build["tera_type"],
+            evs=parse_spread(build["evs"], 0) if build["evs"] else None,
+            nature=build["nature"],
+            moves=tuple(build["moves"]),
+        )
+        yield build_showdown_set(name, build), expected
+
+
+def _names(catalog):
+    """Packed id -> display name for everything a catalog set can contain."""
+    names = {}
+    for build_id in catalog.all_build_ids():
+        build = catalog.get(build_id)
+        for name in (build.pokemon_name, *build.items, *build.abilities, *(move for slot in build.moves for move in slot)):
+            names[pack_name(name)] = name
+    return names
+
+
+@pytest.mark.parametrize("record", SETS, ids=[record.species for record in SETS])
+def test_format_set_round_trip(record):
+    assert parse_set(format_set(record)) == record
+
+
+def test_iter_sets_reads_a_whole_export():
+    text = "\n\n".join(format_set(record) for record in SETS)
+    assert list(iter_sets(text.splitlines())) == SETS
+
+
+def test_iter_teams_splits_on_headers():
+    text = "=== [gen9ou] Folder/First ===\n\n" + format_set(SETS[0]) + "\n\n=== Second ===\n\n" + format_set(SETS[1])
+    teams = list(iter_teams(text.splitlines()))
+    assert [(team.header.format, team.header.folder, team.header.name) for team in teams] == [
+        ("gen9ou", "Folder", "First"),
+        (None, None, "Second"),
+    ]
+    assert [team.sets for team in teams] == [[SETS[0]], [SETS[1]]]
+
+
+@pytest.mark.parametrize("record", SETS, ids=[record.species for record in SETS])
+def test_pack_round_trip(record):
+    names = {pack_name(name): name for name in (record.species, record.item, record.ability, *record.moves) if name}
+    assert unpack_team(pack_team([record]), names) == [record]
+
+
+def test_catalog_builds_round_trip(catalog):
+    names = _names(catalog)
+    for text, expected in _catalog_sets(catalog):
+        parsed = parse_set(text)
+        assert parsed == expected, text
+        assert parse_set(format_set(parsed)) == expected, text
+        assert unpack_team(pack_team([parsed]), names) == [expected], text
+
+
+def test_unpack_rejects_short_sets():
+    with pytest.raises(ValueError):
+        unpack_team("Great Tusk||BoosterEnergy")
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from species_names import base_species
+from sprite_assets import (
+    SLUG_OVERRIDES,
+    SPRITE_URL,
+    STATIC_URL,
+    SpeciesSlugs,
+    SpriteIndex,
+    load_manifest,
+    prefetch,
+    species_slugs,
+)
+
+
+@pytest.mark.parametrize(
+    "name, sprite, dex",
+    [
+        # Tapu: the space disappears from the sprite id but becomes a dash in the dex slug.
+        ("Tapu Koko", "tapukoko", "tapu-koko"),
+        ("Tapu Fini", "tapufini", "tapu-fini"),
+        # Paradox species are two words with no form.
+        ("Great Tusk", "greattusk", "great-tusk"),
+        ("Iron Valiant", "ironvaliant", "iron-valiant"),
+        ("Roaring Moon", "roaringmoon", "roaring-moon"),
+        # Regional forms keep one dash between species and form in the sprite id.
+        ("Ninetales-Alola", "ninetales-alola", "ninetales-alola"),
+        ("Zapdos-Galar", "zapdos-galar", "zapdos-galar"),
+        ("Typhlosion-Hisui", "typhlosion-hisui", "typhlosion-hisui"),
+        ("Tauros-Paldea-Aqua", "tauros-paldeaaqua", "tauros-paldea-aqua"),
+        ("Mr. Mime-Galar", "mrmime-galar", "mr-mime-galar"),
+        ("Farfetch’d-Galar", "farfetchd-galar", "farfetchd-galar"),
+        # Other forms and species with a hyphen in their own name.
+        ("Urshifu-Rapid-Strike", "urshifu-rapidstrike", "urshifu-rapid-strike"),
+        ("Chi-Yu", "chiyu", "chi-yu"),
+        ("Kommo-o", "kommoo", "kommo-o"),
+        ("Flabébé", "flabebe", "flabebe"),
+    ],
+)
+def test_species_slugs(name, sprite, dex):
+    assert species_slugs(name) == SpeciesSlugs(sprite, dex)
+
+
+@pytest.mark.parametrize("name", sorted(SLUG_OVERRIDES))
+def test_overrides_win(name):
+    assert species_slugs(name) == SLUG_OVERRIDES[name]
+
+
+@pytest.mark.parametrize(
+    "name, species",
+    [("Rotom-Wash", "Rotom"), ("Chi-Yu", "Chi-Yu"), ("Porygon-Z", "Porygon-Z"), ("Tapu Koko", "Tapu Koko")],
+)
+def test_base_species(name, species):
+    assert base_species(name) == species
+
+
+class _SpriteServer:
+    """Serves ``sprites`` (sprite id -> bytes) at /<id>.png and 404s anything else."""
+
+    def __init__(self, sprites: dict[str, bytes]):
+        self.requests: list[str] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                data = sprites.get(self.path.strip("/").removesuffix(".png"))
+                self.send_response(200 if data else 404)
+                self.send_header("Content-Length", str(len(data or b"")))
+                self.end_headers()
+                self.wfile.write(data or b"")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/{{slug}}.png"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def sprite_server():
+    server = _SpriteServer({"greattusk": b"tusk", "kingambit": b"gambit", "ironvaliant": b"tusk"})
+    yield server
+    server.close()
+
+
+def test_prefetch_stores_sprites_by_content_hash(sprite_server, tmp_path):
+    static_dir = tmp_path / "static" / "sprites"
+    names = ["Great Tusk", "Kingambit", "Iron Valiant", "Missingno"]
+
+    assert prefetch(names, static_dir, sprite_server.url, workers=2) == (3, 0, ["missingno"])
+
+    manifest = load_manifest(static_dir)
+    assert manifest == {
+        "greattusk": hashlib.sha256(b"tusk").hexdigest()[:16] + ".png",
+        "ironvaliant": hashlib.sha256(b"tusk").hexdigest()[:16] + ".png",
+        "kingambit": hashlib.sha256(b"gambit").hexdigest()[:16] + ".png",
+    }
+    # Identical sprites share one file.
+    assert sorted(path.name for path in static_dir.glob("*.png")) == sorted(set(manifest.values()))
+    assert (static_dir / manifest["kingambit"]).read_bytes() == b"gambit"
+    assert not list(static_dir.glob("*.tmp"))
+
+    index = SpriteIndex(names, static_dir)
+    assert index.local_sprites == 3
+    assert index.urls("Kingambit")[0] == STATIC_URL.format(file=manifest["kingambit"])
+    assert index.urls("Missingno")[0] == SPRITE_URL.format(slug="missingno")
+
+
+def test_prefetch_rerun_fetches_only_what_is_missing(sprite_server, tmp_path):
+    static_dir = tmp_path / "sprites"
+    names = ["Great Tusk", "Kingambit", "Missingno"]
+    prefetch(names, static_dir, sprite_server.url)
+    sprite_server.requests.clear()
+
+    assert prefetch(names, static_dir, sprite_server.url) == (0, 2, ["missingno"])
+    # Only the sprite that 404ed is asked for again.
+    assert sprite_server.requests == ["/missingno.png"]
+
+    # A stored file that went missing is fetched again.
+    (static_dir / load_manifest(static_dir)["kingambit"]).unlink()
+    sprite_server.requests.clear()
+    assert prefetch(["Kingambit"], static_dir, sprite_server.url) == (1, 0, [])
+    assert sprite_server.requests == ["/kingambit.png"]
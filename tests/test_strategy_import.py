@@ -0,0 +1,108 @@
+import json
+import shutil
+import sqlite3
+
+import pytest
+
+from build_catalog import read_build_data
+from db_migrations import DB_PATH, normalize
+from strategy_import import import_tiers
+
+
+@pytest.fixture
+def db(tmp_path):
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    path = tmp_path / DB_PATH.name
+    shutil.copy2(DB_PATH, path)
+    return path
+
+
+def _builds(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [build for build in read_build_data(conn)[0] if build]
+    finally:
+        conn.close()
+
+
+def _export(db_path, tier_dir, tiers):
+    """Write tier files in the strategy_refresh format from the builds in ``db_path``."""
+    tier_dir.mkdir(exist_ok=True)
+    species = {tier: {} for tier in tiers}
+    for build in _builds(db_path):
+        if build.tier in species:
+            species[build.tier].setdefault(build.pokemon_name, []).append({
+                "items": list(build.items),
+                "abilities": list(build.abilities),
+                "natures": list(build.natures),
+                "evs": build.evs.split(" / ") if build.evs else [],
+                "tera_types": list(build.tera_types),
+                "moves": [list(slot) for slot in build.moves],
+            })
+    assert all(species.values())
+    for tier, builds in species.items():
+        (tier_dir / f"{tier}.json").write_text(json.dumps(builds), encoding="utf-8")
+    return species
+
+
+def _by_tier(builds, tier):
+    return sorted(
+        (build for build in builds if build.tier == tier),
+        key=lambda build: (build.pokemon_name, repr(build)),
+    )
+
+
+def test_reimport_changes_nothing(db, tmp_path):
+    species = _export(db, tmp_path / "tiers", ["OU", "UU"])
+    before = _builds(db)
+
+    summary = import_tiers(tmp_path / "tiers", db)
+
+    total = sum(len(builds) for tier in species.values() for builds in tier.values())
+    assert summary == (["OU", "UU"], 0, 0, total)
+    assert _builds(db) == before
+
+
+def test_import_into_a_new_database_round_trips(db, tmp_path):
+    _export(db, tmp_path / "tiers", ["OU", "LC"])
+    fresh = tmp_path / "fresh.db"
+
+    summary = import_tiers(tmp_path / "tiers", fresh)
+
+    assert summary.removed == summary.unchanged == 0
+    original, imported = _builds(db), _builds(fresh)
+    assert summary.added == len(imported)
+    for tier in ("OU", "LC"):
+        assert _by_tier(imported, tier) == _by_tier(original, tier)
+
+
+def test_one_edited_build_is_replaced(db, tmp_path):
+    species = _export(db, tmp_path / "tiers", ["OU"])
+    name = sorted(species["OU"])[0]
+    species["OU"][name][0]["items"] = ["Lucky Punch"]
+    (tmp_path / "tiers" / "OU.json").write_text(json.dumps(species["OU"]), encoding="utf-8")
+    before = [build for build in _builds(db) if build.tier != "OU"]
+
+    summary = import_tiers(tmp_path / "tiers", db, ["OU"])
+
+    assert (summary.added, summary.removed) == (1, 1)
+    after = _builds(db)
+    assert [build for build in after if build.tier != "OU"] == before
+    assert [build.items for build in after if build.tier == "OU" and build.pokemon_name == name].count(
+        ("Lucky Punch",)
+    ) == 1
+
+
+def test_normalized_database_is_rejected(db, tmp_path):
+    _export(db, tmp_path / "tiers", ["OU"])
+    conn = sqlite3.connect(db)
+    normalize(conn, db)
+    conn.close()
+    normalized = db.read_bytes()
+
+    with pytest.raises(ValueError, match="normalized"):
+        import_tiers(tmp_path / "tiers", db)
+
+    assert db.read_bytes() == normalized
+    assert not db.with_name(db.name + ".import").exists()
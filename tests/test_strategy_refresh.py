@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+import strategy_refresh
+from benchmarks.stub_smogon import StubSmogonServer
+from strategy_refresh import STATE_NAME, refresh
+
+TIERS = ["OU", "UU"]
+
+
+def _moveset(name: str, item: str, moves: list[str]) -> dict:
+    return {
+        "name": name,
+        "items": [item],
+        "abilities": ["Pressure"],
+        "natures": ["Jolly"],
+        "teratypes": ["Steel"],
+        "evconfigs": [{"hp": 0, "atk": 252, "def": 0, "spa": 0, "spd": 4, "spe": 252}],
+        "moveslots": [[{"move": move, "type": None}] for move in moves],
+    }
+
+
+def _species() -> dict[str, dict[str, list[dict]]]:
+    return {
+        "Great Tusk": {"OU": [_moveset("Rapid Spin", "Booster Energy", ["Rapid Spin", "Headlong Rush"])]},
+        "Kingambit": {"OU": [_moveset("Swords Dance", "Leftovers", ["Swords Dance", "Kowtow Cleave"])]},
+        "Tapu Koko": {"UU": [_moveset("Volt Switch", "Choice Specs", ["Volt Switch", "Dazzling Gleam"])]},
+        "Iron Valiant": {"OU": [_moveset("Booster", "Booster Energy", ["Moonblast", "Close Combat"])]},
+        "Ninetales-Alola": {"UU": [_moveset("Veil", "Light Clay", ["Aurora Veil", "Moonblast"])]},
+        "Rotom-Wash": {"UU": [_moveset("Pivot", "Leftovers", ["Volt Switch", "Hydro Pump"])]},
+    }
+
+
+@pytest.fixture
+def stub():
+    with StubSmogonServer(_species()) as server:
+        yield server
+
+
+def _refresh(stub: StubSmogonServer, output_dir, **kwargs):
+    kwargs = {"workers": 1, "rate": 0, "backoff": 0, **kwargs}
+    return refresh(TIERS, output_dir, stub.base_url, **kwargs)
+
+
+def _files(output_dir) -> dict[str, tuple[int, int]]:
+    return {path.name: (path.stat().st_ino, path.stat().st_mtime_ns) for path in output_dir.iterdir()}
+
+
+def test_refresh_writes_tier_files(stub, tmp_path):
+    summary = _refresh(stub, tmp_path)
+    assert (summary.updated, summary.unchanged, summary.empty, summary.failed) == (6, 0, [], [])
+    ou = json.loads((tmp_path / "OU.json").read_text(encoding="utf-8"))
+    assert sorted(ou) == ["Great Tusk", "Iron Valiant", "Kingambit"]
+    assert ou["Great Tusk"][0]["moves"] == [["Rapid Spin"], ["Headlong Rush"]]
+    assert ou["Great Tusk"][0]["evs"] == ["252 Atk", "4 SpD", "252 Spe"]
+
+
+def test_second_run_is_conditional_and_rewrites_nothing(stub, tmp_path):
+    _refresh(stub, tmp_path)
+    state = (tmp_path / STATE_NAME).read_text(encoding="utf-8")
+    files = _files(tmp_path)
+    stub.requests.clear()
+
+    summary = _refresh(stub, tmp_path)
+    # Every species page answered 304, which the stub only does for a matching If-None-Match.
+    assert stub.requests == {200: 1, 304: 6}
+    assert (summary.updated, summary.unchanged) == (0, 6)
+    assert {name: files[name] for name in files if name != STATE_NAME} == {
+        name: stat for name, stat in _files(tmp_path).items() if name != STATE_NAME
+    }
+    assert (tmp_path / STATE_NAME).read_text(encoding="utf-8") == state
+
+
+def test_changed_page_is_fetched_again(stub, tmp_path):
+    _refresh(stub, tmp_path)
+    stub.species["Kingambit"]["OU"][0]["items"] = ["Black Glasses"]
+    stub.requests.clear()
+
+    summary = _refresh(stub, tmp_path)
+    assert (summary.updated, summary.unchanged) == (1, 5)
+    ou = json.loads((tmp_path / "OU.json").read_text(encoding="utf-8"))
+    assert ou["Kingambit"][0]["items"] == ["Black Glasses"]
+
+
+def test_empty_pages_are_retried(tmp_path):
+    with StubSmogonServer(_species(), empty_rate=0.5, seed=3) as stub:
+        summary = _refresh(stub, tmp_path, retries=10)
+    assert summary.empty == []
+    assert summary.updated == 6
+    # Index, one page per species, plus a retry for every empty page.
+    assert stub.requests[200] > 1 + 6
+
+
+def test_pages_that_stay_empty_keep_previous_data(stub, tmp_path):
+    _refresh(stub, tmp_path)
+    before = (tmp_path / "OU.json").read_text(encoding="utf-8")
+    # An empty page has its own ETag, so every conditional request gets a 200 with no strategies.
+    stub.empty_rate = 1.0
+    stub.requests.clear()
+
+    summary = _refresh(stub, tmp_path, retries=2)
+    assert summary.empty == sorted(_species())
+    assert stub.requests == {200: 1 + 6 * 3}
+    assert (tmp_path / "OU.json").read_text(encoding="utf-8") == before
+
+
+def test_interrupted_run_resumes_from_state(stub, tmp_path, monkeypatch):
+    fetch_species = strategy_refresh.fetch_species
+    calls = []
+
+    def interrupted(*args):
+        calls.append(args[2])
+        if len(calls) == 4:
+            raise KeyboardInterrupt
+        return fetch_species(*args)
+
+    monkeypatch.setattr(strategy_refresh, "fetch_species", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        _refresh(stub, tmp_path)
+    state = json.loads((tmp_path / STATE_NAME).read_text(encoding="utf-8"))
+    done = state["run"]["done"]
+    assert state["run"]["tiers"] == TIERS
+    assert 0 < len(done) < 6
+    assert not (tmp_path / "OU.json").exists()
+
+    monkeypatch.setattr(strategy_refresh, "fetch_species", fetch_species)
+    stub.requests.clear()
+    summary = _refresh(stub, tmp_path)
+    assert summary.resumed == len(done)
+    assert summary.updated == 6 - len(done)
+    # The index plus only the species the first run had not finished.
+    assert stub.requests == {200: 1 + 6 - len(done)}
+    assert json.loads((tmp_path / STATE_NAME).read_text(encoding="utf-8"))["run"] is None
+    uu = json.loads((tmp_path / "UU.json").read_text(encoding="utf-8"))
+    assert sorted(uu) == ["Ninetales-Alola", "Rotom-Wash", "Tapu Koko"]
@@ -0,0 +1,113 @@
+import base64
+import random
+
+import pytest
+
+from build_catalog import BuildCatalog, BuildChoice
+from db_migrations import DB_PATH
+from team_codes import (
+    CODE_VERSION,
+    MAX_MEMBERS,
+    choices_from_bytes,
+    code_from_bytes,
+    decode_team,
+    encode_team,
+    team_bytes,
+)
+from team_generator import TeamGenerator
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    return BuildCatalog.from_db(DB_PATH)
+
+
+@pytest.fixture(scope="module")
+def team(catalog):
+    return TeamGenerator(catalog).choices("OU", rng=random.Random(1))
+
+
+def test_round_trip(catalog):
+    generator = TeamGenerator(catalog)
+    for seed in range(50):
+        for tier in ("OU", "LC", "Uber"):
+            choices = generator.choices(tier, rng=random.Random(seed))
+            code = encode_team(catalog, choices)
+            assert "=" not in code
+            assert decode_team(catalog, code) == choices
+
+
+def test_round_trip_of_last_options(catalog):
+    # The largest index in every list, so every radix is exercised at its top.
+    for build_id in catalog.all_build_ids()[:200]:
+        build = catalog.get(build_id)
+        choice = BuildChoice(
+            build_id,
+            max(len(build.items) - 1, 0),
+            max(len(build.abilities) - 1, 0),
+            max(len(build.natures) - 1, 0),
+            max(len(build.tera_types) - 1, 0),
+            tuple(len(slot) - 1 for slot in build.moves),
+        )
+        assert decode_team(catalog, encode_team(catalog, [choice])) == [choice]
+
+
+def test_empty_team(catalog):
+    assert decode_team(catalog, encode_team(catalog, [])) == []
+
+
+def test_version_1_codes_are_rejected(catalog, team):
+    data = bytearray(team_bytes(catalog, team))
+    assert data[0] == CODE_VERSION
+    data[0] = 1
+    with pytest.raises(ValueError, match="format version"):
+        decode_team(catalog, code_from_bytes(bytes(data)))
+
+
+def test_fingerprint_mismatch_is_rejected(catalog, team):
+    data = bytearray(team_bytes(catalog, team))
+    data[4] ^= 0xFF
+    with pytest.raises(ValueError, match="different build database"):
+        choices_from_bytes(catalog, bytes(data))
+
+
+def test_more_than_six_members(catalog, team):
+    assert len(team) == MAX_MEMBERS
+    with pytest.raises(ValueError, match="at most"):
+        team_bytes(catalog, team + team[:1])
+    # A hand-made code with a seventh member is rejected on decode too.
+    data = team_bytes(catalog, team)
+    extra = team_bytes(catalog, team[:1])[5:]
+    with pytest.raises(ValueError, match="more than"):
+        choices_from_bytes(catalog, data + extra)
+
+
+def test_invalid_choice_is_not_encoded(catalog, team):
+    with pytest.raises(ValueError, match="does not belong"):
+        encode_team(catalog, [team[0]._replace(item=999)])
+
+
+def test_truncated_codes_are_rejected(catalog, team):
+    data = team_bytes(catalog, team)
+    for length in range(len(data)):
+        prefix = data[:length]
+        try:
+            choices = choices_from_bytes(catalog, prefix)
+        except ValueError:
+            continue
+        # Cutting exactly between members leaves a valid, shorter team.
+        assert choices == team[: len(choices)]
+
+
+@pytest.mark.parametrize("code", ["", "!!!!", "A", "AAAA", "not a code", "%%%", base64.b64encode(b"\xff" * 40).decode()])
+def test_garbage_is_rejected(catalog, code):
+    with pytest.raises(ValueError):
+        decode_team(catalog, code)
+
+
+def test_unknown_build_is_rejected(catalog):
+    data = bytes([CODE_VERSION]) + catalog.fingerprint.to_bytes(4, "big") + b"\xff\xff\x7f\x00"
+    with pytest.raises(ValueError, match="unknown build"):
+        choices_from_bytes(catalog, data)
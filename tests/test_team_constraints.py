@@ -0,0 +1,133 @@
+import random
+from collections import Counter
+
+import pytest
+
+from build_catalog import BuildCatalog, BuildOptions
+from db_migrations import DB_PATH
+from species_names import base_species
+from team_constraints import (
+    BAN_CACHE_SIZE,
+    ROLE_MOVES,
+    ConstraintError,
+    OptionIndex,
+    TeamConstraints,
+    generate_constrained_team,
+)
+
+RULES = TeamConstraints(
+    required_roles=frozenset({"hazard_setter", "pivot"}),
+    banned_items=frozenset({"Leftovers", "Heavy-Duty Boots"}),
+    banned_moves=frozenset({"U-turn", "Knock Off"}),
+    max_tera_duplicates=1,
+)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    return BuildCatalog.from_db(DB_PATH)
+
+
+@pytest.fixture(scope="module")
+def index(catalog):
+    return OptionIndex(catalog)
+
+
+def _sets(catalog: BuildCatalog, choices) -> list[tuple[str, dict]]:
+    return [(catalog.get(choice.build_id).pokemon_name, catalog.resolve(choice)) for choice in choices]
+
+
+def _check(catalog: BuildCatalog, choices, tier: str, constraints: TeamConstraints) -> None:
+    sets = _sets(catalog, choices)
+    assert len(sets) == 6
+    pool = catalog.species_pool(tier, True)
+    assert all(name in pool for name, _ in sets)
+    items = [build["item"] for _, build in sets if build["item"]]
+    teras = Counter(build["tera_type"] for _, build in sets if build["tera_type"])
+    moves = {move for _, build in sets for move in build["moves"]}
+    if constraints.item_clause:
+        assert len(items) == len(set(items))
+    if constraints.species_clause:
+        species = [base_species(name) for name, _ in sets]
+        assert len(species) == len(set(species))
+    if constraints.unique_moves:
+        assert all(len(build["moves"]) == len(set(build["moves"])) for _, build in sets)
+    assert not set(items) & constraints.banned_items
+    assert not moves & constraints.banned_moves
+    for role in constraints.required_roles:
+        assert moves & ROLE_MOVES[role], role
+    if constraints.max_tera_duplicates is not None:
+        assert max(teras.values(), default=0) <= constraints.max_tera_duplicates
+
+
+@pytest.mark.parametrize("tier", ["OU", "UU", "LC"])
+@pytest.mark.parametrize("weighted", [False, True], ids=["uniform", "usage"])
+def test_seeded_teams_follow_every_rule(catalog, index, tier, weighted):
+    for seed in range(40):
+        result = generate_constrained_team(index, tier, True, RULES, random.Random(seed), weighted=weighted)
+        _check(catalog, result.choices, tier, RULES)
+
+
+def test_seeded_teams_are_reproducible(index):
+    first = generate_constrained_team(index, "OU", True, RULES, random.Random(3))
+    second = generate_constrained_team(index, "OU", True, RULES, random.Random(3))
+    assert first == second
+
+
+def test_unknown_role_is_rejected(index):
+    with pytest.raises(ConstraintError, match="Unknown roles"):
+        generate_constrained_team(index, "OU", True, TeamConstraints(required_roles=frozenset({"wallbreaker"})))
+
+
+def test_impossible_role_is_rejected(index):
+    constraints = TeamConstraints(
+        required_roles=frozenset({"hazard_removal"}), banned_moves=ROLE_MOVES["hazard_removal"]
+    )
+    with pytest.raises(ConstraintError, match="can provide roles"):
+        generate_constrained_team(index, "OU", True, constraints, random.Random(1))
+
+
+def test_unsatisfiable_rules_run_out_of_budget(index):
+    constraints = TeamConstraints(banned_items=frozenset(index.item_ids))
+    with pytest.raises(ConstraintError, match="candidates tried"):
+        generate_constrained_team(index, "OU", True, constraints, random.Random(1), max_nodes=300)
+
+
+def test_ban_list_caches_are_bounded(catalog):
+    index = OptionIndex(catalog)
+    moves = sorted(index.move_ids)
+    for number in range(BAN_CACHE_SIZE + 10):
+        generate_constrained_team(
+            index, "OU", True, TeamConstraints(banned_moves=frozenset({moves[number]})), random.Random(number)
+        )
+    assert index.role_masks.cache_info().currsize == BAN_CACHE_SIZE
+    assert index.species_builds.cache_info().currsize == BAN_CACHE_SIZE
+
+
+def _small_catalog() -> BuildCatalog:
+    """Ten OU species with one build each and usage weights favouring the last one."""
+    names = [f"Species{letter}" for letter in "ABCDEFGHIJ"]
+    builds = [
+        BuildOptions(name, "OU", (f"Item{number}",), ("Pressure",), ("Jolly",), None, ("Steel",), (("Tackle",),))
+        for number, name in enumerate(names)
+    ]
+    weights = {("OU", name, "species", name): 1.0 for name in names}
+    weights["OU", names[-1], "species", names[-1]] = 20.0
+    return BuildCatalog(builds, weights)
+
+
+def test_small_weighted_pool_is_not_drawn_in_sorted_order():
+    catalog = _small_catalog()
+    index = OptionIndex(catalog)
+    pool = catalog.species_pool("OU", False)
+    assert len(pool) < 6 * 4
+    orders = []
+    for seed in range(50):
+        result = generate_constrained_team(index, "OU", False, TeamConstraints(), random.Random(seed), weighted=True)
+        orders.append(tuple(name for name, _ in _sets(catalog, result.choices)))
+    assert len(set(orders)) > 1
+    assert orders.count(pool[:6]) < len(orders)
+    # The heavily weighted species comes first far more often than 1 in 10.
+    assert sum(order[0] == "SpeciesJ" for order in orders) > 20
@@ -0,0 +1,152 @@
+import random
+
+import pytest
+
+import team_history
+from build_catalog import BuildCatalog
+from db_migrations import DB_PATH
+from team_codes import choices_from_bytes, team_bytes
+from team_generator import TeamGenerator
+from team_history import PAGE_SIZE, TeamHistory
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(team_history.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def history(tmp_path, clock):
+    history = TeamHistory(tmp_path / "history.db", max_entries=50, max_age=3600)
+    yield history
+    history.close()
+
+
+def _record(history, count, tier="OU"):
+    return [history.record(tier, bytes([i % 256])) for i in range(count)]
+
+
+def _pages(history, tier=None):
+    """Walk Older then back Newer the way the UI does; returns the ids of every page shown."""
+    cursors, shown = [], []
+    while True:
+        entries = history.page(tier, cursors[-1] if cursors else None, limit=PAGE_SIZE + 1)
+        shown.append([entry.id for entry in entries[:PAGE_SIZE]])
+        if len(entries) <= PAGE_SIZE:
+            break
+        cursors.append(entries[PAGE_SIZE - 1].id)
+    while cursors:
+        cursors.pop()
+        entries = history.page(tier, cursors[-1] if cursors else None, limit=PAGE_SIZE + 1)
+        shown.append([entry.id for entry in entries[:PAGE_SIZE]])
+    return shown
+
+
+def test_pages_are_newest_first_without_gaps_or_repeats(history):
+    ids = _record(history, 2 * PAGE_SIZE + 3)
+
+    shown = _pages(history)
+
+    older = shown[:3]
+    assert [id for page in older for id in page] == ids[::-1]
+    assert [len(page) for page in older] == [PAGE_SIZE, PAGE_SIZE, 3]
+    # Newer goes back through the same pages.
+    assert shown[3:] == older[-2::-1]
+
+
+def test_a_full_last_page_has_no_older_button(history):
+    _record(history, PAGE_SIZE)
+    assert _pages(history) == [[entry.id for entry in history.page()]]
+    assert history.page(before=history.page()[-1].id) == []
+
+
+def test_tier_filter(history):
+    ou = _record(history, PAGE_SIZE + 1, "OU")
+    uu = _record(history, 3, "UU")
+    ou += _record(history, 2, "OU")
+
+    assert [id for page in _pages(history, "OU")[:2] for id in page] == ou[::-1]
+    assert _pages(history, "UU") == [uu[::-1]]
+    assert _pages(history, "LC") == [[]]
+    assert {entry.tier for entry in history.page()} == {"OU", "UU"}
+
+
+def test_since(history, clock):
+    _record(history, 3)
+    clock.now += 60
+    recent = _record(history, 2)
+    assert [entry.id for entry in history.page(since=clock.now)] == recent[::-1]
+
+
+def test_prune_keeps_the_newest_max_entries(history):
+    ids = _record(history, 80)
+    history.prune()
+    assert [entry.id for entry in history.page(limit=100)] == ids[-50:][::-1]
+    assert history.get(ids[0]) is None
+
+
+def test_prune_drops_rows_older_than_max_age(history, clock):
+    old = _record(history, 5)
+    clock.now += 3000
+    new = _record(history, 5)
+    clock.now += 1000
+
+    history.prune()
+
+    assert [entry.id for entry in history.page()] == new[::-1]
+    assert all(history.get(id) is None for id in old)
+
+
+def test_record_prunes_every_prune_every_inserts(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(team_history, "PRUNE_EVERY", 10)
+    history = TeamHistory(tmp_path / "history.db", max_entries=5)
+    try:
+        _record(history, 9)
+        assert len(history.page(limit=100)) == 9
+        ids = _record(history, 1)
+        assert [entry.id for entry in history.page(limit=100)] == list(range(ids[0], ids[0] - 5, -1))
+    finally:
+        history.close()
+
+
+def test_entries_survive_a_restart(tmp_path, clock):
+    history = TeamHistory(tmp_path / "history.db")
+    entry_id = history.record("UU", b"\x02abc", seed=7, flags=team_history.USAGE_WEIGHTED, best_of=3, paste_url="u")
+    history.close()
+
+    history = TeamHistory(tmp_path / "history.db")
+    try:
+        assert history.get(entry_id) == (entry_id, clock.now, "UU", 7, team_history.USAGE_WEIGHTED, 3, b"\x02abc", "u")
+    finally:
+        history.close()
+
+
+def test_team_flags():
+    assert team_history.team_flags(False, "uniform", False) == 0
+    assert team_history.team_flags(True, "usage", True) == (
+        team_history.LOWER_TIERS | team_history.USAGE_WEIGHTED | team_history.CONSTRAINED
+    )
+
+
+def test_rows_from_another_catalog_fail_to_decode(history):
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    catalog = BuildCatalog.from_db(DB_PATH)
+    team = team_bytes(catalog, TeamGenerator(catalog).choices("OU", rng=random.Random(1)))
+    entry_id = history.record("OU", team)
+    # The same members recorded under a catalog with a different fingerprint.
+    stale_id = history.record("OU", team[:1] + bytes(b ^ 0xFF for b in team[1:5]) + team[5:])
+
+    assert choices_from_bytes(catalog, history.get(entry_id).team)
+    with pytest.raises(ValueError):
+        choices_from_bytes(catalog, history.get(stale_id).team)
@@ -0,0 +1,65 @@
+import re
+
+from showdown_format import parse_set
+from team_render import CARD_CACHE_SIZE, Card, card_from_set, render_card, render_grid
+
+
+HOSTILE_SET = """\
+<script>alert(1)</script> (Great Tusk) @ Rocks & <b>Stones</b>
+Ability: Protosynthesis"
+Tera Type: Ground' onerror='x
+EVs: 252 Atk / 4 SpD / 252 Spe
+Jolly Nature
+- Headlong Rush
+- <img src=x onerror=alert(1)>
+"""
+
+
+def _tags(html):
+    return set(re.findall(r"<\s*([a-zA-Z]+)", html))
+
+
+def test_untrusted_fields_are_escaped():
+    card = card_from_set(parse_set(HOSTILE_SET))
+    html = render_card(card)
+
+    assert "<script" not in html and "alert(1)</script>" not in html
+    assert _tags(html) <= {"div", "span", "a", "img"}
+    assert html.count("<img") == 1
+    assert "Rocks &amp; &lt;b&gt;Stones&lt;/b&gt;" in html
+    assert "Protosynthesis&quot;" in html
+    assert "Ground&#x27; onerror=&#x27;x" in html
+    assert "&lt;img src=x onerror=alert(1)&gt;" in html
+    # The nickname is not shown at all; the card is titled by species.
+    assert "Great Tusk" in html
+
+
+def test_species_name_is_escaped_in_every_attribute():
+    html = render_card(Card("Mr. <Mime> & 'Co'"))
+    assert "<Mime>" not in html
+    assert html.count("Mr. &lt;Mime&gt; &amp; &#x27;Co&#x27;") == 2  # title and alt text
+
+
+def test_render_card_cache_is_bounded():
+    render_card.cache_clear()
+    cards = [Card("Great Tusk", item=f"Item {i}") for i in range(CARD_CACHE_SIZE + 1)]
+    for card in cards:
+        render_card(card)
+    info = render_card.cache_info()
+    assert (info.currsize, info.maxsize, info.misses) == (CARD_CACHE_SIZE, CARD_CACHE_SIZE, CARD_CACHE_SIZE + 1)
+
+    # The least recently used card was evicted; the newest one is still cached.
+    render_card(cards[-1])
+    assert render_card.cache_info().hits == 1
+    render_card(cards[0])
+    assert render_card.cache_info().misses == CARD_CACHE_SIZE + 2
+
+
+def test_render_grid_reuses_cached_cards():
+    render_card.cache_clear()
+    cards = [Card("Great Tusk", moves=("Rapid Spin",)), Card("Kingambit", evs=(0, 252, 0, 0, 4, 252))]
+    first = render_grid(cards)
+    assert render_grid(cards) == first
+    assert render_card.cache_info().hits == 2
+    assert first.count("class='team-card'") == 2
+    assert "Atk: 252" in first
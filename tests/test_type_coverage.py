@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from build_catalog import BuildCatalog, BuildChoice, BuildOptions
+from db_migrations import DB_PATH
+from type_coverage import FIXED_DAMAGE_MOVES, SPECIES_TYPE_MOVES, CoverageScorer, load_type_data
+
+
+TYPE_DATA = load_type_data()
+
+
+def _catalog(members):
+    """One OU build per (species, moves) pair, with build id = position in ``members``."""
+    return BuildCatalog(
+        [
+            BuildOptions(name, "OU", (), (), (), None, (), tuple((move,) for move in moves))
+            for name, moves in members
+        ]
+    )
+
+
+def _team(catalog, build_ids):
+    return [BuildChoice(build_id, 0, 0, 0, 0, (0,) * len(catalog.get(build_id).moves)) for build_id in build_ids]
+
+
+def test_exclusion_lists_are_disjoint_from_typed_moves():
+    typed, status = set(TYPE_DATA["moves"]), set(TYPE_DATA["status_moves"])
+    assert not typed & status
+    assert not typed & FIXED_DAMAGE_MOVES
+    assert not status & FIXED_DAMAGE_MOVES
+    assert set(SPECIES_TYPE_MOVES) | {"Tera Blast"} <= typed
+
+
+def test_every_database_move_is_typed_or_excluded():
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        names = {name for name, in conn.execute("SELECT DISTINCT move_name FROM build_moves")}
+    finally:
+        conn.close()
+    known = set(TYPE_DATA["moves"]) | set(TYPE_DATA["status_moves"]) | FIXED_DAMAGE_MOVES
+    assert sorted(names - known) == []
+
+
+def test_stacked_weaknesses_score_below_a_balanced_team():
+    moves = ("Earthquake",)
+    stacked = ["Abomasnow", "Amoonguss", "Rillaboom", "Sceptile", "Venusaur", "Lilligant"]
+    balanced = ["Great Tusk", "Kingambit", "Gholdengo", "Dragapult", "Corviknight", "Toxapex"]
+    catalog = _catalog([(name, moves) for name in stacked + balanced])
+    scorer = CoverageScorer(catalog)
+
+    scores = scorer.score([_team(catalog, range(6)), _team(catalog, range(6, 12))])
+
+    # Same moves, so the difference is all defensive: every member is weak to Fire and Flying.
+    assert scores[0] < scores[1]
+    assert scorer.best([_team(catalog, range(6)), _team(catalog, range(6, 12))])[0] == 1
+
+
+def test_wider_move_coverage_scores_higher():
+    catalog = _catalog([("Great Tusk", ("Earthquake",)), ("Great Tusk", ("Earthquake", "Ice Beam", "Close Combat"))])
+    scorer = CoverageScorer(catalog)
+    narrow, wide = scorer.score([_team(catalog, [0]), _team(catalog, [1])])
+    assert wide > narrow
+
+
+@pytest.mark.parametrize("move", sorted(FIXED_DAMAGE_MOVES))
+def test_fixed_damage_moves_add_no_coverage(move):
+    catalog = _catalog([("Gholdengo", ("Protect",)), ("Gholdengo", (move,))])
+    scorer = CoverageScorer(catalog)
+    status, fixed = scorer.score([_team(catalog, [0]), _team(catalog, [1])])
+    assert fixed == status
@@ -0,0 +1,83 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from build_catalog import BuildCatalog
+from db_migrations import DB_PATH, migrate
+from usage_stats import import_chaos_stats
+
+# A tiny chaos file: ids and capitalisation differ from the database names, as in the real files.
+CHAOS = {
+    "info": {"metagame": "gen9ou"},
+    "data": {
+        "Great Tusk": {
+            "usage": 0.3,
+            "Items": {"boosterenergy": 60.0, "leftovers": 30.0, "heavydutyboots": 10.0, "choiceband": 5.0, "": 0.0},
+            "Abilities": {"protosynthesis": 100.0},
+            "Moves": {"headlongrush": 90.0, "rapidspin": 80.0, "": 10.0},
+            "Tera Types": {"steel": 3.0, "water": 1.0},
+            "Spreads": {"Jolly:0/252/0/0/4/252": 40.0, "Jolly:252/252/0/0/4/0": 20.0, "Adamant:0/252/0/0/4/252": 40.0},
+        },
+        "Kingambit": {"usage": 0.2, "Items": {"leftovers": 1.0, "blackglasses": 1.0}},
+        "Missingno": {"usage": 0.9, "Items": {"leftovers": 1.0}},
+    },
+}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    if not DB_PATH.exists():
+        pytest.skip("no strategy database")
+    shutil.copy2(DB_PATH, tmp_path / DB_PATH.name)
+    conn = sqlite3.connect(tmp_path / DB_PATH.name)
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def _weights(conn, pokemon_name: str, kind: str) -> dict[str, float]:
+    rows = conn.execute(
+        "SELECT name, weight FROM usage_weights WHERE tier = 'OU' AND pokemon_name = ? AND kind = ?",
+        (pokemon_name, kind),
+    )
+    return dict(rows)
+
+
+def test_import_maps_ids_to_database_names(conn):
+    import_chaos_stats(conn, "OU", CHAOS)
+    assert _weights(conn, "Great Tusk", "species") == {"Great Tusk": 0.3}
+    # Fractions of the species' total; Choice Band is not in any Great Tusk build.
+    items = _weights(conn, "Great Tusk", "item")
+    assert items == pytest.approx({"Booster Energy": 60 / 105, "Leftovers": 30 / 105, "Heavy-Duty Boots": 10 / 105})
+    assert _weights(conn, "Great Tusk", "tera_type") == pytest.approx({"Steel": 0.75, "Water": 0.25})
+    assert _weights(conn, "Great Tusk", "ability") == {"Protosynthesis": 1.0}
+    assert set(_weights(conn, "Great Tusk", "move")) == {"Headlong Rush", "Rapid Spin"}
+
+
+def test_natures_are_summed_across_spreads(conn):
+    import_chaos_stats(conn, "OU", CHAOS)
+    # Only Jolly is in the database; Adamant still counts towards the total.
+    assert _weights(conn, "Great Tusk", "nature") == pytest.approx({"Jolly": 0.6})
+
+
+def test_unknown_species_are_skipped(conn):
+    count = import_chaos_stats(conn, "OU", CHAOS)
+    assert count == conn.execute("SELECT COUNT(*) FROM usage_weights").fetchone()[0]
+    assert not _weights(conn, "Missingno", "species")
+
+
+def test_reimport_replaces_the_tier(conn):
+    import_chaos_stats(conn, "OU", CHAOS)
+    import_chaos_stats(conn, "OU", {"data": {"Kingambit": {"usage": 0.5}}})
+    rows = conn.execute("SELECT pokemon_name, kind, weight FROM usage_weights").fetchall()
+    assert rows == [("Kingambit", "species", 0.5)]
+
+
+def test_catalog_uses_imported_weights(conn):
+    import_chaos_stats(conn, "OU", CHAOS)
+    catalog = BuildCatalog.from_connection(conn)
+    assert catalog.has_usage_weights
+    build_id = catalog.build_ids("OU", "Great Tusk")[0]
+    item_table = catalog.option_tables(build_id)[0]
+    assert item_table is not None
@@ -0,0 +1,102 @@
+import random
+from collections import Counter
+
+import pytest
+
+from build_catalog import BuildCatalog, BuildOptions
+from weighted_sampling import AliasTable
+
+WEIGHTS = [5.0, 1.0, 0.0, 3.0, 1.0]
+
+
+def _probabilities(table: AliasTable) -> list[float]:
+    """The exact probability of every index implied by the table's arrays."""
+    prob, alias = table.arrays()
+    n = len(prob)
+    result = [p / n for p in prob]
+    for i, p in enumerate(prob):
+        result[alias[i]] += (1.0 - p) / n
+    return result
+
+
+@pytest.mark.parametrize("weights", [WEIGHTS, [1.0] * 7, [0.0, 0.0, 2.0], [0.001, 1000.0]])
+def test_probabilities_match_the_weights(weights):
+    table = AliasTable(weights)
+    probabilities = _probabilities(table)
+    assert sum(probabilities) == pytest.approx(1.0)
+    assert probabilities == pytest.approx([w / sum(weights) for w in weights])
+    assert all(0.0 <= p <= 1.0 for p in table.arrays()[0])
+
+
+def test_all_zero_weights_sample_uniformly():
+    assert _probabilities(AliasTable([0.0, 0.0, 0.0, 0.0])) == pytest.approx([0.25] * 4)
+
+
+@pytest.mark.parametrize("weights", [[], [1.0, -0.5]], ids=["empty", "negative"])
+def test_invalid_weights_are_rejected(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
+
+
+def test_draw_frequencies_follow_the_weights():
+    table = AliasTable(WEIGHTS)
+    rng = random.Random(7)
+    draws = 50_000
+    counts = Counter(table.sample(rng) for _ in range(draws))
+    assert counts[2] == 0
+    for index, weight in enumerate(WEIGHTS):
+        assert counts[index] / draws == pytest.approx(weight / sum(WEIGHTS), abs=0.01)
+
+
+def test_from_arrays_draws_the_same_sequence():
+    table = AliasTable(WEIGHTS)
+    copy = AliasTable.from_arrays(*table.arrays())
+    first, second = random.Random(3), random.Random(3)
+    assert [table.sample(first) for _ in range(1000)] == [copy.sample(second) for _ in range(1000)]
+    assert len(copy) == len(WEIGHTS)
+
+
+def _catalog(species_weights: dict[str, float], item_weights: dict[str, float] | None = None) -> BuildCatalog:
+    """One OU build per species, each with the same three items."""
+    items = ("Leftovers", "Life Orb", "Choice Band")
+    builds = [
+        BuildOptions(name, "OU", items, ("Pressure",), ("Jolly",), None, ("Steel",), (("Tackle",),))
+        for name in species_weights
+    ]
+    weights = {("OU", name, "species", name): weight for name, weight in species_weights.items()}
+    for name in species_weights:
+        for item, weight in (item_weights or {}).items():
+            weights["OU", name, "item", item] = weight
+    return BuildCatalog(builds, weights)
+
+
+def test_equal_weights_get_no_table():
+    catalog = _catalog({"A": 0.5, "B": 0.5}, {"Leftovers": 0.2, "Life Orb": 0.2, "Choice Band": 0.2})
+    item_table, ability_table, *_ = catalog.option_tables(0)
+    assert item_table is None and ability_table is None
+
+
+def test_weighted_species_draws_follow_usage():
+    catalog = _catalog({name: 1.0 for name in "ABCDEFGHIJ"} | {"J": 10.0})
+    rng = random.Random(1)
+    firsts = Counter(catalog.sample_species("OU", False, 3, rng, weighted=True)[0] for _ in range(2000))
+    assert firsts["J"] / 2000 == pytest.approx(10 / 19, abs=0.05)
+
+
+def test_weighted_draw_without_replacement_fills_up_to_count():
+    # Nearly all weight on one species: rejection sampling gives up after
+    # count * 20 attempts and the rest is filled uniformly, never short.
+    catalog = _catalog({name: 0.0 for name in "ABCDEFGHIJ"} | {"A": 1.0})
+    for seed in range(20):
+        drawn = catalog.sample_species("OU", False, 6, random.Random(seed), weighted=True)
+        assert len(drawn) == len(set(drawn)) == 6
+        assert "A" in drawn
+
+
+def test_weighted_item_choice_follows_usage():
+    catalog = _catalog({"A": 1.0, "B": 1.0}, {"Leftovers": 0.9, "Life Orb": 0.1})
+    rng = random.Random(2)
+    items = Counter(catalog.resolve(catalog.random_choice("OU", "A", rng, weighted=True))["item"] for _ in range(5000))
+    # Choice Band has no recorded weight, so it gets MISSING_WEIGHT (0.01).
+    assert items["Leftovers"] / 5000 == pytest.approx(0.9 / 1.01, abs=0.03)
+    assert items["Choice Band"] < items["Life Orb"] < items["Leftovers"]
@@ -0,0 +1,145 @@
+"""Type-coverage scoring for whole batches of candidate teams.
+
+Every team is turned into index arrays (species typing, tera type, move
+types) and scored with NumPy in one pass, so ranking a thousand candidates
+costs about as much as generating them.
+
+Only moves with a type in ``type_data.json`` count towards offensive
+coverage. Status moves (``status_moves`` there) and ``FIXED_DAMAGE_MOVES``
+are left out on purpose; any other move without a type is a gap in the data.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from build_catalog import BuildCatalog, BuildChoice
+
+
+TYPE_DATA_PATH = Path(__file__).resolve().parent / "type_data.json"
+
+# log2 of the damage multiplier used for immunities, so that an immunity
+# still outweighs a weakness from the second type.
+IMMUNE = -3.0
+
+# Moves whose type comes from the user: index into the species' typing.
+SPECIES_TYPE_MOVES = {"Judgment": 0, "Revelation Dance": 0, "Ivy Cudgel": -1, "Raging Bull": -1}
+TERA_BLAST = -1
+
+# Damaging moves whose damage does not depend on type effectiveness (fixed,
+# HP-based or returned damage), so they add no offensive coverage.
+FIXED_DAMAGE_MOVES = frozenset(
+    {"Endeavor", "Final Gambit", "Mirror Coat", "Night Shade", "Ruination", "Seismic Toss", "Super Fang"}
+)
+
+
+def load_type_data(path: Path | str = TYPE_DATA_PATH) -> dict:
+    """The bundled type chart, species typings, damaging move types and status moves."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CoverageScorer:
+    """Score teams on defensive synergy and offensive type coverage.
+
+    Per team, a defensive matrix holds the log2 multiplier every member takes
+    from each attacking type, and an offensive matrix holds the best
+    multiplier the team's damaging moves reach against each defending type.
+    A team scores one point per type it hits super effectively and half a
+    point per type it hits at least neutrally, minus the square of how many
+    more members are weak than resist each attacking type (a tera type that
+    resists counts as one more resist).
+    """
+
+    def __init__(self, catalog: BuildCatalog, type_data: dict | None = None):
+        data = type_data or load_type_data()
+        self.catalog = catalog
+        self.types = tuple(data["types"])
+        self._type_ids = {name: index for index, name in enumerate(self.types)}
+        # The extra id stands for "no type": a missing second type, a status move or an empty team slot.
+        self.none_id = len(self.types)
+
+        size = len(self.types)
+        chart = np.zeros((size + 1, size), dtype=np.float32)
+        for attacking, row in data["chart"].items():
+            for defending, multiplier in row.items():
+                value = np.log2(multiplier) if multiplier else IMMUNE
+                chart[self._type_ids[attacking], self._type_ids[defending]] = value
+        # _defense[t, a]: what defending type t takes from attacking type a.
+        self._defense = np.vstack([chart[:size].T, np.zeros((1, size), dtype=np.float32)])
+        # _offense[t, d]: what a move of type t does to defending type d; no move never counts.
+        self._offense = chart.copy()
+        self._offense[self.none_id] = -np.inf
+
+        species = {name: self._typing(types) for name, types in data["species"].items()}
+        moves = {name: self._type_ids[move_type] for name, move_type in data["moves"].items()}
+        self._tera_blast = moves.get("Tera Blast", self.none_id)
+        # Per build id: (typing, tera type per option, move type per slot and option).
+        # Tera Blast is stored as TERA_BLAST and resolved once the tera type is known.
+        self._builds: dict[int, tuple[tuple[int, int], tuple[int, ...], tuple[tuple[int, ...], ...]]] = {}
+        for build_id in catalog.all_build_ids():
+            build = catalog.get(build_id)
+            typing = species.get(build.pokemon_name, (self.none_id, self.none_id))
+            self._builds[build_id] = (
+                typing,
+                tuple(self._type_ids.get(tera, self.none_id) for tera in build.tera_types),
+                tuple(tuple(self._move_type(move, typing, moves) for move in slot) for slot in build.moves[:4]),
+            )
+
+    def _typing(self, types: list[str]) -> tuple[int, int]:
+        ids = [self._type_ids[name] for name in types[:2]]
+        return ids[0], ids[1] if len(ids) > 1 else self.none_id
+
+    def _move_type(self, move: str, typing: tuple[int, int], moves: dict[str, int]) -> int:
+        if move == "Tera Blast":
+            return TERA_BLAST
+        if move in SPECIES_TYPE_MOVES:
+            picked = typing[SPECIES_TYPE_MOVES[move]]
+            return picked if picked != self.none_id else typing[0]
+        return moves.get(move, self.none_id)
+
+    def encode(self, teams: list[list[BuildChoice]], team_size: int = 6) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Index arrays for a batch of teams: typings (N, team_size, 2), tera (N, team_size), moves (N, team_size, 4)."""
+        none_id = self.none_id
+        typings = np.full((len(teams), team_size, 2), none_id, dtype=np.intp)
+        tera = np.full((len(teams), team_size), none_id, dtype=np.intp)
+        moves = np.full((len(teams), team_size, 4), none_id, dtype=np.intp)
+        builds = self._builds
+        for team_index, team in enumerate(teams):
+            for member, choice in enumerate(team[:team_size]):
+                typing, tera_types, move_types = builds[choice.build_id]
+                typings[team_index, member] = typing
+                if tera_types:
+                    tera[team_index, member] = tera_types[choice.tera_type]
+                slots = [slot[option] for slot, option in zip(move_types, choice.moves)]
+                moves[team_index, member, : len(slots)] = slots
+        # Tera Blast takes the tera type; with Stellar or no tera type it stays Normal.
+        tera_blast = moves == TERA_BLAST
+        if tera_blast.any():
+            fallback = np.where(tera == none_id, self._tera_blast, tera)
+            moves = np.where(tera_blast, fallback[..., None], moves)
+        return typings, tera, moves
+
+    def score_arrays(self, typings: np.ndarray, tera: np.ndarray, moves: np.ndarray) -> np.ndarray:
+        """Score already encoded teams; returns one float per team."""
+        defense = self._defense[typings].sum(axis=2)  # (N, members, attacking types)
+        # Stellar and unknown tera types keep the original typing.
+        tera_defense = np.where((tera == self.none_id)[..., None], defense, self._defense[tera])
+        weak = (defense > 0).sum(axis=1)
+        resist = (defense < 0).sum(axis=1) + (tera_defense < 0).any(axis=1)
+        stacked = np.clip(weak - resist, 0, None)
+
+        best = self._offense[moves].max(axis=(1, 2))  # (N, defending types)
+        super_effective = (best > 0).sum(axis=1)
+        neutral = (best >= 0).sum(axis=1)
+        return super_effective + 0.5 * neutral - (stacked**2).sum(axis=1)
+
+    def score(self, teams: list[list[BuildChoice]]) -> np.ndarray:
+        return self.score_arrays(*self.encode(teams))
+
+    def best(self, teams: list[list[BuildChoice]]) -> tuple[int, float]:
+        """Index and score of the highest scoring team (the first one on ties)."""
+        scores = self.score(teams)
+        index = int(scores.argmax())
+        return index, float(scores[index])
@@ -1,105 +1,93 @@
-import json
+import os
 import random
-import sqlite3
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
 
-import requests
 import streamlit as st
-from bs4 import BeautifulSoup
 
-from pokepaste_uploader import showdown_to_pokepaste
+import metrics
+from build_catalog import BuildCatalog, BuildChoice
+from catalog_snapshot import load_catalog
+from db_migrations import is_stale
+from db_pool import ConnectionPool
+from paste_cache import PasteCache
+from pokepaste_uploader import upload_in_background
+from sprite_assets import SpriteIndex
+from team_codes import choices_from_bytes, code_from_bytes, decode_team, team_bytes
+from team_constraints import ROLES, TeamConstraints
+from team_generator import WEIGHTINGS, TeamGenerator, sorted_tiers
+from team_history import PAGE_SIZE, TeamEntry, TeamHistory, team_flags
+from team_render import Card, cards_from_choices, render_grid
 
 
-TIER_ORDER = ["AG", "Uber", "OU", "UU", "RU", "NU", "PU", "ZU"]
-EXCLUDED_TIERS = ["NFE", "LC"]  # Tiers to exclude from higher tier team generation
+# Candidate team counts offered in the UI; the best type coverage among them wins.
+BEST_OF_CHOICES = (1, 10, 100, 1000)
 
+ROOT = Path(__file__).resolve().parent
+DB_PATH = ROOT / "pokemon_strategies.db"
+PASTE_CACHE_PATH = ROOT / "paste_cache.db"
+HISTORY_PATH = ROOT / "team_history.db"
+CSS_PATH = ROOT / "streamlit_styles.css"
 
-def _parse_showdown_team(team_text: str) -> list[dict]:
-    """Parse the generated Showdown team text into per-Pokémon dicts.
 
-    Each dict contains: name, item, ability, tera_type, evs, nature, moves.
-    Assumes the format produced by build_random_ou_team.
-    """
-    blocks = [b for b in team_text.strip().split("\n\n") if b.strip()]
-    team = []
-
-    for block in blocks:
-        lines = [line.strip() for line in block.splitlines() if line.strip()]
-        if not lines:
-            continue
-
-        entry: dict = {
-            "name": "",
-            "item": "",
-            "ability": "",
-            "tera_type": "",
-            "evs": "",
-            "nature": "",
-            "moves": [],
-        }
+@st.cache_resource
+def _get_db_pool() -> ConnectionPool:
+    """Process-wide pool of read-only connections, shared by every script thread."""
+    return ConnectionPool(DB_PATH, on_query=lambda statement: metrics.count("db_queries"))
 
-        # First line: Name @ Item (or just Name)
-        first = lines[0]
-        if "@" in first:
-            name_part, item_part = first.split("@", 1)
-            entry["name"] = name_part.strip()
-            entry["item"] = item_part.strip()
-        else:
-            entry["name"] = first.strip()
-
-        for line in lines[1:]:
-            if line.startswith("Ability: "):
-                entry["ability"] = line[len("Ability: ") :].strip()
-            elif line.startswith("Tera Type: "):
-                entry["tera_type"] = line[len("Tera Type: ") :].strip()
-            elif line.startswith("EVs: "):
-                entry["evs"] = line
-            elif line.startswith("Nature: "):
-                entry["nature"] = line
-            elif line.startswith("- "):
-                entry["moves"].append(line[2:].strip())
-
-        team.append(entry)
-
-    return team
-
-
-def _generate_sprite_url(pokemon_name: str) -> str:
-    """Generate the sprite URL for a given Pokemon name locally.
-    
-    Uses the Pokemon Showdown sprite repository format.
-    """
-    # Normalize name for filename: lowercase, remove special chars, spaces to hyphens
-    # This is a heuristic that covers most cases.
-    safe_name = pokemon_name.lower().replace(" ", "-").replace(".", "").replace(":", "").replace("%", "").replace("'", "")
-    
-    # Handle specific edge cases if needed, but standard Showdown format is fairly consistent
-    # e.g. "Farigiraf" -> "farigiraf", "Iron Bundle" -> "iron-bundle"
-    
-    # Using Gen 5 animated sprites for a premium look, falling back to static if needed by the browser
-    # But for stability and consistency with the previous look (which used Gen 5 static), let's stick to Gen 5 static or animated.
-    # The user liked the previous look. Pokepaste uses: https://play.pokemonshowdown.com/sprites/gen5/{name}.png
-    
-    return f"https://play.pokemonshowdown.com/sprites/gen5/{safe_name}.png"
 
+@st.cache_resource
+def _get_build_catalog() -> BuildCatalog:
+    """Load every build once per process, from the catalog snapshot when it is current."""
+    with _get_db_pool().connection() as conn:
+        return load_catalog(DB_PATH, conn=conn)
 
-def _generate_smogon_url(pokemon_name: str) -> str:
-    """Generate the Smogon Strategy Dex URL for a given Pokemon."""
-    # Smogon slugs are typically lowercase, spaces to hyphens, remove special chars
-    # e.g. "Iron Bundle" -> "iron-bundle", "Chi-Yu" -> "chi-yu"
-    slug = pokemon_name.lower().replace(" ", "-").replace(".", "").replace(":", "").replace("%", "").replace("'", "")
-    return f"https://www.smogon.com/dex/sv/pokemon/{slug}/"
 
+@st.cache_resource
+def _get_team_generator() -> TeamGenerator:
+    """Team generation over the shared catalog; builds its constraint index and scorer on first use."""
+    return TeamGenerator(_get_build_catalog())
 
-ROOT = Path(__file__).resolve().parent
-DB_PATH = ROOT / "pokemon_strategies.db"
+
+@st.cache_resource
+def _get_sprite_index() -> SpriteIndex:
+    """Sprite and Smogon URLs for every species, using prefetched local sprites when present."""
+    return SpriteIndex(_get_build_catalog().pokemon_names)
+
+
+@st.cache_resource
+def _get_paste_cache() -> PasteCache:
+    """Process-wide cache of already uploaded teams, persisted next to the app."""
+    return PasteCache(PASTE_CACHE_PATH)
+
+
+@st.cache_resource
+def _get_team_history() -> TeamHistory:
+    """Process-wide history of generated teams, persisted next to the app."""
+    return TeamHistory(HISTORY_PATH)
+
+
+@st.cache_resource
+def _start_metrics_server():
+    """Serve /metrics for a local scraper if TEAMBUILDER_METRICS_PORT is set."""
+    port = os.environ.get("TEAMBUILDER_METRICS_PORT")
+    return metrics.serve(int(port)) if port else None
+
+
+@st.cache_resource
+def _db_is_stale() -> bool:
+    """Whether the database is missing schema migrations (indexes etc.)."""
+    with _get_db_pool().connection() as conn:
+        return is_stale(conn)
 
 
-def _get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+@st.cache_resource
+def _load_style() -> str:
+    """The custom CSS as a <style> block, read from disk once per process."""
+    if not CSS_PATH.is_file():
+        return ""
+    return f"<style>{CSS_PATH.read_text(encoding='utf-8')}</style>"
 
 
 @st.cache_data(ttl=3600)
@@ -108,216 +96,177 @@ def _load_available_tiers() -> list[str]:
     if not DB_PATH.exists():
         return ["OU"]
     
-    conn = _get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT tier FROM pokemon_builds")
-        tiers = [row["tier"] for row in cursor.fetchall()]
-        
-        # Sort tiers based on TIER_ORDER
-        # Filter out any tiers not in TIER_ORDER and append them at the end if any exist
-        known_tiers = [t for t in tiers if t in TIER_ORDER]
-        unknown_tiers = [t for t in tiers if t not in TIER_ORDER]
-        
-        known_tiers.sort(key=lambda t: TIER_ORDER.index(t))
-        unknown_tiers.sort()
-        
-        sorted_tiers = known_tiers + unknown_tiers
-        return sorted_tiers if sorted_tiers else ["OU"]
+        with _get_db_pool().connection() as conn:
+            rows = conn.execute("SELECT DISTINCT tier FROM pokemon_builds").fetchall()
+        return sorted_tiers([row["tier"] for row in rows]) or ["OU"]
     except Exception:
         return ["OU"]
-    finally:
-        conn.close()
 
 
-def _build_showdown_set(name: str, build_data: dict) -> str:
-    """Convert a build dictionary into a Showdown set string."""
-    lines = []
-    
-    # Name @ Item
-    item = build_data.get("item")
-    if item:
-        lines.append(f"{name} @ {item}")
-    else:
-        lines.append(name)
-        
-    # Ability
-    ability = build_data.get("ability")
-    if ability:
-        lines.append(f"Ability: {ability}")
-        
-    # Tera Type
-    tera = build_data.get("tera_type")
-    if tera:
-        lines.append(f"Tera Type: {tera}")
-        
-    # EVs
-    evs = build_data.get("evs")
-    if evs:
-        lines.append(f"EVs: {evs}")
-        
-    # Nature
-    nature = build_data.get("nature")
-    if nature:
-        lines.append(f"Nature: {nature}")
-        
-    # Moves
-    for move in build_data.get("moves", []):
-        lines.append(f"- {move}")
-        
-    return "\n".join(lines)
+def _generate_team_choices(
+    tier: str,
+    num_pokemon: int = 6,
+    include_lower_tiers: bool = True,
+    rng: random.Random | None = None,
+    weighting: str = "uniform",
+    constraints: TeamConstraints | None = None,
+    best_of: int = 1,
+) -> list[BuildChoice]:
+    """Pick random builds and options for a team; see TeamGenerator.choices."""
+    return _get_team_generator().choices(tier, num_pokemon, include_lower_tiers, rng, weighting, constraints, best_of)
+
+
+def _team_text_from_choices(choices: list[BuildChoice]) -> str:
+    """Render build choices as Showdown team text."""
+    return _get_team_generator().team_text(choices)
+
+
+def _build_random_team_for_tier(
+    tier: str,
+    num_pokemon: int = 6,
+    include_lower_tiers: bool = True,
+    rng: random.Random | None = None,
+    weighting: str = "uniform",
+    constraints: TeamConstraints | None = None,
+    best_of: int = 1,
+) -> str:
+    """Build a random team for the given tier and return it as Showdown text."""
+    return _team_text_from_choices(
+        _generate_team_choices(tier, num_pokemon, include_lower_tiers, rng, weighting, constraints, best_of)
+    )
 
 
-def _get_random_build_from_db(conn, tier: str, pokemon_name: str) -> dict:
-    """Fetch a random build for a specific pokemon in a tier from the database."""
-    cursor = conn.cursor()
-    
-    # Get all build IDs for this pokemon and tier
-    cursor.execute("SELECT id FROM pokemon_builds WHERE pokemon_name = ? AND tier = ?", (pokemon_name, tier))
-    builds = cursor.fetchall()
-    
-    if not builds:
-        return {}
-        
-    # Pick a random build ID
-    build_id = random.choice(builds)["id"]
-    
-    build_data = {
-        "item": None,
-        "ability": None,
-        "nature": None,
-        "evs": None,
-        "tera_type": None,
-        "moves": []
-    }
-    
-    # Fetch components
-    # Item
-    cursor.execute("SELECT item_name FROM build_items WHERE build_id = ?", (build_id,))
-    items = cursor.fetchall()
-    if items:
-        build_data["item"] = random.choice(items)["item_name"]
-        
-    # Ability
-    cursor.execute("SELECT ability_name FROM build_abilities WHERE build_id = ?", (build_id,))
-    abilities = cursor.fetchall()
-    if abilities:
-        build_data["ability"] = random.choice(abilities)["ability_name"]
-        
-    # Nature
-    cursor.execute("SELECT nature_name FROM build_natures WHERE build_id = ?", (build_id,))
-    natures = cursor.fetchall()
-    if natures:
-        build_data["nature"] = random.choice(natures)["nature_name"]
-        
-    # EVs
-    cursor.execute("SELECT ev_string FROM build_evs WHERE build_id = ? ORDER BY id", (build_id,))
-    evs_list = cursor.fetchall()
-    if evs_list:
-        # EVs in the DB are stored as individual stats (e.g. "252 Atk", "4 SpD")
-        # We need to join them to form the full EV string
-        build_data["evs"] = " / ".join([row["ev_string"] for row in evs_list])
-        
-    # Tera Type
-    cursor.execute("SELECT tera_type FROM build_tera_types WHERE build_id = ?", (build_id,))
-    teras = cursor.fetchall()
-    if teras:
-        build_data["tera_type"] = random.choice(teras)["tera_type"]
-        
-    # Moves - we need 4 moves if possible
-    # The DB structure has move_slot (Move1, Move2, etc.)
-    # We should pick one move from each slot if available
-    moves = []
-    for i in range(1, 5):
-        slot = f"Move{i}"
-        cursor.execute("SELECT move_name FROM build_moves WHERE build_id = ? AND move_slot = ?", (build_id, slot))
-        slot_moves = cursor.fetchall()
-        if slot_moves:
-            moves.append(random.choice(slot_moves)["move_name"])
-            
-    build_data["moves"] = moves
-    
-    return build_data
+@st.cache_data(max_entries=1024)
+def _team_text_from_code(team_code: str) -> str:
+    """Decode a shared team code into Showdown text. Raises ValueError if invalid."""
+    return _team_text_from_choices(decode_team(_get_build_catalog(), team_code))
+
+
+def generate_random_team_for_tier(
+    tier: str,
+    include_lower_tiers: bool = True,
+    seed: int | None = None,
+    weighting: str = "uniform",
+    constraints: TeamConstraints | None = None,
+    best_of: int = 1,
+) -> tuple[str, str, Future]:
+    """Generate a random team for the given tier and start uploading it to Pokepaste.
+
+    Returns a tuple of (team_text, team_code, paste_future). The same seed
+    always gives the same team; team_code can be decoded back into it without
+    any network call. The upload runs in the background so the team can be
+    shown right away; the future resolves to the Pokepaste URL or raises the
+    upload error. The team is added to the team history once the upload
+    finishes, with its paste URL if the upload succeeded.
+    """
+    if seed is None:
+        # Draw one so the history can replay the team.
+        seed = random.randrange(2**32)
+    with metrics.timer("generate"):
+        choices = _generate_team_choices(
+            tier,
+            include_lower_tiers=include_lower_tiers,
+            rng=random.Random(seed),
+            weighting=weighting,
+            constraints=constraints,
+            best_of=best_of,
+        )
+    with metrics.timer("team_text"):
+        team_text = _team_text_from_choices(choices)
+        team_data = team_bytes(_get_build_catalog(), choices)
+        team_code = code_from_bytes(team_data)
+    paste_future = upload_in_background(
+        team_text,
+        title=f"Random {tier} Team",
+        author="PokemonTeamBuilder",
+        notes=f"Randomly generated {tier} team",
+        public=True,
+        cache=_get_paste_cache(),
+    )
+    history = _get_team_history()
+    flags = team_flags(include_lower_tiers, weighting, constraints is not None)
 
+    def record(future: Future) -> None:
+        paste_url = None if future.exception() else future.result()
+        history.record(tier, team_data, seed, flags, best_of, paste_url)
 
-def _build_random_team_for_tier(tier: str, num_pokemon: int = 6, include_lower_tiers: bool = True) -> str:
-    """Build a random team for the given tier using the database.
-    
-    If include_lower_tiers is True, allows Pokemon from the selected tier and any lower tiers.
-    """
-    conn = _get_db_connection()
+    paste_future.add_done_callback(record)
+    return team_text, team_code, paste_future
+
+
+def _team_cards_from_code(team_code: str) -> list[Card]:
+    """Card data for a team code, straight from the catalog. Raises ValueError if invalid."""
+    catalog = _get_build_catalog()
+    return cards_from_choices(catalog, decode_team(catalog, team_code))
+
+
+def _render_team(team_text: str, cards: list[Card]) -> None:
+    """Render the team card grid and the raw Showdown text."""
+    with metrics.timer("render"):
+        grid_html = render_grid(cards, _get_sprite_index())
+    st.markdown(grid_html, unsafe_allow_html=True)
+
+    # Raw Showdown text hidden by default inside an expander
+    with st.expander("Show raw Showdown team"):
+        st.code(team_text, language="text")
+
+
+def _team_summary(entry: TeamEntry) -> str | None:
+    """Species names of a history entry, or None if it predates the current catalog."""
+    catalog = _get_build_catalog()
     try:
-        cursor = conn.cursor()
-        
-        # Determine allowed tiers
-        allowed_tiers = [tier]
-        if include_lower_tiers and tier in TIER_ORDER:
-            start_idx = TIER_ORDER.index(tier)
-            allowed_tiers = TIER_ORDER[start_idx:]
-            # Remove excluded tiers (NFE, LC) from allowed tiers
-            allowed_tiers = [t for t in allowed_tiers if t not in EXCLUDED_TIERS]
-            
-        # Get all unique pokemon names in these tiers
-        placeholders = ",".join("?" for _ in allowed_tiers)
-        query = f"SELECT DISTINCT pokemon_name FROM pokemon_builds WHERE tier IN ({placeholders})"
-        cursor.execute(query, allowed_tiers)
-        
-        all_pokemon = [row["pokemon_name"] for row in cursor.fetchall()]
-        
-        # If strict matching (include_lower_tiers=False), we don't need extra filtering anymore
-        # because the database has been cleaned to only contain the native tier for each Pokemon.
-        # So if we query for tier='OU', we will only get Pokemon whose native tier is OU.
-        
-        if len(all_pokemon) < num_pokemon:
-             # Fallback if not enough pokemon
-             if not all_pokemon:
-                 raise ValueError(f"No Pokemon found in tiers {allowed_tiers}")
-             chosen_names = all_pokemon # Take all if less than 6
-        else:
-            chosen_names = random.sample(all_pokemon, num_pokemon)
-            
-        team_sets: list[str] = []
-        for name in chosen_names:
-            # For each chosen pokemon, we need to pick a build.
-            # If we are including lower tiers, the pokemon might exist in multiple allowed tiers.
-            # We should probably pick a build from the highest available tier for that pokemon, 
-            # or just random across allowed tiers. Random across allowed tiers is simpler and adds variety.
-            
-            # We need to find which tiers this pokemon has builds for, within our allowed list
-            cursor.execute(f"SELECT DISTINCT tier FROM pokemon_builds WHERE pokemon_name = ? AND tier IN ({placeholders})", 
-                           (name, *allowed_tiers))
-            available_tiers_for_mon = [row["tier"] for row in cursor.fetchall()]
-            
-            if not available_tiers_for_mon:
-                continue # Should not happen given previous query
-                
-            # Pick a random tier for this specific pokemon
-            chosen_tier = random.choice(available_tiers_for_mon)
-            
-            build_data = _get_random_build_from_db(conn, chosen_tier, name)
-            if build_data:
-                team_sets.append(_build_showdown_set(name, build_data))
-                
-        return "\n\n".join(team_sets)
-        
-    finally:
-        conn.close()
+        choices = choices_from_bytes(catalog, entry.team)
+    except ValueError:
+        return None
+    return ", ".join(catalog.get(choice.build_id).pokemon_name for choice in choices)
 
 
-def generate_random_team_for_tier(tier: str, include_lower_tiers: bool = True) -> tuple[str, str]:
-    """Generate a random team for the given tier and upload to Pokepaste.
+@st.fragment
+def _recent_teams(tiers: list[str]) -> None:
+    """One page of the team history; paging reruns only this fragment.
 
-    Returns a tuple of (team_text, pokepaste_url).
+    Only the page's rows are read. A team's text and cards are rebuilt from
+    its code when it is opened, through the shared-team path.
     """
-    team_text = _build_random_team_for_tier(tier, include_lower_tiers=include_lower_tiers)
-    url = showdown_to_pokepaste(
-        team_text=team_text,
-        title=f"Random {tier} Team",
-        author="PokemonTeamBuilder",
-        notes=f"Randomly generated {tier} team",
-        public=True,
-    )
-    return team_text, url
+    tier_filter = st.selectbox("Tier", options=["All", *tiers], key="history_tier")
+    # The ``before`` id of each page past the first; the last one is the current page.
+    cursors = st.session_state.setdefault("history_cursors", [])
+    if st.session_state.get("history_filter") != tier_filter:
+        st.session_state["history_filter"] = tier_filter
+        cursors.clear()
+    before = cursors[-1] if cursors else None
+
+    entries = _get_team_history().page(None if tier_filter == "All" else tier_filter, before, limit=PAGE_SIZE + 1)
+    has_older = len(entries) > PAGE_SIZE
+    entries = entries[:PAGE_SIZE]
+    if not entries:
+        st.caption("No teams generated yet.")
+    for entry in entries:
+        species = _team_summary(entry)
+        row_left, row_right = st.columns([5, 1])
+        with row_left:
+            created = datetime.fromtimestamp(entry.created).strftime("%Y-%m-%d %H:%M")
+            paste = f"  ·  [Pokepaste]({entry.paste_url})" if entry.paste_url else ""
+            st.markdown(f"**{entry.tier}** · {created} · {species or '*built from an older database*'}{paste}")
+        with row_right:
+            if species and st.button("Show", key=f"history_show_{entry.id}", use_container_width=True):
+                st.query_params["team"] = code_from_bytes(entry.team)
+                st.rerun()
+
+    newer_col, older_col = st.columns(2)
+    with newer_col:
+        if cursors:
+            st.button("Newer", key="history_newer", on_click=cursors.pop, use_container_width=True)
+    with older_col:
+        if has_older:
+            st.button(
+                "Older",
+                key="history_older",
+                on_click=cursors.append,
+                args=(entries[-1].id,),
+                use_container_width=True,
+            )
 
 
 def main() -> None:
@@ -376,10 +325,9 @@ def main() -> None:
     """, unsafe_allow_html=True)
 
     # Load custom CSS for prettier team grid styling
-    css_path = Path(__file__).with_name("streamlit_styles.css")
-    if css_path.is_file():
-        css = css_path.read_text(encoding="utf-8")
-        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+    style = _load_style()
+    if style:
+        st.markdown(style, unsafe_allow_html=True)
 
     # Custom Header & Description
     st.markdown('<h1 class="main-header">Pokemon Team Generator</h1>', unsafe_allow_html=True)
@@ -395,6 +343,11 @@ def main() -> None:
         unsafe_allow_html=True
     )
 
+    _start_metrics_server()
+
+    if DB_PATH.exists() and _db_is_stale():
+        st.warning("The strategy database is out of date. Run `python db_migrations.py` to upgrade it.")
+
     # Tier selector
     tiers = _load_available_tiers()
     tier_index = 0
@@ -405,122 +358,98 @@ def main() -> None:
     with col2:
         tier = st.selectbox("Select tier", options=tiers, index=tier_index)
         include_lower = st.checkbox("Include Pokemon from lower tiers", value=True)
+        weighting = "uniform"
+        if _get_build_catalog().has_usage_weights:
+            weighting = st.radio(
+                "Sampling",
+                options=WEIGHTINGS,
+                format_func=lambda w: "Usage-weighted" if w == "usage" else "Uniform",
+                horizontal=True,
+                help="Usage-weighted picks common species, items and moves more often.",
+            )
+        with st.expander("Team rules"):
+            clauses = st.checkbox(
+                "Item and species clause, no repeated moves",
+                value=False,
+                help="No two Pokemon share an item or base species, and no set repeats a move.",
+            )
+            required_roles = st.multiselect(
+                "Required roles",
+                options=ROLES,
+                format_func=lambda role: role.replace("_", " ").capitalize(),
+            )
+            best_of = st.select_slider(
+                "Candidate teams",
+                options=BEST_OF_CHOICES,
+                value=1,
+                help="Generate this many teams and keep the one with the best type coverage.",
+            )
+        constraints = None
+        if clauses or required_roles:
+            constraints = TeamConstraints(
+                item_clause=clauses,
+                species_clause=clauses,
+                unique_moves=clauses,
+                required_roles=frozenset(required_roles),
+            )
         generate_btn = st.button("Generate random team", use_container_width=True)
 
-    if generate_btn:
-        with st.spinner("Generating team and uploading to Pokepaste..."):
+    shared_code = st.query_params.get("team")
+    with metrics.trace() as request_trace:
+        if generate_btn:
             try:
-                team_text, paste_url = generate_random_team_for_tier(tier, include_lower_tiers=include_lower)
+                team_text, team_code, paste_future = generate_random_team_for_tier(
+                    tier,
+                    include_lower_tiers=include_lower,
+                    weighting=weighting,
+                    constraints=constraints,
+                    best_of=best_of,
+                )
+                metrics.count("teams_generated", tier=tier)
             except Exception as exc:  # pragma: no cover - UI error path
-                st.error(f"Failed to generate team or upload to Pokepaste: {exc}")
+                st.error(f"Failed to generate team: {exc}")
                 return
 
-        # Success banner with inline Pokepaste link, constrained width
-        banner_left, banner_center, banner_right = st.columns([1, 3, 1])
-        with banner_center:
-            st.success(f"Team generated!  [Open in Pokepaste]({paste_url})")
+            # Put the team code in the URL so the page itself is a shareable link.
+            st.query_params["team"] = team_code
 
-        # Parse the team and generate sprite URLs locally
-        team_entries = _parse_showdown_team(team_text)
-        # image_urls = _fetch_pokemon_image_urls_from_pokepaste(paste_url) # Removed for performance
-        image_urls = [_generate_sprite_url(entry["name"]) for entry in team_entries]
+            # Banner with inline Pokepaste link, constrained width. It is filled in
+            # once the background upload finishes, after the team has rendered.
+            banner_left, banner_center, banner_right = st.columns([1, 3, 1])
+            with banner_center:
+                banner = st.empty()
+                banner.info("Team generated! Uploading to Pokepaste...")
 
-        # Generate HTML for the grid
-        grid_html = '<div class="team-grid-container">'
-        
-        for idx, entry in enumerate(team_entries):
-            img_url = image_urls[idx] if idx < len(image_urls) else None
-            
-            moves_html = "".join(
-                f"<span class='move-pill'>{m}</span>" for m in entry["moves"]
-            )
+            _render_team(team_text, _team_cards_from_code(team_code))
 
-            # Build a Showdown-inspired card layout
-            smogon_url = _generate_smogon_url(entry['name'])
-            card_html = "<div class='team-card'>"
-            card_html += "<div class='team-card-header'>"
-            card_html += f"<span class='team-name'>{entry['name']}</span>"
-            card_html += f"<a href='{smogon_url}' target='_blank' class='smogon-link' title='View Smogon Strategy'>Smogon ↗</a>"
-            card_html += "</div>"  # header
-
-            card_html += "<div class='team-card-body'>"
-
-            # LEFT COLUMN: sprite + basic info
-            card_html += "<div>"  # left col wrapper
-            if img_url:
-                card_html += "<div class='team-sprite'>"
-                card_html += f"<img src='{img_url}' alt='{entry['name']}'>"
-                card_html += "</div>"
-            if any([entry["item"], entry["ability"], entry["tera_type"], entry["nature"]]):
-                card_html += "<div class='sprite-info'>"
-                if entry["item"]:
-                    card_html += (
-                        "<div class='sprite-info-row'><span class='detail-label'>Item:</span>"
-                        f"<span>{entry['item']}</span></div>"
-                    )
-                if entry["ability"]:
-                    card_html += (
-                        "<div class='sprite-info-row'><span class='detail-label'>Ability:</span>"
-                        f"<span>{entry['ability']}</span></div>"
-                    )
-                if entry["tera_type"]:
-                    card_html += (
-                        "<div class='sprite-info-row'><span class='detail-label'>Tera:</span>"
-                        f"<span>{entry['tera_type']}</span></div>"
-                    )
-                if entry["nature"]:
-                    card_html += (
-                        "<div class='sprite-info-row'><span class='detail-label'>Nature:</span>"
-                        f"<span>{entry['nature'].replace('Nature: ', '')}</span></div>"
-                    )
-                card_html += "</div>"  # sprite-info
-            card_html += "</div>"  # left col
-
-            # MIDDLE COLUMN: moves
-            card_html += "<div class='team-moves-col'>"
-            card_html += "<div class='team-moves-title'>Moves</div>"
-            if moves_html:
-                card_html += f"<div class='team-moves'>{moves_html}</div>"
-            card_html += "</div>"  # moves col
-
-            # RIGHT COLUMN: EVs as labeled rows
-            card_html += "<div class='team-evs-col'>"
-            card_html += "<div class='team-evs-title'>EVs</div>"
-            if entry["evs"]:
-                raw = entry["evs"].replace("EVs: ", "")
-                parts = [p for p in raw.split(" / ") if p]
-                evs_map = {"HP": 0, "Atk": 0, "Def": 0, "SpA": 0, "SpD": 0, "Spe": 0}
-                for p in parts:
-                    sub = p.split()
-                    if len(sub) != 2:
-                        continue
-                    try:
-                        val = int(sub[0])
-                    except ValueError:
-                        continue
-                    stat = sub[1]
-                    if stat in evs_map:
-                        evs_map[stat] = val
-
-                ordered_stats = ["HP", "Atk", "Def", "SpA", "SpD", "Spe"]
-                rows = []
-                for stat in ordered_stats:
-                    val = evs_map[stat]
-                    rows.append(f"<div class='team-evs-row'>{stat}: {val}</div>")
-                card_html += "<div class='team-evs-table'>" + "".join(rows) + "</div>"
-            card_html += "</div>"  # evs col
-
-            card_html += "</div>"  # team-card-body
-            card_html += "</div>"  # team-card
-            
-            grid_html += card_html
-
-        grid_html += "</div>" # Close grid container
-        st.markdown(grid_html, unsafe_allow_html=True)
-
-        # Raw Showdown text hidden by default inside an expander
-        with st.expander("Show raw Showdown team"):
-            st.code(team_text, language="text")
+            try:
+                with metrics.timer("upload_wait"):
+                    paste_url = paste_future.result()
+            except Exception as exc:  # pragma: no cover - UI error path
+                with banner.container():
+                    st.warning(f"Team generated, but the Pokepaste upload failed ({exc}). Copy the team text instead:")
+                    st.code(team_text, language="text")
+            else:
+                banner.success(f"Team generated!  [Open in Pokepaste]({paste_url})  ·  Team code: `{team_code}`")
+        elif shared_code:
+            try:
+                team_text = _team_text_from_code(shared_code)
+                cards = _team_cards_from_code(shared_code)
+            except ValueError as exc:
+                st.error(f"Could not load the shared team: {exc}")
+            else:
+                banner_left, banner_center, banner_right = st.columns([1, 3, 1])
+                with banner_center:
+                    st.info(f"Showing shared team `{shared_code}`. Generate a new team to replace it.")
+                _render_team(team_text, cards)
+
+    with st.expander("Recent teams"):
+        _recent_teams(tiers)
+
+    # Opt-in per-request timing breakdown: add ?debug=1 to the URL.
+    if st.query_params.get("debug") == "1" and (generate_btn or shared_code):
+        with st.expander("Debug: timing breakdown"):
+            st.json(request_trace.as_dict())
 
     # Footer
     current_year = datetime.now().year
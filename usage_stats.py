@@ -0,0 +1,103 @@
+"""Import Smogon usage statistics as sampling weights.
+
+Reads a Smogon "chaos" usage file (e.g. ``gen9ou-1695.json`` from
+https://www.smogon.com/stats/) and stores weights in the ``usage_weights``
+table for every species, item, ability, nature, tera type and move that
+also appears in the build database for that tier:
+
+    python usage_stats.py --tier OU gen9ou-1695.json
+
+Option weights are stored as fractions of the species' total so they are
+comparable with ``build_catalog.MISSING_WEIGHT``.
+"""
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+
+from db_migrations import DB_PATH, migrate
+from species_names import to_id
+
+
+# chaos key -> usage_weights kind, and the build table/column holding those names
+OPTION_KINDS = {
+    "Items": ("item", "build_items", "item_name"),
+    "Abilities": ("ability", "build_abilities", "ability_name"),
+    "Moves": ("move", "build_moves", "move_name"),
+    "Tera Types": ("tera_type", "build_tera_types", "tera_type"),
+}
+
+
+def _names_by_id(conn: sqlite3.Connection, table: str, column: str, tier: str, pokemon_name: str) -> dict[str, str]:
+    rows = conn.execute(
+        f"SELECT DISTINCT t.{column} FROM {table} t JOIN pokemon_builds b ON b.id = t.build_id "
+        "WHERE b.tier = ? AND b.pokemon_name = ?",
+        (tier, pokemon_name),
+    )
+    return {to_id(name): name for (name,) in rows if name}
+
+
+def _fractions(raw: dict[str, float]) -> dict[str, float]:
+    total = sum(value for value in raw.values() if value > 0)
+    return {key: value / total for key, value in raw.items() if value > 0} if total else {}
+
+
+def import_chaos_stats(conn: sqlite3.Connection, tier: str, stats: dict) -> int:
+    """Replace the usage weights of ``tier`` with those in a chaos stats dict.
+
+    Returns the number of weight rows written.
+    """
+    species_by_id = {
+        to_id(name): name
+        for (name,) in conn.execute("SELECT DISTINCT pokemon_name FROM pokemon_builds WHERE tier = ?", (tier,))
+    }
+
+    rows = []
+    for species, data in stats.get("data", {}).items():
+        pokemon_name = species_by_id.get(to_id(species))
+        if pokemon_name is None:
+            continue
+        rows.append((tier, pokemon_name, "species", pokemon_name, float(data.get("usage", 0.0))))
+
+        for key, (kind, table, column) in OPTION_KINDS.items():
+            names = _names_by_id(conn, table, column, tier, pokemon_name)
+            for option_id, fraction in _fractions(data.get(key, {})).items():
+                if to_id(option_id) in names:
+                    rows.append((tier, pokemon_name, kind, names[to_id(option_id)], fraction))
+
+        # Spreads look like "Jolly:0/252/0/0/4/252"; natures are summed across spreads.
+        natures: dict[str, float] = {}
+        for spread, value in data.get("Spreads", {}).items():
+            nature = spread.split(":", 1)[0]
+            natures[nature] = natures.get(nature, 0.0) + value
+        names = _names_by_id(conn, "build_natures", "nature_name", tier, pokemon_name)
+        for nature, fraction in _fractions(natures).items():
+            if to_id(nature) in names:
+                rows.append((tier, pokemon_name, "nature", names[to_id(nature)], fraction))
+
+    with conn:
+        conn.execute("DELETE FROM usage_weights WHERE tier = ?", (tier,))
+        conn.executemany("INSERT OR REPLACE INTO usage_weights VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import Smogon chaos usage stats as sampling weights.")
+    parser.add_argument("stats", type=Path, help="chaos JSON file, e.g. gen9ou-1695.json")
+    parser.add_argument("--tier", required=True, help="tier in the build database, e.g. OU")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    args = parser.parse_args()
+
+    stats = json.loads(args.stats.read_text(encoding="utf-8"))
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn)
+        count = import_chaos_stats(conn, args.tier, stats)
+    finally:
+        conn.close()
+    print(f"Stored {count} usage weights for tier {args.tier} in {args.db}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import random
+from collections.abc import Sequence
+
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) to build, O(1) per weighted draw.
+
+    Weights are relative and may contain zeros; if they are all zero the
+    table samples uniformly.
+    """
+
+    __slots__ = ("_prob", "_alias")
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        if n == 0:
+            raise ValueError("AliasTable needs at least one weight")
+        if any(w < 0 for w in weights):
+            raise ValueError("AliasTable weights must be non-negative")
+
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights] if total > 0 else [1.0] * n
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to floating point error.
+        for i in small + large:
+            prob[i] = 1.0
+
+        self._prob = prob
+        self._alias = alias
+
+    @classmethod
+    def from_arrays(cls, prob: Sequence[float], alias: Sequence[int]) -> "AliasTable":
+        """A table over already built arrays, e.g. views into a catalog snapshot."""
+        table = cls.__new__(cls)
+        table._prob = prob
+        table._alias = alias
+        return table
+
+    def arrays(self) -> tuple[Sequence[float], Sequence[int]]:
+        """The probability and alias arrays, for ``from_arrays``."""
+        return self._prob, self._alias
+
+    def __len__(self) -> int:
+        return len(self._prob)
+
+    def sample(self, rng: random.Random) -> int:
+        """Draw one index with probability proportional to its weight."""
+        i = rng.randrange(len(self._prob))
+        return i if rng.random() < self._prob[i] else self._alias[i]